@@ -1,8 +1,6 @@
 # asset.py
 
 import os
-import time
-import json
 import shutil
 from datetime import datetime
 
@@ -12,13 +10,26 @@ from PyQt5.QtWidgets import (
     QComboBox, QLabel, QShortcut, QMessageBox, QMenu,
     QSizePolicy, QToolButton, QApplication
 )
-from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtGui import QKeySequence, QPixmap,QFont
+from PyQt5.QtCore import Qt, pyqtSignal, QTimer
+from PyQt5.QtGui import QKeySequence, QFont
 
 from tab_presets import CustomItemWidget
+from search_index import SearchIndex, IndexEnricher
+from card_builder import CardBuilder
+from persist import write_json_atomic
+from session_state import session_state, latest_selection
+from settings import settings
+from remote_cache import remote_cache
+from dependency_index import dependency_index, fill_dependency_menu
+from jobs import submit, remove_tree, save_thumbnails, DONE
+from thumb_cache import LEGACY_THUMB, entity_thumbnails
+from thumb_atlas import load_atlas, schedule_refresh
+from selection import SelectionModel, add_navigation_shortcuts, is_shown
 
 BASE_DIR       = os.path.dirname(__file__)
 THUMB_TEMPLATE = os.path.join(BASE_DIR, "template", "thumbnail", "thumb_project.png")
+# Key session_state: list loại asset (tên folder) đang mở trong AssetTab
+EXPANDED_KEY   = "expanded_asset_types"
 
 
 # --- CollapsibleSection để nhóm theo loại asset ---
@@ -26,15 +37,22 @@ class CollapsibleSection(QWidget):
     """
     Widget bao gồm một header (QToolButton) và một content widget có thể ẩn/hiện.
     Khi header được nhấn, content.expand() hoặc content.collapse().
+    Header hiện số entity; card chỉ được tạo khi section mở lần đầu (AssetTab quyết định, populated).
+    built: asset_dir -> card đã tạo; section mở tạm do ô tìm kiếm chỉ tạo card cho asset khớp,
+    populated = đã tạo đủ mọi entry.
     """
 
-    def __init__(self, title: str, parent=None):
+    def __init__(self, title: str, count: int = 0, expanded: bool = True, parent=None):
         super().__init__(parent)
-        self.toggle_button = QToolButton(text=title, checkable=True, checked=True)
+        self.title = title
+        self.count = count
+        self.populated = False
+        self.built = {}
+        self.toggle_button = QToolButton(checkable=True, checked=expanded)
         self.toggle_button.setStyleSheet("QToolButton { border: none; }")
         self.toggle_button.setToolButtonStyle(Qt.ToolButtonTextBesideIcon)
-        self.toggle_button.setArrowType(Qt.DownArrow)
         self.toggle_button.toggled.connect(self.on_toggled)
+        self.set_count(count)
 
         self.content_area = QWidget()
         self.content_area.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
@@ -48,6 +66,22 @@ class CollapsibleSection(QWidget):
         main_layout.setSpacing(0)
         main_layout.addWidget(self.toggle_button)
         main_layout.addWidget(self.content_area)
+        self.on_toggled(expanded)
+
+    def is_expanded(self):
+        return self.toggle_button.isChecked()
+
+    def set_expanded(self, expanded: bool):
+        self.toggle_button.setChecked(expanded)
+
+    def set_count(self, count: int, matched=None):
+        """
+        matched: số entity khớp ô tìm kiếm (None = không lọc).
+        """
+        self.count = count
+        shown = f"{matched}/{count}" if matched is not None else f"{count}"
+        self.toggle_button.setText(f"{self.title} ({shown})")
+        self.toggle_button.setEnabled(count > 0)
 
     def on_toggled(self, checked: bool):
         if checked:
@@ -57,8 +91,8 @@ class CollapsibleSection(QWidget):
             self.toggle_button.setArrowType(Qt.RightArrow)
             self.content_area.setVisible(False)
 
-    def add_widget(self, widget: QWidget):
-        self.content_layout.addWidget(widget)
+    def add_widget(self, widget: QWidget, index: int = -1):
+        self.content_layout.insertWidget(index, widget)
 
     def clear(self):
         while self.content_layout.count():
@@ -66,6 +100,8 @@ class CollapsibleSection(QWidget):
             w = item.widget()
             if w:
                 w.deleteLater()
+        self.populated = False
+        self.built.clear()
 
 
 class AssetItemWidget(CustomItemWidget):
@@ -74,8 +110,10 @@ class AssetItemWidget(CustomItemWidget):
     Khi click trái, emit signal asset_selected; khi click phải, hiện menu.
     """
 
-    def __init__(self, title: str, image_path: str, asset_path: str, parent_tab=None):
-        super().__init__(title, image_path, text1="", text2="", text3="", parent_tab=parent_tab)
+    def __init__(self, title: str, image_path: str, asset_path: str, parent_tab=None, image_variants=None,
+                 atlas_region=None):
+        super().__init__(title, image_path, text1="", text2="", text3="", parent_tab=parent_tab,
+                         image_variants=image_variants, atlas_region=atlas_region)
         self.asset_path = asset_path
 
         # Chuyển sang List View
@@ -97,16 +135,9 @@ class AssetItemWidget(CustomItemWidget):
             icon_label.setFixedSize(70, 48)
             icon_label.setAlignment(Qt.AlignCenter)
 
-            # Nếu pixmap cũ tồn tại, scale giữ tỉ lệ vừa khung 80×64
-            orig_pix = icon_label.pixmap()
-            if orig_pix and not orig_pix.isNull():
-                scaled = orig_pix.scaled(
-                    icon_label.width(),
-                    icon_label.height(),
-                    Qt.KeepAspectRatio,
-                    Qt.SmoothTransformation
-                )
-                icon_label.setPixmap(scaled)
+            # Nạp lại icon, scale giữ tỉ lệ vừa khung mới
+            self.release_pixmaps("list")
+            self.load_pixmap("list")
 
             # Label tiêu đề: căn trái, giữ nguyên bố cục
             self.title_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
@@ -117,10 +148,8 @@ class AssetItemWidget(CustomItemWidget):
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton and self.parent_tab:
-            self.parent_tab.clear_selection()
-            self.set_selected(True)
-            self.parent_tab._write_latest_asset(self.asset_path)
-            self.parent_tab.asset_selected.emit(self.asset_path)
+            # Ctrl / Shift: chọn nhiều; card chính mới được mở ở các tab chi tiết (_on_current_card)
+            self.parent_tab.selection.click(self, event.modifiers())
             event.accept()
         else:
             super().mousePressEvent(event)
@@ -133,14 +162,23 @@ class AssetItemWidget(CustomItemWidget):
 
     def contextMenuEvent(self, event):
         if self.parent_tab:
-            self.parent_tab.clear_selection()
-        self.set_selected(True)
+            self.parent_tab.selection.press(self)
+        else:
+            self.set_selected(True)
 
         menu = QMenu(self)
         menu.addAction("Open in Explorer", self.open_folder)
         menu.addAction("Copy File Path", self.copy_path)
         menu.addAction("Create Thumbnail", self.create_thumbnail)
         menu.addAction("Delete", self.delete_folder)
+        if self.parent_tab and self.parent_tab.project_root:
+            # Shot / asset nào đang link asset này (index dependency, quét lại ở nền nếu cũ)
+            deps = dependency_index(self.parent_tab.project_root)
+            deps.refresh_if_stale()
+            users = deps.used_by(self.asset_path)
+            menu.addSeparator()
+            fill_dependency_menu(menu.addMenu(f"Used In ({len(users)})"), users,
+                                 deps.is_scanning(), self.parent_tab.entity_requested.emit)
         menu.exec_(event.globalPos())
 
     def open_folder(self):
@@ -162,32 +200,104 @@ class AssetItemWidget(CustomItemWidget):
         if confirm != QMessageBox.Yes:
             return
 
-        shutil.rmtree(self.asset_path)
-        if self.parent_tab and self in self.parent_tab.cards:
-            self.parent_tab.cards.remove(self)
-            self.parent_tab.container_layout.removeWidget(self)
-        self.setParent(None)
-        self.deleteLater()
+        # Xoá folder ở JobScheduler, chỉ bỏ card khi folder đã xoá xong;
+        # lỗi / bị hủy giữa chừng (folder có thể còn một phần) → nạp lại danh sách
+        tab, asset_path = self.parent_tab, self.asset_path
+
+        def on_done(_):
+            remote_cache().invalidate(asset_path)
+            if tab:
+                tab.remove_asset(asset_path)
+
+        def on_error(message):
+            QMessageBox.warning(tab, "Warning", f"Không thể xoá asset:\n{asset_path}\n{message}")
+
+        def on_finished(job):
+            if job.state != DONE:
+                remote_cache().invalidate(asset_path)
+                if tab:
+                    tab.load_assets()
+
+        submit(f"Delete {os.path.basename(asset_path)}", remove_tree, asset_path, retries=1,
+               on_done=on_done, on_error=on_error, on_finished=on_finished)
 
     def create_thumbnail(self):
         clipboard = QApplication.clipboard()
-        timeout = time.time() + 30
         img = clipboard.image()
 
         if img.isNull():
             QMessageBox.warning(self, "Warning", "Không lấy được ảnh từ Clipboard. Vui lòng thử lại.")
             return
 
-        thumb_path = os.path.join(self.asset_path, "thumbnail.png")
-        if not img.save(thumb_path, "PNG"):
-            QMessageBox.warning(self, "Warning", "Không thể lưu ảnh thumbnail.")
-            return
+        # Encode các cỡ (icon / card / preview) ở JobScheduler, không ghi ảnh full-size lên Drive
+        submit(f"Thumbnail {self.title}", save_thumbnails, self.asset_path, img,
+               on_done=self._on_thumbnail_saved,
+               on_error=lambda message: QMessageBox.warning(self, "Warning", "Không thể lưu ảnh thumbnail."))
 
-        list_widget = self.stack.widget(1)
-        icon_label = list_widget.findChildren(QLabel)[0]
-        pix = QPixmap(thumb_path)
-        pix = pix.scaled(80, 64, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        icon_label.setPixmap(pix)
+    def _on_thumbnail_saved(self, variants):
+        for path in list(variants.values()) + [os.path.join(self.asset_path, LEGACY_THUMB)]:
+            remote_cache().invalidate(path)
+        self.set_image_variants(variants)
+        # Chỉ cập nhật ô của asset này trong atlas của section
+        if self.parent_tab:
+            self.parent_tab.refresh_atlas(getattr(self, "section", None), only=[os.path.basename(self.asset_path)])
+
+
+def create_asset_files(job, asset_path, asset_name, asset_type, user_name, project_short):
+    """
+    Chạy ở JobScheduler: folder asset + subfolders, JSON metadata chung, template .blend
+    cho stage "Modeling" kèm JSON riêng. Trả về list cảnh báo để GUI thread hiển thị.
+    """
+    warnings = []
+    os.makedirs(asset_path, exist_ok=True)
+    for sub in ["scenefiles", "outputs", "textures"]:
+        os.makedirs(os.path.join(asset_path, sub), exist_ok=True)
+
+    # Tạo JSON metadata cho asset chung
+    data = {
+        "name":    asset_name,
+        "type":    asset_type,
+        "user":    user_name,
+        "version": 1,
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M")
+    }
+    json_path = os.path.join(asset_path, f"{asset_name}.json")
+    try:
+        write_json_atomic(json_path, data, lock=True, indent=4)
+    except Exception as e:
+        warnings.append(f"Không thể tạo file JSON metadata:\n{e}")
+    # report (không phải điểm hủy): folder asset đã tạo thì tạo nốt file .blend + JSON,
+    # không để lại asset dở dang
+    job.report(30)
+
+    # Tạo file .blend mặc định cho stage "Modeling"
+    if not project_short:
+        return warnings
+    template_blend = os.path.join(BASE_DIR, "template", "app", "blender_template.blend")
+    if not os.path.exists(template_blend):
+        warnings.append(f"Không tìm thấy blender_template.blend tại:\n{template_blend}")
+        return warnings
+    new_blend = f"{project_short}_{asset_name}_modeling.blend"
+    blender_dest = os.path.join(asset_path, "scenefiles", new_blend)
+    shutil.copy(template_blend, blender_dest)
+    job.report(80)
+
+    # Tạo JSON metadata riêng cho file .blend này
+    name_no_ext = os.path.splitext(new_blend)[0]
+    json_per_file = os.path.join(asset_path, "scenefiles", f"{name_no_ext}.json")
+    metadata = {
+        "name":    asset_name,
+        "type":    asset_type,
+        "stage":   "Modeling",
+        "user":    user_name,
+        "version": "001",
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M")
+    }
+    try:
+        write_json_atomic(json_per_file, metadata, lock=True, indent=4)
+    except Exception as e:
+        warnings.append(f"Không thể tạo JSON cho file .blend:\n{e}")
+    return warnings
 
 
 class AddAssetDialog(QDialog):
@@ -228,11 +338,13 @@ class AssetTab(QWidget):
     """
     Widget quản lý Asset:
     - Hiển thị danh sách Asset và nút "Thêm Asset"
-    - Mỗi lần select hoặc tạo Asset, ghi latest_asset.json vào <project_root>/00_Pipeline/data/
+    - Mỗi lần select hoặc tạo Asset, nhớ asset gần nhất trong session_state (local, ghi có debounce)
     - Emit signal asset_selected(asset_path) để MasterUI load tab
     """
 
     asset_selected = pyqtSignal(str)
+    # (kind, entity_path): mở entity khác (ví dụ chọn trong menu "Used In")
+    entity_requested = pyqtSignal(str, str)
 
     def __init__(self, project_root=None, username=None):
         super().__init__()
@@ -247,9 +359,32 @@ class AssetTab(QWidget):
         self.setFocusPolicy(Qt.StrongFocus)
         QShortcut(QKeySequence("Ctrl+Q"), self, activated=self._create_thumbnail_selected)
 
+        # Vùng chọn (click / Ctrl / Shift / phím mũi tên), xem selection.SelectionModel
+        self.selection = SelectionModel(self.visible_cards, self._on_current_card)
+        add_navigation_shortcuts(self, self.selection)
+
         main_layout = QVBoxLayout(self)
         self.setLayout(main_layout)
 
+        # Ô tìm kiếm: lọc card theo tên/type/stage/user ngay khi gõ
+        self.search_index = SearchIndex()
+        self.index_enricher = IndexEnricher(self)
+        self.index_enricher.finished.connect(self._on_index_enriched)
+        self.sections = []
+        # Section chờ tạo card ([section, only]), loại asset đang mở (nhớ theo user), tập asset khớp ô tìm kiếm
+        self._pending_sections = []
+        self._expanded_types = set()
+        self._matched = None
+        self._auto_toggle = False
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Tìm asset (tên, loại, stage, user)...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.apply_filter)
+        self.search_edit.returnPressed.connect(self._select_best_match)
+        main_layout.addWidget(self.search_edit)
+        QShortcut(QKeySequence("Ctrl+F"), self, activated=self.search_edit.setFocus)
+
         self.scroll = QScrollArea()
         self.scroll.setWidgetResizable(True)
         main_layout.addWidget(self.scroll)
@@ -264,181 +399,318 @@ class AssetTab(QWidget):
         self.add_button.clicked.connect(self.add_asset)
         main_layout.addWidget(self.add_button)
 
+        # Tạo card theo lát thời gian khi thư viện asset lớn
+        self.card_builder = CardBuilder(self)
+
         self._last_asset_path = None
         self._load_latest_asset()
 
-        if self.project_root and os.path.isdir(os.path.join(self.project_root, "03_Production", "assets")):
+        # Mirror Drive phát hiện thay đổi (kiểm tra nền) → nạp lại, gom nhiều thay đổi thành một lần
+        self._reload_timer = QTimer(self)
+        self._reload_timer.setSingleShot(True)
+        self._reload_timer.setInterval(500)
+        self._reload_timer.timeout.connect(self.load_assets)
+        remote_cache().changed.connect(self._on_remote_changed)
+
+        if self.project_root and remote_cache().isdir(os.path.join(self.project_root, "03_Production", "assets")):
             self.load_assets()
 
     def get_asset_root(self):
         return os.path.join(self.project_root, "03_Production", "assets")
 
-    def _get_pipeline_data_dir(self):
-        data_dir = os.path.join(self.project_root, "00_Pipeline", "data")
-        os.makedirs(data_dir, exist_ok=True)
-        return data_dir
+    def _on_remote_changed(self, path):
+        if self.project_root and os.path.normcase(path).startswith(os.path.normcase(self.get_asset_root())):
+            self._reload_timer.start()
 
     def _write_latest_asset(self, asset_path: str):
-        data_dir = self._get_pipeline_data_dir()
-        latest_file = os.path.join(data_dir, "latest_asset.json")
+        # Chỉ cập nhật session trong bộ nhớ; file local được ghi gộp sau (debounce)
         if self._last_asset_path == asset_path:
             return
-        try:
-            with open(latest_file, "w", encoding="utf-8") as f:
-                json.dump({"asset_path": asset_path}, f, ensure_ascii=False, indent=2)
-            self._last_asset_path = asset_path
-        except Exception:
-            pass
+        session_state().set(self.project_root, "latest_asset", asset_path)
+        self._last_asset_path = asset_path
 
     def _load_latest_asset(self):
-        data_dir = self._get_pipeline_data_dir()
-        latest_file = os.path.join(data_dir, "latest_asset.json")
-        if os.path.exists(latest_file):
-            try:
-                with open(latest_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                asset_path = data.get("asset_path", "")
-                if asset_path and os.path.isdir(asset_path):
-                    self._last_asset_path = asset_path
-                else:
-                    self._last_asset_path = None
-            except Exception:
-                self._last_asset_path = None
-        else:
-            self._last_asset_path = None
+        asset_path = latest_selection(self.project_root, "asset")
+        self._last_asset_path = asset_path if asset_path and os.path.isdir(asset_path) else None
 
     def load_assets(self):
+        """
+        Quét rẻ (listing qua mirror Drive, không tạo widget) để có header + số asset mỗi loại
+        và search index cho mọi asset. Card chỉ được tạo cho section đang mở, theo lát thời gian
+        (CardBuilder); section đóng được tạo card khi mở lần đầu. Gọi lại giữa chừng sẽ hủy lần build cũ.
+        """
+        self.card_builder.cancel()
         self.clear_layout(self.container_layout)
         self.cards.clear()
+        self.selection.reset()
+        self.sections = []
+        self._pending_sections = []
+        self.search_index.clear()
 
         asset_root = self.get_asset_root()
-        if not os.path.isdir(asset_root):
+        if not remote_cache().isdir(asset_root):
             return
 
-        for asset_type in sorted(os.listdir(asset_root)):
-            type_dir = os.path.join(asset_root, asset_type)
-            if not os.path.isdir(type_dir):
+        cache = remote_cache()
+        self._expanded_types = self._saved_expanded_types()
+        for asset_type, is_dir in cache.listdir(asset_root):
+            if not is_dir:
                 continue
+            type_dir = os.path.join(asset_root, asset_type)
+            entries = [(name, os.path.join(type_dir, name)) for name, d in cache.listdir(type_dir) if d]
 
-            section = CollapsibleSection(asset_type.capitalize())
+            section = CollapsibleSection(asset_type.capitalize(), len(entries), asset_type in self._expanded_types)
+            section.asset_type = asset_type
+            section.folder = type_dir
+            section.entries = entries
+            section.toggle_button.toggled.connect(lambda checked, s=section: self._on_section_toggled(s, checked))
             self.container_layout.addWidget(section)
+            self.sections.append(section)
+            for asset_name, asset_dir in entries:
+                self.search_index.add(asset_dir, name=asset_name, type=asset_type)
+
+        # Đọc user/stage từ metadata JSON ở thread nền rồi bổ sung vào index (cả asset trong section đóng)
+        self.index_enricher.start([
+            (asset_dir, asset_dir, asset_name) for section in self.sections for asset_name, asset_dir in section.entries
+        ])
+        dependency_index(self.project_root).refresh_if_stale()
+
+        for section in self.sections:
+            if section.is_expanded():
+                self._populate(section)
+        self.apply_filter(self.search_edit.text())
+
+    def _saved_expanded_types(self):
+        """
+        Loại asset đang mở, nhớ theo user trong session_state. Chưa lưu lần nào → chỉ mở loại
+        chứa asset gần nhất.
+        """
+        saved = session_state().get(self.project_root, EXPANDED_KEY)
+        if isinstance(saved, list):
+            return set(saved)
+        if self._last_asset_path:
+            return {os.path.basename(os.path.dirname(self._last_asset_path))}
+        return set()
 
-            for asset_name in sorted(os.listdir(type_dir)):
-                asset_dir = os.path.join(type_dir, asset_name)
-                if not os.path.isdir(asset_dir):
+    def _on_section_toggled(self, section, checked):
+        if checked:
+            # Mở do ô tìm kiếm: chỉ tạo card cho asset khớp
+            self._populate(section, self._matched if self._auto_toggle else None)
+        # Mở do ô tìm kiếm thì không lưu; user tự mở / đóng thì nhớ lại
+        if self._auto_toggle:
+            return
+        if checked:
+            self._expanded_types.add(section.asset_type)
+        else:
+            self._expanded_types.discard(section.asset_type)
+        session_state().set(self.project_root, EXPANDED_KEY, sorted(self._expanded_types))
+
+    def _populate(self, section, only=None):
+        """
+        Xếp section vào hàng đợi tạo card; CardBuilder đang chạy thì generator hiện tại làm luôn.
+        only: tập asset_dir cần card (section mở tạm khi lọc); None = mọi entry.
+        """
+        if section.populated:
+            return
+        pending = next((p for p in self._pending_sections if p[0] is section), None)
+        if pending is not None:
+            if pending[1] is not None:
+                pending[1] = None if only is None else pending[1] | only
+            return
+        self._pending_sections.append([section, None if only is None else set(only)])
+        if not self.card_builder.is_running():
+            first_batch = self.scroll.viewport().height() // 64 + 1
+            self.card_builder.start(self._iter_cards(), first_batch=first_batch)
+
+    def _iter_cards(self):
+        """
+        Generator: mỗi lần yield là đã tạo xong một AssetItemWidget và thêm vào section đang chờ.
+        Card ẩn / hiện ngay theo ô tìm kiếm hiện tại (_matched); card chèn đúng thứ tự entries
+        dù section đã có card của lần tạo một phần trước.
+        """
+        cache = remote_cache()
+        while self._pending_sections:
+            section, only = self._pending_sections.pop(0)
+            if only is None:
+                section.populated = True
+            # Có atlas: mọi icon của section cắt từ một ảnh, không list / đọc file từng asset
+            atlas = load_atlas(self.project_root, section.folder)
+            self.refresh_atlas(section)
+            position = 0
+            for order, (asset_name, asset_dir) in enumerate(section.entries):
+                if asset_dir in section.built:
+                    position += 1
                     continue
+                if only is not None and asset_dir not in only:
+                    continue
+                if atlas is not None:
+                    variants, legacy, region = {}, "", atlas.get(asset_name)
+                else:
+                    # Thumbnail đã lưu: các cỡ dựng sẵn (card nạp cỡ nhỏ nhất vừa khung), hoặc file cũ full-size
+                    variants, legacy = entity_thumbnails(asset_dir, [n for n, d in cache.listdir(asset_dir) if not d])
+                    region = None
+                card = AssetItemWidget(asset_name, legacy or THUMB_TEMPLATE, asset_dir, parent_tab=self,
+                                       image_variants=variants, atlas_region=region)
+                card.section = section
+                card.order = order
+                if self._matched is not None and asset_dir not in self._matched:
+                    card.setVisible(False)
+                section.add_widget(card, position)
+                section.built[asset_dir] = card
+                position += 1
+                self.cards.append(card)
 
-                thumb_path = THUMB_TEMPLATE
-                # Nếu có thumbnail đã lưu, dùng nó
-                custom_thumb = os.path.join(asset_dir, "thumbnail.png")
-                if os.path.exists(custom_thumb):
-                    thumb_path = custom_thumb
+                # Chọn lại asset gần nhất ngay khi card của nó được tạo
+                if asset_dir == self._last_asset_path:
+                    self.selection.select_only(card)
+                    self.asset_selected.emit(self._last_asset_path)
 
-                card = AssetItemWidget(asset_name, thumb_path, asset_dir, parent_tab=self)
-                section.add_widget(card)
-                self.cards.append(card)
+                yield card
 
-            if section.content_layout.count() == 0:
-                section.toggle_button.setEnabled(False)
-                section.toggle_button.setArrowType(Qt.RightArrow)
-                section.content_area.setVisible(False)
+    def refresh_atlas(self, section, only=None):
+        """
+        Cập nhật atlas icon của section ở nền (quét toàn bộ tối đa một lần mỗi RESCAN_AFTER,
+        only=[tên] cho asset vừa đổi thumbnail); atlas đổi thì card đã tạo cắt icon từ ảnh mới.
+        """
+        if section is None:
+            return
+        schedule_refresh(self.project_root, section.folder, lambda: self._apply_atlas(section), only=only)
 
-        if self._last_asset_path:
-            for c in self.cards:
-                if c.asset_path == self._last_asset_path:
-                    c.set_selected(True)
-                    self.asset_selected.emit(self._last_asset_path)
-                    sec_widget = c.parent().parent()
-                    if isinstance(sec_widget, CollapsibleSection):
-                        sec_widget.toggle_button.setChecked(True)
-                    break
+    def _apply_atlas(self, section):
+        if section not in self.sections:
+            return  # Tab đã load lại, section cũ đã bị xoá
+        atlas = load_atlas(self.project_root, section.folder)
+        if atlas is None:
+            return
+        for card in self.cards:
+            if getattr(card, "section", None) is section:
+                card.set_atlas_region(atlas.get(os.path.basename(card.asset_path)))
+
+    def reveal(self, asset_path):
+        """
+        Mở section chứa asset_path (tạo card nếu chưa có) và trả về card của nó, hoặc None.
+        """
+        section = next((s for s in self.sections if any(p == asset_path for _, p in s.entries)), None)
+        if section is None:
+            return None
+        if section.is_expanded():
+            self._populate(section)
+        else:
+            section.set_expanded(True)
+        self.card_builder.finish()
+        return next((c for c in self.cards if c.asset_path == asset_path), None)
+
+    def remove_asset(self, asset_path):
+        """
+        Folder asset đã bị xoá: bỏ entry khỏi section (cập nhật số trên header), search index và card.
+        """
+        self.search_index.remove(asset_path)
+        section = next((s for s in self.sections if any(p == asset_path for _, p in s.entries)), None)
+        if section is None:
+            return
+        section.entries = [e for e in section.entries if e[1] != asset_path]
+        card = section.built.pop(asset_path, None)
+        order = {p: i for i, (_, p) in enumerate(section.entries)}
+        for p, c in section.built.items():
+            c.order = order[p]
+        if self._matched is None:
+            section.set_count(len(section.entries))
+        else:
+            self._matched.discard(asset_path)
+            hits = sum(1 for _, p in section.entries if p in self._matched)
+            section.set_count(len(section.entries), hits)
+            if not hits:
+                section.setVisible(False)
+        if card is not None:
+            if card in self.cards:
+                self.cards.remove(card)
+            self.selection.discard(card)
+            card.setParent(None)
+            card.deleteLater()
+
+    def _on_index_enriched(self, generation, fields_by_key):
+        if generation != self.index_enricher.generation:
+            return
+        for key, fields in fields_by_key.items():
+            if key in self.search_index and fields:
+                self.search_index.update(key, **fields)
+        if self.search_edit.text().strip():
+            self.apply_filter(self.search_edit.text())
+
+    def apply_filter(self, text):
+        """
+        Ẩn/hiện card có sẵn theo kết quả tìm kiếm (không tạo lại widget).
+        Đang lọc: section có asset khớp được mở tạm (chỉ tạo card cho asset khớp), header hiện số khớp,
+        section không còn asset nào khớp bị ẩn. Xoá ô tìm kiếm → trở về trạng thái mở / đóng đã nhớ.
+        """
+        text = text.strip()
+        matched = {k for k, _ in self.search_index.search(text)} if text else None
+        self._matched = matched
+
+        for c in self.cards:
+            visible = matched is None or c.asset_path in matched
+            if c.isHidden() == visible:
+                c.setVisible(visible)
+
+        self._auto_toggle = True
+        try:
+            for section in self.sections:
+                if matched is None:
+                    section.set_count(len(section.entries))
+                    section.set_expanded(section.asset_type in self._expanded_types)
+                    show = True
+                else:
+                    hits = sum(1 for _, p in section.entries if p in matched)
+                    section.set_count(len(section.entries), hits)
+                    show = hits > 0
+                    if show:
+                        if section.is_expanded():
+                            self._populate(section, matched)
+                        else:
+                            section.set_expanded(True)
+                if section.isHidden() == show:
+                    section.setVisible(show)
+        finally:
+            self._auto_toggle = False
+
+    def _select_best_match(self):
+        """
+        Enter trong ô tìm kiếm → chọn asset có điểm cao nhất.
+        """
+        ranked = self.search_index.search(self.search_edit.text(), limit=1)
+        if not ranked:
+            return
+        best = self.reveal(ranked[0][0])
+        if best:
+            self.selection.select_only(best)
+            self._on_current_card(best)
 
     def add_asset(self):
         dialog = AddAssetDialog()
         if dialog.exec_():
             asset_name = dialog.asset_name
             asset_type = dialog.asset_type
-
             asset_path = os.path.join(self.project_root, "03_Production", "assets", asset_type, asset_name)
-            os.makedirs(asset_path, exist_ok=True)
-            for sub in ["scenefiles", "outputs", "textures"]:
-                os.makedirs(os.path.join(asset_path, sub), exist_ok=True)
-
-            # Lấy user từ latest_user.json
-            user_name = ""
-            if self.project_root:
-                latest_user_file = os.path.join(BASE_DIR, "data", "latest_user.json")
-                if os.path.exists(latest_user_file):
-                    try:
-                        with open(latest_user_file, "r", encoding="utf-8") as uf:
-                            udata = json.load(uf)
-                        user_name = udata.get("last_user", "")
-                    except Exception:
-                        user_name = ""
-
-            # Tạo JSON metadata cho asset chung
-            data = {
-                "name":    asset_name,
-                "type":    asset_type,
-                "user":    user_name,
-                "version": 1,
-                "created": datetime.now().strftime("%Y-%m-%d %H:%M")
-            }
-            json_path = os.path.join(asset_path, f"{asset_name}.json")
-            try:
-                with open(json_path, "w", encoding="utf-8") as f:
-                    json.dump(data, f, indent=4, ensure_ascii=False)
-            except Exception as e:
-                QMessageBox.warning(self, "Warning", f"Không thể tạo file JSON metadata:\n{e}")
-
-            # Tạo file .blend mặc định cho stage "Modeling"
-            latest_proj_file = os.path.join(os.path.dirname(__file__), "data", "latest_project.json")
-            project_short = ""
-            if os.path.exists(latest_proj_file):
-                try:
-                    with open(latest_proj_file, "r", encoding="utf-8") as f:
-                        proj_data = json.load(f)
-                    project_short = proj_data.get("short", "")
-                except Exception:
-                    project_short = ""
-            if project_short:
-                template_blend = os.path.join(BASE_DIR, "template", "app", "blender_template.blend")
-                if os.path.exists(template_blend):
-                    new_blend = f"{project_short}_{asset_name}_modeling.blend"
-                    blender_dest = os.path.join(asset_path, "scenefiles", new_blend)
-                    shutil.copy(template_blend, blender_dest)
-
-                    # Tạo JSON metadata riêng cho file .blend này
-                    name_no_ext = os.path.splitext(new_blend)[0]
-                    json_per_file = os.path.join(asset_path, "scenefiles", f"{name_no_ext}.json")
-
-                    timestamp   = datetime.now().strftime("%Y-%m-%d %H:%M")
-                    version_str = "001"
-                    metadata = {
-                        "name":    asset_name,
-                        "type":    asset_type,
-                        "stage":   "Modeling",
-                        "user":    user_name,
-                        "version": version_str,
-                        "created": timestamp
-                    }
-                    try:
-                        with open(json_per_file, "w", encoding="utf-8") as jf:
-                            json.dump(metadata, jf, ensure_ascii=False, indent=4)
-                    except Exception as e:
-                        QMessageBox.warning(self, "Warning", f"Không thể tạo JSON cho file .blend:\n{e}")
 
-                else:
-                    QMessageBox.warning(self, "Warning", f"Không tìm thấy blender_template.blend tại:\n{template_blend}")
-
-            # Reload lại danh sách asset và tự động chọn asset mới
-            self.load_assets()
-            new_card = next((c for c in self.cards if c.asset_path == asset_path), None)
-            if new_card:
-                self.clear_selection()
-                new_card.set_selected(True)
-                self._write_latest_asset(asset_path)
-                self.asset_selected.emit(asset_path)
+            # Lấy user đăng nhập và project short từ Settings (đọc ở GUI thread, job chỉ ghi file)
+            user_name = settings().user() if self.project_root else ""
+            project_short = settings().project_short()
+            submit(f"Create asset {asset_name}", create_asset_files, asset_path, asset_name, asset_type,
+                   user_name, project_short,
+                   on_done=lambda warnings: self._on_asset_created(asset_path, warnings),
+                   on_error=lambda message: self._on_asset_created(
+                       asset_path, [f"Không thể tạo asset:\n{message}"]))
+
+    def _on_asset_created(self, asset_path, warnings):
+        for message in warnings:
+            QMessageBox.warning(self, "Warning", message)
+        # Reload lại danh sách asset, mở section của asset mới và tự động chọn nó
+        remote_cache().invalidate(asset_path)
+        self.load_assets()
+        new_card = self.reveal(asset_path)
+        if new_card:
+            self.selection.select_only(new_card)
+            self._on_current_card(new_card)
 
     def clear_layout(self, layout):
         while layout.count():
@@ -448,14 +720,30 @@ class AssetTab(QWidget):
                 w.deleteLater()
 
     def clear_selection(self):
-        for c in self.cards:
-            c.set_selected(False)
+        self.selection.clear()
 
     def get_selected_widget(self):
-        for c in self.cards:
-            if c._selected:
-                return c
-        return None
+        return self.selection.primary()
+
+    def get_selected_widgets(self):
+        return self.selection.selected()
+
+    def visible_cards(self):
+        """
+        Card đang hiện (section mở, khớp ô tìm kiếm) theo thứ tự section trên màn hình.
+        """
+        rank = {s: i for i, s in enumerate(self.sections) if is_shown(s) and s.is_expanded()}
+        cards = [c for c in self.cards if getattr(c, "section", None) in rank and is_shown(c)]
+        cards.sort(key=lambda c: (rank[c.section], c.order))
+        return cards
+
+    def _on_current_card(self, card):
+        """
+        User đổi card chính (click / phím mũi tên / Enter ở ô tìm kiếm): nhớ lại và mở ở các tab chi tiết.
+        """
+        self._write_latest_asset(card.asset_path)
+        self.asset_selected.emit(card.asset_path)
+        self.scroll.ensureWidgetVisible(card, 0, 0)
 
     def _open_selected(self):
         w = self.get_selected_widget()
@@ -0,0 +1,169 @@
+# benchmark.py
+"""
+Đo thời gian các đường quét / nạp chính của app trên ổ mạng giả lập (slowfs.SlowFS).
+
+    python benchmark.py <project_root> [--latency 5] [--bandwidth 40] [--remote]
+                        [--cases assets,library,download] [--textures <folder>]
+
+- assets:   AssetTab(project_root).load_assets() tới khi tạo xong card (section đang mở) và search index
+- library:  LibraryTab.load_from(<folder textures>) tới khi worker metadata / thumbnail xong
+- download: jobs.copy_tree project về folder tạm (nút Download trong ProjectSelectionDialog)
+Mỗi case chạy "cold" (cache local trống) rồi "warm" (cache của lần trước).
+--remote: coi folder cha của project là Drive (remote_cache bật mirror), giống khi mở project từ Drive.
+Cache của benchmark nằm trong folder tạm, không đụng data/cache của app.
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QPixmapCache
+
+import thumb_cache
+import remote_cache
+from settings import settings
+from slowfs import SlowFS, DEFAULT_LATENCY_MS, DEFAULT_BANDWIDTH_MBPS
+from texture_cache import TextureMetaCache
+from texture_decoders import supported_extensions
+from product_meta import ProductMetaCache
+from jobs import Job, copy_tree
+
+CASES = ("assets", "library", "download")
+
+
+def use_cache_dir(root):
+    """
+    Chuyển mọi cache local (thumbnail, metadata, mirror Drive) vào root.
+    """
+    thumb_cache.CACHE_DIR = os.path.join(root, "thumbs")
+    TextureMetaCache.cache_dir = os.path.join(root, "texmeta")
+    ProductMetaCache.cache_dir = os.path.join(root, "productmeta")
+    remote_cache.CACHE_DIR = os.path.join(root, "remote")
+    remote_cache.INDEX_FILE = os.path.join(remote_cache.CACHE_DIR, "index.json")
+    remote_cache.FILES_DIR = os.path.join(remote_cache.CACHE_DIR, "files")
+    remote_cache._cache = None
+
+
+def pump(app, until, timeout=120):
+    t0 = time.time()
+    while not until() and time.time() - t0 < timeout:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def find_texture_folder(project_root):
+    """
+    Folder textures có nhiều ảnh nhất trong project (assets + shots).
+    """
+    exts = supported_extensions()
+    best, best_count = None, 0
+    for base, dirs, files in os.walk(os.path.join(project_root, "03_Production")):
+        if os.path.basename(base) != "textures":
+            continue
+        count = sum(1 for f in files if os.path.splitext(f)[1].lower() in exts)
+        if count > best_count:
+            best, best_count = base, count
+    return best
+
+
+def bench_assets(app, project_root, args):
+    """
+    Thời gian tới khi có đủ card; chờ thêm IndexEnricher (đọc JSON ở thread nền) xong
+    để I/O của nó không lẫn sang lần chạy sau, ghi riêng là "+index".
+    """
+    from asset import AssetTab
+    done = []
+    t0 = time.perf_counter()
+    tab = AssetTab(project_root, "benchmark")
+    tab.index_enricher.finished.connect(lambda *a: done.append(time.perf_counter()))
+    tab.card_builder.finish()
+    cards_ms = (time.perf_counter() - t0) * 1000
+    pump(app, lambda: done)
+    index_ms = (done[0] - t0) * 1000 - cards_ms if done else 0
+    assets = sum(len(section.entries) for section in tab.sections)
+    result = f"{len(tab.cards)}/{assets} cards in {cards_ms:.0f} ms, +index {index_ms:.0f} ms"
+    tab.deleteLater()
+    return result
+
+
+def bench_library(app, project_root, args):
+    from tab_library import LibraryTab
+    tab = LibraryTab()
+    tab.resize(1200, 800)
+    tab.load_from(args.textures)
+    pump(app, lambda: not tab.card_builder.is_running() and not tab._workers)
+    result = f"{len(tab.cards)} cards"
+    tab.deleteLater()
+    return result
+
+
+def bench_download(app, project_root, args):
+    dest = os.path.join(args.tmp, "download")
+    shutil.rmtree(dest, ignore_errors=True)
+    # Chạy đúng đường copy của nút Download (copy theo khối + .partial) với Job không qua JobScheduler
+    copy_tree(Job("Download", copy_tree), project_root, dest)
+    count = sum(len(files) for _, _, files in os.walk(dest))
+    return f"{count} files"
+
+
+BENCHES = {"assets": bench_assets, "library": bench_library, "download": bench_download}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("project_root")
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY_MS, help="ms mỗi round trip")
+    parser.add_argument("--bandwidth", type=float, default=DEFAULT_BANDWIDTH_MBPS, help="MB/s, 0 = không giới hạn")
+    parser.add_argument("--cases", default=",".join(CASES))
+    parser.add_argument("--textures", help="folder cho case library (mặc định: folder textures nhiều ảnh nhất)")
+    parser.add_argument("--remote", action="store_true", help="bật mirror Drive (remote_cache) cho project")
+    args = parser.parse_args(argv)
+
+    project_root = os.path.abspath(args.project_root)
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        parser.error(f"case không hợp lệ: {', '.join(sorted(unknown))}")
+    if "library" in cases and not args.textures:
+        args.textures = find_texture_folder(project_root)
+        if not args.textures:
+            print("library: không tìm thấy folder textures, bỏ qua")
+            cases.remove("library")
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QApplication.instance() or QApplication(sys.argv)
+    args.tmp = tempfile.mkdtemp(prefix="vexa_bench_")
+
+    # Chỉ đổi trong bộ nhớ, không ghi latest_drive.json / latest_local.json
+    if args.remote:
+        settings().values["drive_root"] = os.path.dirname(project_root)
+        settings().values["local_root"] = os.path.join(args.tmp, "local")
+    else:
+        settings().values.pop("drive_root", None)
+    remote_cache._cache = None
+
+    print(f"project {project_root}  latency {args.latency} ms  bandwidth {args.bandwidth} MB/s"
+          f"  remote mirror {'on' if args.remote else 'off'}")
+    try:
+        for case in cases:
+            use_cache_dir(os.path.join(args.tmp, "cache", case))
+            QPixmapCache.clear()
+            for run in ("cold", "warm"):
+                with SlowFS(project_root, args.latency, args.bandwidth) as fs:
+                    t0 = time.perf_counter()
+                    result = BENCHES[case](app, project_root, args)
+                    elapsed = time.perf_counter() - t0
+                pump(app, lambda: False, timeout=0.05)
+                print(f"{case:9s} {run:5s} {elapsed * 1000:9.0f} ms  {result}  |  {fs.summary()}")
+                if remote_cache._cache is not None:
+                    remote_cache._cache.flush()
+    finally:
+        shutil.rmtree(args.tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
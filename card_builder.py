@@ -0,0 +1,85 @@
+# card_builder.py
+
+import time
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+
+class CardBuilder(QObject):
+    """
+    Tạo card theo từng lát thời gian để không khóa event loop của Qt.
+    - start(gen): gen là generator, mỗi lần yield là đã tạo xong một card.
+    - Mỗi lát chạy tối đa budget_ms rồi trả quyền cho Qt (QTimer 0ms) để paint/nhận input.
+    - first_batch: số card tạo ngay lập tức (đủ lấp viewport) trước khi chia lát.
+    - Gọi start() lần nữa (ví dụ chọn folder khác) sẽ hủy generator đang chạy.
+    """
+
+    finished = pyqtSignal()
+
+    def __init__(self, parent=None, budget_ms=8):
+        super().__init__(parent)
+        self.budget = budget_ms / 1000.0
+        self._gen = None
+        self._on_done = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._step)
+
+    def is_running(self):
+        return self._gen is not None
+
+    def start(self, gen, on_done=None, first_batch=0):
+        self.cancel()
+        self._gen = gen
+        self._on_done = on_done
+        # Lấp đầy viewport trước, phần còn lại tạo dần
+        if first_batch and not self._advance(first_batch, None):
+            return
+        self._timer.start()
+
+    def cancel(self):
+        """
+        Hủy build đang chạy (không gọi on_done).
+        """
+        self._timer.stop()
+        if self._gen is not None:
+            self._gen.close()
+        self._gen = None
+        self._on_done = None
+
+    def finish(self):
+        """
+        Chạy nốt phần còn lại ngay lập tức (dùng khi cần toàn bộ card, ví dụ để chọn card mới tạo).
+        """
+        if self._gen is not None:
+            self._timer.stop()
+            self._advance(None, None)
+
+    def _step(self):
+        self._advance(None, time.perf_counter() + self.budget)
+
+    def _advance(self, count, deadline):
+        """
+        Chạy generator tới khi hết count hoặc quá deadline.
+        Trả về False nếu generator đã xong.
+        """
+        gen = self._gen
+        n = 0
+        try:
+            while True:
+                next(gen)
+                n += 1
+                if count is not None and n >= count:
+                    return True
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return True
+        except StopIteration:
+            pass
+
+        self._timer.stop()
+        on_done = self._on_done
+        self._gen = None
+        self._on_done = None
+        if on_done:
+            on_done()
+        self.finished.emit()
+        return False
@@ -0,0 +1,441 @@
+# dashboard.py
+
+import os
+import json
+import time
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QTableView, QHeaderView, QLineEdit,
+    QComboBox, QPushButton, QLabel, QAbstractItemView
+)
+from PyQt5.QtGui import QColor
+from persist import write_json_atomic
+
+from PyQt5.QtCore import (
+    Qt, QObject, QRunnable, QThreadPool, QTimer, QAbstractTableModel, QModelIndex,
+    QSortFilterProxyModel, pyqtSignal
+)
+
+ASSET_STAGES = ["Modeling", "Texturing", "Rigging", "Groom"]
+SHOT_STAGES  = ["Animation", "Blocking", "Lighting", "Vfx"]
+
+INDEX_NAME = "status_index.json"
+INDEX_VERSION = 1
+# Số luồng stat/scan song song (I/O, chủ yếu chờ ổ mạng)
+SCAN_WORKERS = 16
+# Dashboard đang mở: quét lại định kỳ (chỉ folder có mtime đổi mới bị đọc lại)
+REFRESH_INTERVAL_MS = 30000
+
+COLOR_DONE    = QColor("#d4edda")
+COLOR_MISSING = QColor("#f8e0e0")
+
+
+def index_path(project_root):
+    return os.path.join(project_root, "00_Pipeline", "data", INDEX_NAME)
+
+
+def load_index(project_root):
+    """
+    Đọc index trạng thái đã lưu: dict entity_path -> record. Lỗi / khác version → {}.
+    """
+    try:
+        with open(index_path(project_root), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == INDEX_VERSION:
+            return data.get("entities", {})
+    except Exception:
+        pass
+    return {}
+
+
+def save_index(project_root, entities):
+    try:
+        write_json_atomic(index_path(project_root), {"version": INDEX_VERSION, "entities": entities},
+                          lock=True, indent=None)
+    except OSError:
+        pass
+
+
+def list_entities(project_root):
+    """
+    Liệt kê entity của project: (kind, type, name, entity_path).
+    Asset: 03_Production/assets/<type>/<name>, Shot: 03_Production/sequencer/<name>.
+    """
+    production = os.path.join(project_root, "03_Production")
+    entities = []
+    assets_root = os.path.join(production, "assets")
+    try:
+        types = [e for e in os.scandir(assets_root) if e.is_dir()]
+    except OSError:
+        types = []
+    for type_entry in sorted(types, key=lambda e: e.name):
+        try:
+            names = [e for e in os.scandir(type_entry.path) if e.is_dir()]
+        except OSError:
+            continue
+        for entry in sorted(names, key=lambda e: e.name):
+            entities.append(("asset", type_entry.name, entry.name, entry.path))
+
+    try:
+        shots = [e for e in os.scandir(os.path.join(production, "sequencer")) if e.is_dir()]
+    except OSError:
+        shots = []
+    for entry in sorted(shots, key=lambda e: e.name):
+        entities.append(("shot", "shot", entry.name, entry.path))
+    return entities
+
+
+def _parse_version(value):
+    try:
+        return int(str(value).lstrip("vV") or 0)
+    except ValueError:
+        return 0
+
+
+def scan_scenefiles(kind, etype, name, entity_path, dir_mtime):
+    """
+    Đọc một folder scenefiles: mỗi file .blend ứng với một stage (ghép tên giống SceneTab),
+    version / user lấy từ file JSON cùng tên, thời gian sửa lấy từ mtime file .blend.
+    """
+    folder = os.path.join(entity_path, "scenefiles")
+    stages_all = ASSET_STAGES if kind == "asset" else SHOT_STAGES
+    stages = {}
+    try:
+        entries = [e for e in os.scandir(folder) if e.name.lower().endswith(".blend") and e.is_file()]
+    except OSError:
+        entries = []
+    for entry in entries:
+        stem = entry.name[:-6]
+        stage = next((st for st in stages_all if stem.lower().endswith(st.lower())), None)
+        if stage is None:
+            stage = stem.split("_")[-1].capitalize()
+        info = {}
+        try:
+            with open(os.path.join(folder, stem + ".json"), "r", encoding="utf-8") as f:
+                info = json.load(f)
+        except Exception:
+            pass
+        try:
+            mtime = entry.stat().st_mtime
+        except OSError:
+            mtime = 0
+        previous = stages.get(stage)
+        version = _parse_version(info.get("version", 1))
+        if previous and previous["version"] >= version:
+            continue
+        stages[stage] = {
+            "version": version,
+            "user":    info.get("user", ""),
+            "mtime":   mtime,
+            "file":    entry.name,
+        }
+    return {
+        "kind":      kind,
+        "type":      etype,
+        "name":      name,
+        "path":      entity_path,
+        "dir_mtime": dir_mtime,
+        "stages":    stages,
+    }
+
+
+def _refresh_one(entity, old):
+    """
+    stat folder scenefiles; mtime không đổi → giữ record cũ (không đọc file nào).
+    Tạo / xóa / đổi tên / ghi đè kiểu atomic (os.replace) trong folder đều làm đổi mtime folder.
+    """
+    kind, etype, name, entity_path = entity
+    try:
+        dir_mtime = os.stat(os.path.join(entity_path, "scenefiles")).st_mtime
+    except OSError:
+        dir_mtime = 0
+    if old and old.get("dir_mtime") == dir_mtime and old.get("type") == etype:
+        return old, False
+    return scan_scenefiles(kind, etype, name, entity_path, dir_mtime), True
+
+
+def refresh_index(project_root, entities, force=False, progress=None, cancelled=None):
+    """
+    Cập nhật index song song. Trả về (entities mới, số entity đã đọc lại).
+    """
+    found = list_entities(project_root)
+    result = {}
+    rescanned = 0
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+        futures = [
+            executor.submit(_refresh_one, entity, None if force else entities.get(entity[3]))
+            for entity in found
+        ]
+        for done, fut in enumerate(futures, 1):
+            if cancelled and cancelled():
+                for other in futures:
+                    other.cancel()
+                return None, rescanned
+            record, changed = fut.result()
+            result[record["path"]] = record
+            rescanned += changed
+            if progress and (done % 200 == 0 or done == len(futures)):
+                progress(done, len(futures))
+    return result, rescanned
+
+
+def latest_stage(record):
+    """(stage, info) sửa gần nhất của entity, hoặc (None, None)."""
+    if not record["stages"]:
+        return None, None
+    return max(record["stages"].items(), key=lambda item: item[1]["mtime"])
+
+
+def format_mtime(mtime):
+    if not mtime:
+        return ""
+    return datetime.datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M")
+
+
+# ---------- Worker ----------
+
+_pool = None
+
+
+def dashboard_pool():
+    global _pool
+    if _pool is None:
+        _pool = QThreadPool()
+        _pool.setMaxThreadCount(1)
+    return _pool
+
+
+class StatusScanSignals(QObject):
+    progress = pyqtSignal(int, int)
+    # (entities, số entity đọc lại, thời gian quét giây)
+    finished = pyqtSignal(object, int, float)
+
+
+class StatusScanWorker(QRunnable):
+    """
+    Quét lại trạng thái ở thread nền rồi ghi index (chỉ khi có thay đổi).
+    """
+
+    def __init__(self, project_root, entities, force=False):
+        super().__init__()
+        self.project_root = project_root
+        self.entities = entities
+        self.force = force
+        self.cancelled = False
+        self.signals = StatusScanSignals()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        start = time.perf_counter()
+        entities, rescanned = refresh_index(
+            self.project_root, self.entities, self.force,
+            progress=self.signals.progress.emit, cancelled=lambda: self.cancelled
+        )
+        if entities is None:
+            return
+        if rescanned or set(entities) != set(self.entities):
+            save_index(self.project_root, entities)
+        self.signals.finished.emit(entities, rescanned, time.perf_counter() - start)
+
+
+# ---------- Bảng ----------
+
+class StatusTableModel(QAbstractTableModel):
+    """
+    Ma trận entity × stage cho một loại (asset / shot).
+    Cột: Entity, Type, <các stage>, Latest, User, Modified.
+    """
+
+    def __init__(self, kind="asset", parent=None):
+        super().__init__(parent)
+        self.kind = kind
+        self.stages = ASSET_STAGES if kind == "asset" else SHOT_STAGES
+        self.rows = []
+
+    def set_kind(self, kind, entities):
+        self.kind = kind
+        self.stages = ASSET_STAGES if kind == "asset" else SHOT_STAGES
+        self.set_entities(entities)
+
+    def set_entities(self, entities):
+        self.beginResetModel()
+        self.rows = sorted(
+            (rec for rec in entities.values() if rec["kind"] == self.kind),
+            key=lambda rec: (rec["type"], rec["name"])
+        )
+        self.endResetModel()
+
+    def headers(self):
+        return ["Entity", "Type"] + self.stages + ["Latest", "User", "Modified"]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.stages) + 5
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.headers()[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        rec = self.rows[index.row()]
+        col = index.column()
+        n_stages = len(self.stages)
+
+        if 2 <= col < 2 + n_stages:
+            info = rec["stages"].get(self.stages[col - 2])
+            if role == Qt.DisplayRole:
+                return f"v{info['version']:03d}" if info else ""
+            if role == Qt.BackgroundRole:
+                return COLOR_DONE if info else COLOR_MISSING
+            if role == Qt.ToolTipRole and info:
+                return f"{info['file']}\n{info['user']} · {format_mtime(info['mtime'])}"
+            if role == Qt.TextAlignmentRole:
+                return Qt.AlignCenter
+            return None
+
+        if role != Qt.DisplayRole:
+            return None
+        if col == 0:
+            return rec["name"]
+        if col == 1:
+            return rec["type"]
+        stage, info = latest_stage(rec)
+        if info is None:
+            return ""
+        if col == 2 + n_stages:
+            return f"{stage} v{info['version']:03d}"
+        if col == 3 + n_stages:
+            return info["user"]
+        return format_mtime(info["mtime"])
+
+    def record(self, row):
+        return self.rows[row]
+
+
+class DashboardDialog(QDialog):
+    """
+    Tổng quan trạng thái production: entity × stage, version mới nhất, user, thời gian sửa.
+    - Mở ra là hiện ngay từ index (<project>/00_Pipeline/data/status_index.json).
+    - Sau đó quét lại ở thread nền: stat song song mọi folder scenefiles, chỉ đọc lại
+      folder có mtime đổi (tăng dần); lặp lại mỗi REFRESH_INTERVAL_MS khi đang mở.
+    - Double-click một dòng → chọn entity đó trong cửa sổ chính (entity_activated).
+    """
+    entity_activated = pyqtSignal(str, str)  # (kind, entity_path)
+
+    def __init__(self, project_root, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Production Dashboard")
+        self.resize(900, 600)
+        self.project_root = project_root
+        self.entities = load_index(project_root)
+        self._worker = None
+
+        layout = QVBoxLayout(self)
+
+        top = QHBoxLayout()
+        self.kind_combo = QComboBox()
+        self.kind_combo.addItem("Assets", "asset")
+        self.kind_combo.addItem("Shots", "shot")
+        self.kind_combo.currentIndexChanged.connect(self.on_kind_changed)
+        top.addWidget(self.kind_combo)
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Filter entity…")
+        top.addWidget(self.search_edit, 1)
+
+        self.refresh_btn = QPushButton("Rescan")
+        self.refresh_btn.clicked.connect(lambda: self.start_scan(force=True))
+        top.addWidget(self.refresh_btn)
+        layout.addLayout(top)
+
+        self.model = StatusTableModel("asset", self)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setFilterKeyColumn(0)
+        self.proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.search_edit.textChanged.connect(self.proxy.setFilterFixedString)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, Qt.AscendingOrder)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.verticalHeader().setDefaultSectionSize(22)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.doubleClicked.connect(self.on_double_clicked)
+        layout.addWidget(self.table, 1)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_INTERVAL_MS)
+        self.timer.timeout.connect(self.start_scan)
+
+        self.model.set_entities(self.entities)
+        self._update_status()
+
+    def on_kind_changed(self, idx):
+        self.model.set_kind(self.kind_combo.itemData(idx), self.entities)
+        self._update_status()
+
+    def start_scan(self, force=False):
+        if self._worker is not None:
+            return
+        worker = StatusScanWorker(self.project_root, dict(self.entities), force)
+        worker.setAutoDelete(False)
+        worker.signals.progress.connect(self.on_scan_progress)
+        worker.signals.finished.connect(self.on_scan_finished)
+        self._worker = worker
+        self.refresh_btn.setEnabled(False)
+        dashboard_pool().start(worker)
+
+    def on_scan_progress(self, done, total):
+        self.status_label.setText(f"Scanning… {done}/{total}")
+
+    def on_scan_finished(self, entities, rescanned, seconds):
+        self._worker = None
+        self.refresh_btn.setEnabled(True)
+        changed = rescanned or set(entities) != set(self.entities)
+        self.entities = entities
+        if changed:
+            self.model.set_entities(entities)
+        self._update_status(f"scanned in {seconds:.2f}s, {rescanned} updated")
+
+    def _update_status(self, extra=""):
+        rows = self.model.rowCount()
+        text = f"{rows} {'assets' if self.model.kind == 'asset' else 'shots'}"
+        if extra:
+            text += f" · {extra}"
+        self.status_label.setText(text)
+
+    def on_double_clicked(self, index):
+        rec = self.model.record(self.proxy.mapToSource(index).row())
+        self.entity_activated.emit(rec["kind"], rec["path"])
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.start_scan()
+        self.timer.start()
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def closeEvent(self, event):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        super().closeEvent(event)
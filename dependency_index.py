@@ -0,0 +1,426 @@
+# dependency_index.py
+
+import os
+import re
+import gzip
+import json
+import time
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from jobs import submit, JobCancelled, BACKGROUND
+from persist import write_json_atomic
+from dashboard import list_entities
+
+try:
+    import zstandard  # .blend nén (Blender 3.0+ "Compress" khi save)
+except ImportError:
+    zstandard = None
+
+INDEX_NAME = "dependency_index.json"
+INDEX_VERSION = 1
+SCAN_WORKERS = 8
+# Mở context menu: index cũ hơn mức này thì quét lại ở nền (chỉ entity có folder đổi)
+RESCAN_AFTER = 30
+
+PRODUCTION = "03_Production"
+
+
+def index_path(project_root):
+    return os.path.join(project_root, "00_Pipeline", "data", INDEX_NAME)
+
+
+def load_index(project_root):
+    """
+    Đọc index đã lưu: dict entity_key -> record. Lỗi / khác version → {}.
+    """
+    try:
+        with open(index_path(project_root), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == INDEX_VERSION:
+            return data.get("entities", {})
+    except Exception:
+        pass
+    return {}
+
+
+def save_index(project_root, entities):
+    try:
+        write_json_atomic(index_path(project_root), {"version": INDEX_VERSION, "entities": entities},
+                          lock=True, indent=None)
+    except OSError:
+        pass
+
+
+def entity_key(path):
+    """
+    Key của entity chứa path, không phụ thuộc ký tự ổ / root project của từng máy:
+    "03_Production/assets/<type>/<name>" hoặc "03_Production/sequencer/<shot>". None nếu không thuộc entity nào.
+    """
+    parts = [p for p in path.replace("\\", "/").split("/") if p]
+    lowered = [p.lower() for p in parts]
+    if PRODUCTION.lower() not in lowered:
+        return None
+    i = len(lowered) - 1 - lowered[::-1].index(PRODUCTION.lower())
+    rest = parts[i + 1:]
+    if len(rest) >= 3 and rest[0].lower() == "assets":
+        return "/".join([PRODUCTION, "assets", rest[1], rest[2]])
+    if len(rest) >= 2 and rest[0].lower() == "sequencer":
+        return "/".join([PRODUCTION, "sequencer", rest[1]])
+    return None
+
+
+def key_kind(key):
+    return "asset" if key.split("/")[1] == "assets" else "shot"
+
+
+def key_path(project_root, key):
+    return os.path.join(project_root, *key.split("/"))
+
+
+# ---------- Đọc library link trong .blend ----------
+
+def _open_blend(path):
+    f = open(path, "rb")
+    magic = f.read(4)
+    f.seek(0)
+    if magic[:2] == b"\x1f\x8b":
+        f.close()
+        return gzip.open(path, "rb")
+    if magic == b"\x28\xb5\x2f\xfd":
+        f.close()
+        if zstandard is None:
+            return None
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return f
+
+
+def _skip(f, size):
+    try:
+        f.seek(size, os.SEEK_CUR)
+    except (OSError, ValueError):
+        # stream_reader của zstandard chỉ seek tới bằng cách đọc bỏ
+        while size > 0:
+            chunk = f.read(min(size, 1 << 20))
+            if not chunk:
+                break
+            size -= len(chunk)
+
+
+_PATH_START = re.compile(rb"//|[A-Za-z]:[\\/]|\\\\|/")
+
+
+def _library_path(data):
+    """
+    Đường dẫn file trong block "LI" (struct Library): chuỗi .blend có dấu phân cách thư mục;
+    không có thì dùng tên ID ("LI<tên file>").
+    Byte ngay trước filepath (cuối struct ID) không chắc là 0 → tìm điểm bắt đầu đường dẫn
+    ("//", "C:/", "\\\\", "/") sớm nhất mà phần còn lại là UTF-8 hợp lệ.
+    """
+    fallback = None
+    for raw in data.split(b"\x00"):
+        if len(raw) < 7 or not raw.lower().endswith(b".blend"):
+            continue
+        if raw.startswith(b"LI") and b"/" not in raw and b"\\" not in raw:
+            fallback = fallback or raw[2:].decode("utf-8", "replace")
+            continue
+        for match in _PATH_START.finditer(raw):
+            try:
+                return raw[match.start():].decode("utf-8")
+            except UnicodeDecodeError:
+                continue
+    return fallback
+
+
+def read_blend_libraries(path):
+    """
+    Đường dẫn các file .blend được link vào path (block "LI"), theo thứ tự trong file.
+    Chỉ đọc header của từng block, bỏ qua phần data (seek); hỗ trợ header cũ
+    (BLENDER-v403) và header mới của Blender 5 (BLENDER17-01v0500), file nén gzip / zstd.
+    """
+    f = _open_blend(path)
+    if f is None:
+        return []
+    libraries = []
+    with f:
+        header = f.read(12)
+        if len(header) < 12 or header[:7] != b"BLENDER":
+            return []
+        if header[7:8] in (b"_", b"-"):
+            ptr_size = 8 if header[7:8] == b"-" else 4
+            endian = "<" if header[8:9] == b"v" else ">"
+            bhead = struct.Struct(f"{endian}4si{'Q' if ptr_size == 8 else 'I'}ii")
+            size_field = 1
+        else:
+            # BLENDER<header size><-><format version><v|V><version>, BHead: code, sdna, old, len (int64), nr
+            header += f.read(int(header[7:9]) - len(header))
+            endian = "<" if header[12:13] == b"v" else ">"
+            bhead = struct.Struct(f"{endian}4siQqq")
+            size_field = 3
+        while True:
+            raw = f.read(bhead.size)
+            if len(raw) < bhead.size:
+                break
+            fields = bhead.unpack(raw)
+            code = fields[0]
+            size = fields[size_field]
+            if code == b"ENDB" or size < 0:
+                break
+            if code == b"LI\x00\x00":
+                lib = _library_path(f.read(size))
+                if lib:
+                    libraries.append(lib)
+            else:
+                _skip(f, size)
+    return libraries
+
+
+def blend_links(blend_path):
+    """
+    Key các asset mà file .blend link tới (bỏ link về chính entity chứa file).
+    Đường dẫn "//" là tương đối so với folder của file .blend.
+    """
+    own = entity_key(blend_path)
+    links = []
+    try:
+        libraries = read_blend_libraries(blend_path)
+    except Exception:
+        # File hỏng / Drive đang sync dở: ngoài lỗi đọc còn zlib.error, zstandard.ZstdError…
+        # của bộ giải nén; chỉ mất link của file này, không làm hỏng cả lượt quét
+        return links
+    for lib in libraries:
+        if lib.startswith("//"):
+            lib = os.path.normpath(os.path.join(os.path.dirname(blend_path), lib[2:]))
+        key = entity_key(lib)
+        if key and key != own and key_kind(key) == "asset" and key not in links:
+            links.append(key)
+    return links
+
+
+# ---------- Quét project ----------
+
+def _declared_links(json_path, assets_by_name):
+    """
+    Link khai báo tay trong JSON metadata chung của entity: "assets": ["<type>/<name>" | "<name>", ...].
+    """
+    try:
+        with open(json_path, "r", encoding="utf-8") as f:
+            names = json.load(f).get("assets", [])
+    except Exception:
+        return []
+    links = []
+    for name in names if isinstance(names, list) else []:
+        name = str(name).strip("/\\")
+        if "/" in name.replace("\\", "/"):
+            key = "/".join([PRODUCTION, "assets"] + name.replace("\\", "/").split("/")[-2:])
+        else:
+            key = assets_by_name.get(name)
+        if key and key not in links:
+            links.append(key)
+    return links
+
+
+def _refresh_one(entity, old, assets_by_name):
+    """
+    stat folder scenefiles + file JSON chung; không đổi → giữ record cũ.
+    Folder đổi → chỉ parse lại file .blend có (mtime, size) khác lần trước.
+    """
+    kind, etype, name, path = entity
+    folder = os.path.join(path, "scenefiles")
+    json_path = os.path.join(path, f"{name}.json")
+    try:
+        dir_mtime = os.stat(folder).st_mtime
+    except OSError:
+        dir_mtime = 0
+    try:
+        json_mtime = os.stat(json_path).st_mtime
+    except OSError:
+        json_mtime = 0
+    if old and old.get("dir_mtime") == dir_mtime and old.get("json_mtime") == json_mtime:
+        return old, False
+
+    old = old or {}
+    files = old.get("files", {})
+    if old.get("dir_mtime") != dir_mtime:
+        previous, files = files, {}
+        try:
+            entries = [e for e in os.scandir(folder) if e.name.lower().endswith(".blend") and e.is_file()]
+        except OSError:
+            entries = []
+        for entry in entries:
+            try:
+                st = entry.stat()
+            except OSError:
+                continue  # File bị xoá / đổi tên giữa scandir và stat (ổ mạng đang sync)
+            prev = previous.get(entry.name)
+            if prev and prev["mtime"] == st.st_mtime and prev["size"] == st.st_size:
+                files[entry.name] = prev
+            else:
+                files[entry.name] = {"mtime": st.st_mtime, "size": st.st_size, "links": blend_links(entry.path)}
+    declared = old.get("declared", [])
+    if old.get("json_mtime") != json_mtime:
+        declared = _declared_links(json_path, assets_by_name)
+    return {
+        "kind":       kind,
+        "name":       name,
+        "dir_mtime":  dir_mtime,
+        "json_mtime": json_mtime,
+        "files":      files,
+        "declared":   declared,
+    }, True
+
+
+def refresh_index(project_root, entities, force=False, progress=None, cancelled=None):
+    """
+    Cập nhật index song song. progress(done, total) theo số entity.
+    Trả về (entities mới, số entity đã đọc lại); bị hủy → (None, n).
+    """
+    found = list_entities(project_root)
+    assets_by_name = {}
+    for kind, etype, name, path in found:
+        if kind == "asset":
+            assets_by_name.setdefault(name, "/".join([PRODUCTION, "assets", etype, name]))
+    result = {}
+    rescanned = 0
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+        futures = {}
+        for entity in found:
+            key = entity_key(entity[3])
+            if key:
+                old = None if force else entities.get(key)
+                futures[executor.submit(_refresh_one, entity, old, assets_by_name)] = key
+        for done, (fut, key) in enumerate(futures.items(), 1):
+            if cancelled and cancelled():
+                for other in futures:
+                    other.cancel()
+                return None, rescanned
+            try:
+                record, changed = fut.result()
+            except OSError:
+                # Entity đọc lỗi lần này (ổ mạng chập chờn): giữ record cũ, lần quét sau đọc lại
+                record, changed = entities.get(key), False
+            if record is not None:
+                result[key] = record
+            rescanned += changed
+            if progress:
+                progress(done, len(futures))
+    return result, rescanned
+
+
+# ---------- Job ----------
+
+def scan_dependencies(job, project_root, entities, force=False):
+    """
+    Job (jobs.submit): quét lại dependency rồi ghi index (chỉ khi có thay đổi).
+    Trả về (entities, số entity đọc lại).
+    """
+    def progress(done, total):
+        job.report(100 * done / total, f"{done}/{total} entity")
+
+    result, rescanned = refresh_index(project_root, entities, force, progress, lambda: job.cancelled)
+    if result is None:
+        raise JobCancelled()
+    if rescanned or set(result) != set(entities):
+        save_index(project_root, result)
+    return result, rescanned
+
+
+class DependencyIndex(QObject):
+    """
+    Quan hệ asset ↔ entity dùng nó (shot, hoặc asset khác link vào) của một project.
+    - Nguồn: library link trong các file .blend ở scenefiles + "assets" khai báo trong JSON chung.
+    - uses / used_by tra bằng dict dựng sẵn từ index (O(1) mỗi entity).
+    - refresh() quét lại ở nền, tăng dần theo mtime; xong thì emit updated().
+    """
+    updated = pyqtSignal()
+
+    def __init__(self, project_root, parent=None):
+        super().__init__(parent)
+        self.project_root = project_root
+        self.entities = load_index(project_root)
+        self.last_scan = 0
+        self._job = None
+        self._build_maps()
+
+    def _build_maps(self):
+        self._uses = {}
+        self._used_by = {}
+        for key, record in self.entities.items():
+            links = set(record.get("declared", []))
+            for info in record.get("files", {}).values():
+                links.update(info.get("links", []))
+            links.discard(key)
+            self._uses[key] = links
+            for asset in links:
+                self._used_by.setdefault(asset, set()).add(key)
+
+    def _paths(self, keys):
+        return [(key_kind(k), key_path(self.project_root, k)) for k in keys]
+
+    def uses(self, entity_path):
+        """
+        Asset mà entity (shot / asset) dùng: list (kind, path) đã sort.
+        """
+        return self._paths(sorted(self._uses.get(entity_key(entity_path) or "", ())))
+
+    def used_by(self, asset_path):
+        """
+        Entity dùng asset: list (kind, path), shot trước rồi tới asset, mỗi nhóm sort theo key.
+        """
+        keys = self._used_by.get(entity_key(asset_path) or "", ())
+        return self._paths(sorted(keys, key=lambda k: (key_kind(k) != "shot", k)))
+
+    def is_scanning(self):
+        return self._job is not None
+
+    def refresh(self, force=False):
+        if self._job is not None or not self.project_root:
+            return
+        self._job = submit(f"Dependency {os.path.basename(self.project_root)}", scan_dependencies,
+                           self.project_root, self.entities, force, priority=BACKGROUND,
+                           on_done=self._on_scanned, on_finished=self._on_scan_finished)
+
+    def refresh_if_stale(self):
+        if time.time() - self.last_scan > RESCAN_AFTER:
+            self.refresh()
+
+    def _on_scan_finished(self, job):
+        # Chạy cả khi job lỗi / bị hủy: không để menu hiện "Đang quét…" mãi
+        if job is self._job:
+            self._job = None
+            self.updated.emit()
+
+    def _on_scanned(self, result):
+        entities, rescanned = result
+        self.last_scan = time.time()
+        self.entities = entities
+        self._build_maps()
+
+
+def fill_dependency_menu(menu, entries, scanning, activate):
+    """
+    Điền submenu dependency: mỗi entity một action (chọn → activate(kind, path)).
+    """
+    for kind, path in entries:
+        label = os.path.basename(path) if kind == "shot" else \
+            f"{os.path.basename(os.path.dirname(path))}/{os.path.basename(path)}"
+        menu.addAction(label, lambda k=kind, p=path: activate(k, p))
+    if not entries:
+        menu.addAction("(không có)").setEnabled(False)
+    if scanning:
+        menu.addAction("Đang quét file .blend…").setEnabled(False)
+
+
+_indexes = {}
+
+
+def dependency_index(project_root):
+    """
+    DependencyIndex dùng chung cho AssetTab / ShotTab của cùng project.
+    """
+    key = os.path.normcase(os.path.abspath(project_root)) if project_root else ""
+    if key not in _indexes:
+        _indexes[key] = DependencyIndex(project_root)
+    return _indexes[key]
@@ -8,9 +8,18 @@ class FlowLayout(QLayout):
             self.setContentsMargins(margin, margin, margin, margin)
         self.setSpacing(spacing)
         self.itemList = []
+        # Kết quả tính toán giữ tới lần invalidate kế tiếp (Qt hỏi lại nhiều lần mỗi lượt layout)
+        self._hfw_cache = {}
+        self._min_size = None
+
+    def invalidate(self):
+        self._hfw_cache = {}
+        self._min_size = None
+        super().invalidate()
 
     def addItem(self, item):
         self.itemList.append(item)
+        self.invalidate()
 
     def count(self):
         return len(self.itemList)
@@ -22,9 +31,17 @@ class FlowLayout(QLayout):
 
     def takeAt(self, index):
         if 0 <= index < len(self.itemList):
+            self.invalidate()
             return self.itemList.pop(index)
         return None
 
+    def sortItems(self, key):
+        """
+        Sắp xếp lại thứ tự item theo key(widget) mà không gỡ/thêm widget.
+        """
+        self.itemList.sort(key=lambda item: key(item.widget()))
+        self.invalidate()
+
     def expandingDirections(self):
         return Qt.Orientations(Qt.Orientation(0))
 
@@ -32,7 +49,9 @@ class FlowLayout(QLayout):
         return True
 
     def heightForWidth(self, width):
-        height = self.doLayout(QRect(0, 0, width, 0), True)
+        height = self._hfw_cache.get(width)
+        if height is None:
+            height = self._hfw_cache[width] = self.doLayout(QRect(0, 0, width, 0), True)
         return height
 
     def setGeometry(self, rect):
@@ -43,29 +62,36 @@ class FlowLayout(QLayout):
         return self.minimumSize()
 
     def minimumSize(self):
+        if self._min_size is not None:
+            return QSize(self._min_size)
         size = QSize()
         for item in self.itemList:
             size = size.expandedTo(item.minimumSize())
         left, top, right, bottom = self.getContentsMargins()
         size += QSize(left + right, top + bottom)
+        self._min_size = QSize(size)
         return size
 
     def doLayout(self, rect, testOnly):
         x, y, lineHeight = rect.x(), rect.y(), 0
         left, top, right, bottom = self.getContentsMargins()
         effectiveRect = rect.adjusted(+left, +top, -right, -bottom)
+        spaceX = spaceY = self.spacing()
         for item in self.itemList:
             wid = item.widget()
-            spaceX = self.spacing()
-            spaceY = self.spacing()
-            nextX = x + item.sizeHint().width() + spaceX
+            # Widget bị ẩn (ví dụ do bộ lọc) không chiếm chỗ trong grid
+            if wid is not None and wid.isHidden():
+                continue
+            # sizeHint chỉ lấy một lần cho mỗi item (đổi zoom → layout lại hàng nghìn card)
+            hint = item.sizeHint()
+            nextX = x + hint.width() + spaceX
             if nextX - spaceX > effectiveRect.right() and lineHeight > 0:
                 x = effectiveRect.x()
                 y = y + lineHeight + spaceY
-                nextX = x + item.sizeHint().width() + spaceX
+                nextX = x + hint.width() + spaceX
                 lineHeight = 0
             if not testOnly:
-                item.setGeometry(QRect(QPoint(x, y), item.sizeHint()))
+                item.setGeometry(QRect(QPoint(x, y), hint))
             x = nextX
-            lineHeight = max(lineHeight, item.sizeHint().height())
+            lineHeight = max(lineHeight, hint.height())
         return y + lineHeight - rect.y() + bottom
@@ -0,0 +1,100 @@
+# id_allocator.py
+
+import os
+import json
+
+from persist import file_lock, write_json_atomic
+
+# Số lượt cấp lại khi folder được cấp số đã tồn tại (client cũ / tạo tay)
+MAX_RETRIES = 5
+
+
+class AllocationError(Exception):
+    pass
+
+
+class IdAllocator:
+    """
+    Cấp số thứ tự (shot 001, 002, …) từ file counter dùng chung trong
+    <project>/00_Pipeline/data/counters/<key>.json, không listdir mỗi lần tạo.
+    - reserve(count): giữ một dải số liên tiếp (tạo hàng loạt), trả về range.
+    - create_dirs(count): reserve + os.makedirs(exist_ok=False); số đã bị chiếm
+      (folder tạo tay / bằng bản cũ) thì đồng bộ lại counter và thử lại.
+    Counter chưa có (project cũ) được khởi tạo bằng một lần quét scan_root.
+    """
+
+    def __init__(self, project_root, key, scan_root=None, width=3):
+        self.key = key
+        self.scan_root = scan_root
+        self.width = width
+        folder = os.path.join(project_root, "00_Pipeline", "data", "counters")
+        self.counter_file = os.path.join(folder, f"{key}.json")
+        self.lock_file = self.counter_file + ".lock"
+
+    def _scan_next(self):
+        """Số kế tiếp theo tên folder dạng số trong scan_root (chỉ dùng khi khởi tạo / đồng bộ lại)."""
+        if not self.scan_root:
+            return 1
+        try:
+            existing = [int(e.name) for e in os.scandir(self.scan_root) if e.name.isdigit()]
+        except OSError:
+            existing = []
+        return max(existing) + 1 if existing else 1
+
+    def _read_next(self):
+        try:
+            with open(self.counter_file, "r", encoding="utf-8") as f:
+                return int(json.load(f)["next"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_next(self, value):
+        # Đã giữ lock_file trong reserve() nên không khóa thêm ở đây
+        write_json_atomic(self.counter_file, {"next": value}, indent=None)
+
+    def reserve(self, count=1, resync=False):
+        """
+        Giữ count số liên tiếp. resync=True: đẩy counter lên ít nhất bằng số kế tiếp trên đĩa.
+        """
+        if count < 1:
+            raise ValueError("count must be >= 1")
+        try:
+            os.makedirs(os.path.dirname(self.counter_file), exist_ok=True)
+            with file_lock(self.lock_file):
+                start = self._read_next()
+                if start is None or resync:
+                    start = max(start or 1, self._scan_next())
+                self._write_next(start + count)
+        except OSError as e:  # gồm cả TimeoutError khi chờ lock
+            raise AllocationError(f"Cannot update counter {self.counter_file}: {e}") from e
+        return range(start, start + count)
+
+    def format(self, number):
+        return f"{number:0{self.width}d}"
+
+    def create_dirs(self, root, count=1):
+        """
+        Tạo count folder mới <root>/<số> (chưa tồn tại). Trả về list (tên, đường dẫn).
+        """
+        created = []
+        retries = 0
+        resync = False
+        while len(created) < count:
+            resync_next = False
+            for number in self.reserve(count - len(created), resync=resync):
+                name = self.format(number)
+                path = os.path.join(root, name)
+                try:
+                    os.makedirs(path, exist_ok=False)
+                except FileExistsError:
+                    resync_next = True
+                    continue
+                except OSError as e:
+                    raise AllocationError(f"Cannot create folder {path}: {e}") from e
+                created.append((name, path))
+            resync = resync_next
+            if resync:
+                retries += 1
+                if retries > MAX_RETRIES:
+                    raise AllocationError(f"Too many existing folders while allocating in {root}")
+        return created
@@ -0,0 +1,538 @@
+# jobs.py
+
+import os
+import time
+import shutil
+import itertools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PyQt5.QtWidgets import (
+    QApplication, QDockWidget, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+    QProgressBar, QPushButton, QScrollArea
+)
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from thumb_cache import write_entity_thumbnails
+
+# Priority trong QThreadPool: job user vừa bấm và đang chờ chạy trước job nền (download, thumbnail)
+INTERACTIVE = 10
+BACKGROUND = 0
+
+# Số job chạy song song (copy / xoá trên ổ mạng chủ yếu chờ I/O)
+MAX_JOB_THREADS = 3
+# Lỗi ổ mạng chập chờn → thử lại tự động sau RETRY_DELAY * lần thử (giây)
+RETRY_ON = (OSError, TimeoutError)
+RETRY_DELAY = 1.0
+# Số job đã xong giữ lại trong panel
+MAX_FINISHED = 50
+COPY_CHUNK = 4 * 1024 * 1024
+# Báo tiến độ về GUI thread tối đa ~10 lần / giây mỗi job
+PROGRESS_INTERVAL = 0.1
+# Số luồng cho thao tác hàng loạt (copy / move / xoá nhiều file): chủ yếu chờ I/O ổ mạng
+BATCH_WORKERS = 8
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobSignals(QObject):
+    # job đổi trạng thái / tiến độ
+    changed = pyqtSignal(object)
+    # job kết thúc (done / failed / cancelled)
+    finished = pyqtSignal(object)
+
+
+class Job(QRunnable):
+    """
+    Một thao tác nặng chạy ở pool của JobScheduler: fn(job, *args, **kwargs).
+    fn gọi job.progress(%, text) để báo tiến độ; mỗi lần gọi cũng là điểm hủy
+    (job bị cancel → JobCancelled). Kết quả / lỗi được trả về GUI thread qua on_done / on_error;
+    on_finished(job) chạy sau mọi kết thúc, kể cả bị hủy (dọn trạng thái UI đang chờ job).
+    """
+    _ids = itertools.count(1)
+
+    def __init__(self, title, fn, args=(), kwargs=None, priority=INTERACTIVE, retries=0,
+                 on_done=None, on_error=None, on_finished=None):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.id = next(self._ids)
+        self.title = title
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.priority = priority
+        self.retries = retries
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_finished = on_finished
+        self.state = QUEUED
+        self.value = 0
+        self.text = ""
+        self.result = None
+        self.error = ""
+        self.cancelled = False
+        self._last_emit = 0.0
+        self.signals = JobSignals()
+
+    def clone(self):
+        return Job(self.title, self.fn, self.args, self.kwargs, self.priority, self.retries,
+                   self.on_done, self.on_error, self.on_finished)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def check(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    def progress(self, value, text=None):
+        self.check()
+        self.report(value, text)
+
+    def report(self, value, text=None):
+        """
+        Như progress nhưng không phải điểm hủy: cho code tự kiểm tra hủy qua cancelled=lambda: job.cancelled
+        (đang chờ future của executor / đang dọn file tạm thì không bị ngắt giữa chừng).
+        """
+        self.value = max(0, min(100, int(value)))
+        if text is not None:
+            self.text = text
+        now = time.monotonic()
+        if now - self._last_emit >= PROGRESS_INTERVAL:
+            self._last_emit = now
+            self._emit(self.signals.changed)
+
+    def _emit(self, signal):
+        # App đang thoát: QObject signals có thể đã bị xoá trước khi thread kịp dừng
+        try:
+            signal.emit(self)
+        except RuntimeError:
+            pass
+
+    def run(self):
+        if self.cancelled:
+            self.state = CANCELLED
+            self._emit(self.signals.finished)
+            return
+        self.state = RUNNING
+        self._emit(self.signals.changed)
+        attempt = 0
+        while True:
+            try:
+                self.result = self.fn(self, *self.args, **self.kwargs)
+                self.state = DONE
+                self.value = 100
+            except JobCancelled:
+                self.state = CANCELLED
+            except RETRY_ON as e:
+                if attempt < self.retries and not self.cancelled:
+                    attempt += 1
+                    self.text = f"Lỗi, thử lại lần {attempt}: {e}"
+                    self._emit(self.signals.changed)
+                    time.sleep(RETRY_DELAY * attempt)
+                    continue
+                self.state, self.error = FAILED, str(e)
+            except Exception as e:
+                self.state, self.error = FAILED, f"{type(e).__name__}: {e}"
+            break
+        self._emit(self.signals.finished)
+
+
+class JobScheduler(QObject):
+    """
+    Hàng đợi job dùng chung cho cả app: pool giới hạn MAX_JOB_THREADS, ưu tiên INTERACTIVE
+    trước BACKGROUND, hủy (job chưa chạy bị rút khỏi hàng đợi, job đang chạy dừng ở
+    job.progress kế tiếp), thử lại tự động (retries) hoặc thủ công (retry).
+    GUI thread chỉ submit job và nhận kết quả.
+    """
+    job_added = pyqtSignal(object)
+    job_changed = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(MAX_JOB_THREADS)
+        self.jobs = []
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
+
+    def submit(self, title, fn, *args, priority=INTERACTIVE, retries=0, on_done=None, on_error=None,
+               on_finished=None, **kwargs):
+        """
+        Chạy fn(job, *args, **kwargs) ở thread nền. on_done(result) / on_error(message) / on_finished(job)
+        chạy ở GUI thread.
+        """
+        return self._start(Job(title, fn, args, kwargs, priority, retries, on_done, on_error, on_finished))
+
+    def _start(self, job):
+        job.signals.changed.connect(self.job_changed.emit)
+        job.signals.finished.connect(self._on_finished)
+        self.jobs.append(job)
+        self._trim()
+        self.job_added.emit(job)
+        self.pool.start(job, job.priority)
+        return job
+
+    def cancel(self, job):
+        job.cancel()
+        if job.state == QUEUED and self.pool.tryTake(job):
+            job.state = CANCELLED
+            self._on_finished(job)
+
+    def retry(self, job):
+        """
+        Chạy lại job đã lỗi / đã hủy (job mới, cùng thao tác và callback).
+        """
+        if job in self.jobs:
+            self.jobs.remove(job)
+        return self._start(job.clone())
+
+    def active(self):
+        return [j for j in self.jobs if j.state in (QUEUED, RUNNING)]
+
+    def clear_finished(self):
+        self.jobs = self.active()
+
+    def _trim(self):
+        finished = [j for j in self.jobs if j.state not in (QUEUED, RUNNING)]
+        for job in finished[:max(0, len(finished) - MAX_FINISHED)]:
+            self.jobs.remove(job)
+
+    def _on_finished(self, job):
+        self.job_changed.emit(job)
+        callbacks = []
+        if job.state == DONE and job.on_done:
+            callbacks.append((job.on_done, job.result))
+        elif job.state == FAILED and job.on_error:
+            callbacks.append((job.on_error, job.error))
+        if job.on_finished:
+            callbacks.append((job.on_finished, job))
+        for callback, arg in callbacks:
+            try:
+                callback(arg)
+            except RuntimeError:
+                # Widget gửi job đã bị đóng / xoá trong lúc job chạy
+                pass
+
+    def wait(self, timeout_ms=-1):
+        return self.pool.waitForDone(timeout_ms)
+
+    def shutdown(self):
+        for job in self.active():
+            job.cancel()
+        self.pool.clear()
+        self.pool.waitForDone(3000)
+
+
+_scheduler = None
+
+
+def job_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = JobScheduler()
+    return _scheduler
+
+
+def submit(title, fn, *args, **kwargs):
+    return job_scheduler().submit(title, fn, *args, **kwargs)
+
+
+# ---------- Thao tác file dùng chung ----------
+
+def copy_file(job, src, dst, done=0, total=0, label=""):
+    """
+    Copy theo khối (kiểm tra hủy giữa các khối), giữ mtime như shutil.copy2. Trả về done + số byte.
+    """
+    with open(src, "rb") as fin, open(dst, "wb") as fout:
+        while True:
+            chunk = fin.read(COPY_CHUNK)
+            if not chunk:
+                break
+            fout.write(chunk)
+            done += len(chunk)
+            job.progress(100 * done / total if total else 0, label or os.path.basename(src))
+    shutil.copystat(src, dst)
+    return done
+
+
+def import_file(job, src, dst):
+    """
+    Copy một file vào "<dst>.partial" rồi đổi tên khi xong: bị hủy / lỗi giữa chừng thì
+    không để lại dst bị cắt cụt (lần load sau sẽ hiện ra như file thật).
+    """
+    partial = dst + ".partial"
+    try:
+        copy_file(job, src, partial)
+        os.replace(partial, dst)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return dst
+
+
+def copy_tree(job, src, dst):
+    """
+    Copy cả folder src → dst. Copy vào "<dst>.partial" rồi đổi tên khi xong:
+    bị hủy / lỗi giữa chừng thì không để lại dst thiếu file trông như đã tải xong.
+    """
+    files, total = [], 0
+    for base, _, names in os.walk(src):
+        job.check()
+        for name in names:
+            path = os.path.join(base, name)
+            files.append(path)
+            total += os.path.getsize(path)
+    partial = dst + ".partial"
+    shutil.rmtree(partial, ignore_errors=True)
+    done = 0
+    try:
+        for i, path in enumerate(files, 1):
+            target = os.path.join(partial, os.path.relpath(path, src))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            done = copy_file(job, path, target, done, total, f"{i}/{len(files)} {os.path.basename(path)}")
+        # Folder rỗng cũng phải có ở dst
+        for base, dirs, _ in os.walk(src):
+            for d in dirs:
+                os.makedirs(os.path.join(partial, os.path.relpath(os.path.join(base, d), src)), exist_ok=True)
+        os.makedirs(partial, exist_ok=True)
+        os.replace(partial, dst)
+    except BaseException:
+        shutil.rmtree(partial, ignore_errors=True)
+        raise
+    return dst
+
+
+def remove_tree(job, path):
+    """
+    Xoá folder, báo tiến độ theo số file. Hủy giữa chừng → dừng, phần còn lại giữ nguyên.
+    """
+    entries = []
+    for base, dirs, names in os.walk(path, topdown=False):
+        entries.extend((os.path.join(base, n), False) for n in names)
+        entries.extend((os.path.join(base, d), True) for d in dirs)
+    for i, (entry, is_dir) in enumerate(entries, 1):
+        if is_dir:
+            os.rmdir(entry)
+        else:
+            os.remove(entry)
+        if i % 20 == 0:
+            job.progress(100 * i / len(entries), f"{i}/{len(entries)}")
+    os.rmdir(path)
+    return path
+
+
+def save_thumbnails(job, folder, image):
+    """
+    Create Thumbnail của asset / shot: encode các cỡ dựng sẵn từ QImage (an toàn ngoài GUI thread,
+    khác QPixmap) và ghi atomic vào folder. Trả về dict cỡ -> path.
+    """
+    return write_entity_thumbnails(folder, image)
+
+
+def remove_files(job, paths):
+    for path in paths:
+        job.check()
+        if os.path.exists(path):
+            os.remove(path)
+    return paths
+
+
+def run_batch(job, fn, items, label=""):
+    """
+    Chạy fn(item) cho mọi item song song (BATCH_WORKERS luồng). Một item lỗi không dừng cả lô.
+    Bị hủy: item đang chạy làm nốt, item chưa chạy bị bỏ và báo lỗi "Đã hủy" (GUI vẫn nhận
+    kết quả phần đã làm để cập nhật card cho đúng). Trả về (ok, errors): list item, list (item, message).
+    """
+    ok, errors = [], []
+    with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as executor:
+        futures = {executor.submit(fn, item): item for item in items}
+        for done, future in enumerate(as_completed(futures), 1):
+            item = futures[future]
+            if future.cancelled():
+                errors.append((item, "Đã hủy"))
+                continue
+            try:
+                future.result()
+                ok.append(item)
+            except Exception as e:
+                errors.append((item, str(e)))
+            try:
+                job.progress(100 * done / len(futures), f"{label} {done}/{len(futures)}".strip())
+            except JobCancelled:
+                for other in futures:
+                    other.cancel()
+    return ok, errors
+
+
+def _target(path, folder):
+    target = os.path.join(folder, os.path.basename(path))
+    if os.path.exists(target):
+        raise FileExistsError(f"Đã có {os.path.basename(path)} trong {folder}")
+    return target
+
+
+def _copy_item(item, folder):
+    # item: các file của một card, file chính đứng đầu; file đi kèm (JSON) không có thì bỏ qua
+    for i, path in enumerate(item):
+        if i and not os.path.exists(path):
+            continue
+        target = _target(path, folder)
+        tmp = f"{target}.{os.getpid()}.partial"
+        try:
+            shutil.copyfile(path, tmp)
+            shutil.copystat(path, tmp)
+            os.replace(tmp, target)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+
+def _move_item(item, folder):
+    for i, path in enumerate(item):
+        if i and not os.path.exists(path):
+            continue
+        # Cùng ổ: đổi tên; khác ổ: copy rồi xoá bản gốc
+        shutil.move(path, _target(path, folder))
+
+
+def _remove_item(item):
+    for path in item:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def copy_batch(job, items, folder):
+    """
+    Copy (export) file của nhiều card vào folder, song song; không ghi đè file đã có.
+    """
+    return run_batch(job, lambda item: _copy_item(item, folder), items, "Copy")
+
+
+def move_batch(job, items, folder):
+    return run_batch(job, lambda item: _move_item(item, folder), items, "Move")
+
+
+def remove_batch(job, items):
+    return run_batch(job, _remove_item, items, "Delete")
+
+
+# ---------- Panel ----------
+
+class JobRow(QWidget):
+    def __init__(self, job, parent=None):
+        super().__init__(parent)
+        self.job = job
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(4, 2, 4, 2)
+        self.title_label = QLabel(job.title)
+        self.title_label.setMinimumWidth(160)
+        self.bar = QProgressBar()
+        self.bar.setMaximumHeight(14)
+        self.status_label = QLabel()
+        self.status_label.setMinimumWidth(160)
+        self.action_btn = QPushButton()
+        self.action_btn.setFixedWidth(64)
+        self.action_btn.clicked.connect(self.on_action)
+        layout.addWidget(self.title_label)
+        layout.addWidget(self.bar, 1)
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.action_btn)
+        self.refresh()
+
+    def refresh(self):
+        job = self.job
+        self.bar.setValue(job.value)
+        if job.state == FAILED:
+            self.status_label.setText(f"Lỗi: {job.error}")
+            self.status_label.setToolTip(job.error)
+        elif job.state == CANCELLED:
+            self.status_label.setText("Đã hủy")
+        elif job.state == DONE:
+            self.status_label.setText("Xong")
+        else:
+            self.status_label.setText(job.text if job.state == RUNNING else "Đang chờ")
+        self.action_btn.setText("Retry" if job.state in (FAILED, CANCELLED) else "Cancel")
+        self.action_btn.setVisible(job.state != DONE)
+
+    def on_action(self):
+        if self.job.state in (FAILED, CANCELLED):
+            job_scheduler().retry(self.job)
+        else:
+            job_scheduler().cancel(self.job)
+
+
+class JobPanel(QDockWidget):
+    """
+    Dock hiển thị job của JobScheduler: tiến độ, Cancel khi đang chờ / chạy, Retry khi lỗi / đã hủy.
+    """
+    active_changed = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__("Jobs", parent)
+        self.setObjectName("JobPanel")
+        self.rows = {}
+
+        body = QWidget()
+        v = QVBoxLayout(body)
+        v.setContentsMargins(0, 0, 0, 0)
+        top = QHBoxLayout()
+        self.summary_label = QLabel()
+        clear_btn = QPushButton("Clear finished")
+        clear_btn.clicked.connect(self.clear_finished)
+        top.addWidget(self.summary_label)
+        top.addStretch()
+        top.addWidget(clear_btn)
+        v.addLayout(top)
+
+        self.list_widget = QWidget()
+        self.list_layout = QVBoxLayout(self.list_widget)
+        self.list_layout.setContentsMargins(0, 0, 0, 0)
+        self.list_layout.setSpacing(0)
+        self.list_layout.addStretch()
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        scroll.setWidget(self.list_widget)
+        v.addWidget(scroll)
+        self.setWidget(body)
+
+        scheduler = job_scheduler()
+        scheduler.job_added.connect(self.on_job_added)
+        scheduler.job_changed.connect(self.on_job_changed)
+        for job in scheduler.jobs:
+            self.on_job_added(job)
+
+    def on_job_added(self, job):
+        row = JobRow(job)
+        self.rows[job.id] = row
+        # Job mới nhất ở trên cùng
+        self.list_layout.insertWidget(0, row)
+        self._sync()
+
+    def on_job_changed(self, job):
+        row = self.rows.get(job.id)
+        if row is not None:
+            row.refresh()
+        if job.state not in (QUEUED, RUNNING):
+            self._sync()
+
+    def clear_finished(self):
+        job_scheduler().clear_finished()
+        self._sync()
+
+    def _sync(self):
+        # Bỏ row của job không còn trong scheduler (đã clear / bị đẩy ra do MAX_FINISHED / đã retry)
+        alive = {job.id for job in job_scheduler().jobs}
+        for job_id in [i for i in self.rows if i not in alive]:
+            row = self.rows.pop(job_id)
+            row.setParent(None)
+            row.deleteLater()
+        count = len(job_scheduler().active())
+        self.summary_label.setText(f"{count} job đang chạy / chờ" if count else "Không có job")
+        self.active_changed.emit(count)
@@ -5,29 +5,19 @@ from PyQt5.QtWidgets import (
     QDialogButtonBox, QMessageBox
 )
 from PyQt5.QtCore import Qt
+from settings import settings
 
 BASE_DIR = os.path.dirname(__file__)
 USERS_FILE      = os.path.join(BASE_DIR, "data", "users.json")
-LATEST_USER_FILE = os.path.join(BASE_DIR, "data", "latest_user.json")
 
 def load_session():
-    if not os.path.exists(LATEST_USER_FILE):
-        return None
-    try:
-        with open(LATEST_USER_FILE, encoding="utf-8") as f:
-            data = json.load(f)
-        return data.get("last_user")
-    except Exception:
-        return None
+    return settings().get("user")
 
 def save_session(username):
-    os.makedirs(os.path.dirname(LATEST_USER_FILE), exist_ok=True)
-    with open(LATEST_USER_FILE, "w", encoding="utf-8") as f:
-        json.dump({"last_user": username}, f, ensure_ascii=False, indent=2)
+    settings().set("user", username)
 
 def clear_session():
-    if os.path.exists(LATEST_USER_FILE):
-        os.remove(LATEST_USER_FILE)
+    settings().clear("user")
 
 class LoginDialog(QDialog):
     def __init__(self, parent=None):
@@ -67,7 +57,7 @@ class LoginDialog(QDialog):
             data = json.load(f)
         self.users = data.get("users", [])
 
-        # Nếu có file latest_user.json, pre-fill ô user
+        # Nếu đã có user đăng nhập lần trước, pre-fill ô user
         last = load_session()
         if last:
             self.user_edit.setText(last)
@@ -1,10 +1,10 @@
 # master_ui.py
 
 import os
-import json
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QHBoxLayout, QTabWidget,
-    QMenuBar, QPushButton, QVBoxLayout, QDialog, QApplication, QHBoxLayout as QHBox, QSplitter
+    QMenuBar, QPushButton, QVBoxLayout, QDialog, QApplication, QHBoxLayout as QHBox, QSplitter,
+    QLabel
 )
 from PyQt5.QtCore import Qt, pyqtSignal
 from asset import AssetTab
@@ -12,12 +12,16 @@ from shot import ShotTab
 from tab_scene import SceneTab
 from tab_product import ProductTab
 from tab_library import LibraryTab
+from tab_playblast import PlayblastTab, DEFAULT_FPS
 from login import clear_session, LoginDialog
 from project import ProjectSelectionDialog
+from pixmap_budget import budget
+from dashboard import DashboardDialog
+from settings import settings
+from session_state import open_session, latest_selection
+from jobs import JobPanel
 
 BASE_DIR            = os.path.dirname(__file__)
-LATEST_PROJECT_FILE = os.path.join(BASE_DIR, "data", "latest_project.json")
-LATEST_USER_FILE    = os.path.join(BASE_DIR, "data", "latest_user.json")
 
 
 class DClickButton(QPushButton):
@@ -35,6 +39,8 @@ class MasterUI(QMainWindow):
         super().__init__()
         self.username = username
         self.project  = project
+        # Trạng thái phiên (lựa chọn gần nhất, tab đang mở) lưu local theo user
+        self.session = open_session(username)
 
         self.setWindowTitle("VexaPipe")
         self.setGeometry(100, 100, 1000, 600)
@@ -52,6 +58,8 @@ class MasterUI(QMainWindow):
         # Kết nối signal
         self.asset_tab.asset_selected.connect(self.on_asset_selected)
         self.shot_tab.shot_selected.connect(self.on_shot_selected)
+        self.asset_tab.entity_requested.connect(self.on_entity_requested)
+        self.shot_tab.entity_requested.connect(self.on_entity_requested)
 
         # Splitter giữa trái/phải
         splitter = QSplitter(Qt.Horizontal)
@@ -63,16 +71,11 @@ class MasterUI(QMainWindow):
         self.left_tabs.addTab(self.shot_tab,  "Shot")
         splitter.addWidget(self.left_tabs)
 
-        data_dir = os.path.join(self.project["path"], "00_Pipeline", "data")
-        asset_file = os.path.join(data_dir, "latest_asset.json")
-        shot_file  = os.path.join(data_dir, "latest_shot.json")
-
-        if os.path.exists(asset_file):
-            self.left_tabs.setCurrentIndex(0)
-        elif os.path.exists(shot_file):
-            self.left_tabs.setCurrentIndex(1)
-        else:
-            self.left_tabs.setCurrentIndex(0)        
+        left_idx = self.session.get(self.project["path"], "left_tab")
+        if left_idx is None:
+            left_idx = 1 if (latest_selection(self.project["path"], "shot")
+                             and not latest_selection(self.project["path"], "asset")) else 0
+        self.left_tabs.setCurrentIndex(left_idx)
 
         # Khi user đổi tab (Asset ↔ Shot), load ngay giá trị “latest”
         self.left_tabs.currentChanged.connect(self.on_left_tab_changed)
@@ -81,19 +84,33 @@ class MasterUI(QMainWindow):
         self.scene_tab   = SceneTab()
         self.product_tab = ProductTab()
         self.library_tab = LibraryTab()
+        self.playblast_tab = PlayblastTab(fps=self.project.get("fps", DEFAULT_FPS))
+        self.scene_tab.published.connect(self.on_published)
 
         self.right_tabs = QTabWidget()
         self.right_tabs.addTab(self.scene_tab,   "Scene")
         self.right_tabs.addTab(self.product_tab, "Product")
         self.right_tabs.addTab(self.library_tab,  "Library")
+        self.right_tabs.addTab(self.playblast_tab, "Playblast")
         splitter.addWidget(self.right_tabs)
+        self.right_tabs.setCurrentIndex(self.session.get(self.project["path"], "right_tab", 0))
+        self.right_tabs.currentChanged.connect(
+            lambda idx: self.session.set(self.project["path"], "right_tab", idx))
 
         splitter.setStretchFactor(0, 3)
         splitter.setStretchFactor(1, 7)
 
         # —————— 3) Menu bar + user/project buttons ——————
         bar = self.menuBar()
-        bar.addMenu("Options")
+        options_menu = bar.addMenu("Options")
+        options_menu.addAction("Production Dashboard", self.open_dashboard)
+        self.dashboard = None
+
+        # Dock Jobs: copy / download / xoá / import / thumbnail chạy ở JobScheduler
+        self.job_panel = JobPanel(self)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.job_panel)
+        self.job_panel.hide()
+        options_menu.addAction(self.job_panel.toggleViewAction())
         bar.addMenu("Help")
 
         self.user_btn = DClickButton(f"👤 {self.username}")
@@ -131,26 +148,58 @@ class MasterUI(QMainWindow):
         h_corner.addWidget(self.refresh_btn)
         bar.setCornerWidget(corner, Qt.TopRightCorner)
 
+        # —————— 4) Status bar: bộ nhớ thumbnail đang giữ (PixmapBudget) ——————
+        self.memory_label = QLabel(budget().summary())
+        self.statusBar().addPermanentWidget(self.memory_label)
+        budget().changed.connect(self._update_memory_label)
+        self.jobs_btn = QPushButton()
+        self.jobs_btn.setFlat(True)
+        self.jobs_btn.clicked.connect(self.job_panel.show)
+        self.jobs_btn.hide()
+        self.statusBar().addPermanentWidget(self.jobs_btn)
+        self.job_panel.active_changed.connect(self._update_jobs_button)
+
         # Cuối __init__, load “latest” dựa trên tab hiện tại
         self._load_latest_on_start()
 
-        settings_file = os.path.join(BASE_DIR, "data", "window_settings.json")
-        if os.path.exists(settings_file):
-            try:
-                with open(settings_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.resize(data.get("width", 1000), data.get("height", 600))
-                    self.move(data.get("x", 100), data.get("y", 100))
-            except Exception:
-                pass
-
-    def _get_pipeline_data_dir(self):
+        geometry = settings().get("window")
+        if isinstance(geometry, dict):
+            self.resize(geometry.get("width", 1000), geometry.get("height", 600))
+            self.move(geometry.get("x", 100), geometry.get("y", 100))
+
+    def open_dashboard(self):
         """
-        Trả về <project_root>/00_Pipeline/data, tạo nếu cần.
+        Mở (hoặc đưa lên trước) bảng tổng quan trạng thái production của project hiện tại.
         """
-        data_dir = os.path.join(self.project["path"], "00_Pipeline", "data")
-        os.makedirs(data_dir, exist_ok=True)
-        return data_dir
+        if self.dashboard is None or self.dashboard.project_root != self.project["path"]:
+            if self.dashboard is not None:
+                self.dashboard.close()
+            self.dashboard = DashboardDialog(self.project["path"], self)
+            self.dashboard.entity_activated.connect(self.on_entity_requested)
+        self.dashboard.show()
+        self.dashboard.raise_()
+        self.dashboard.activateWindow()
+
+    def on_published(self, outputs_folder):
+        # Product tab đang hiển thị đúng entity vừa publish → nạp lại từ index
+        if self.product_tab.current_folder == outputs_folder:
+            self.product_tab.load_from(outputs_folder)
+
+    def on_entity_requested(self, kind, entity_path):
+        if kind == "asset":
+            self.left_tabs.setCurrentIndex(0)
+            self.on_asset_selected(entity_path)
+        else:
+            self.left_tabs.setCurrentIndex(1)
+            self.on_shot_selected(entity_path)
+
+    def _update_memory_label(self):
+        self.memory_label.setText(budget().summary())
+
+    def _update_jobs_button(self, count):
+        # Còn job đang chạy / chờ → hiện nút mở dock Jobs trên status bar
+        self.jobs_btn.setText(f"⏳ {count} job")
+        self.jobs_btn.setVisible(count > 0)
 
     def _load_latest_on_start(self):
         """
@@ -163,41 +212,24 @@ class MasterUI(QMainWindow):
         """
         Khi user đổi qua lại giữa Asset (0) và Shot (1), load ngay giá trị “latest” tương ứng.
         """
+        self.session.set(self.project["path"], "left_tab", idx)
         self._load_latest_for_tab(idx)
 
     def _load_latest_for_tab(self, idx):
         """
-        idx == 0 → Asset tab: đọc latest_asset.json, gọi on_asset_selected
-        idx == 1 → Shot tab: đọc latest_shot.json, gọi on_shot_selected
+        idx == 0 → Asset tab: lấy asset gần nhất (session_state), gọi on_asset_selected
+        idx == 1 → Shot tab: lấy shot gần nhất, gọi on_shot_selected
         """
-        data_dir = self._get_pipeline_data_dir()
-
         if idx == 0:
-            # Asset tab
-            latest_file = os.path.join(data_dir, "latest_asset.json")
-            if os.path.exists(latest_file):
-                try:
-                    with open(latest_file, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                    asset_path = data.get("asset_path", "")
-                    if asset_path and os.path.isdir(asset_path):
-                        # Gọi chỉ khi folder còn tồn tại
-                        self.on_asset_selected(asset_path)
-                except Exception:
-                    pass
+            asset_path = latest_selection(self.project["path"], "asset")
+            if asset_path and os.path.isdir(asset_path):
+                # Gọi chỉ khi folder còn tồn tại
+                self.on_asset_selected(asset_path)
 
         elif idx == 1:
-            # Shot tab
-            latest_file = os.path.join(data_dir, "latest_shot.json")
-            if os.path.exists(latest_file):
-                try:
-                    with open(latest_file, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                    shot_path = data.get("shot_path", "")
-                    if shot_path and os.path.isdir(shot_path):
-                        self.on_shot_selected(shot_path)
-                except Exception:
-                    pass
+            shot_path = latest_selection(self.project["path"], "shot")
+            if shot_path and os.path.isdir(shot_path):
+                self.on_shot_selected(shot_path)
 
     def on_asset_selected(self, asset_path):
         """
@@ -213,33 +245,35 @@ class MasterUI(QMainWindow):
         folder_lib = os.path.join(asset_path, "textures")
         self.library_tab.load_from(folder_lib)
 
+        # Asset không có playblast
+        self.playblast_tab.load_from("")
+
     def on_shot_selected(self, shot_folder):
         """
         Khi user chọn (hoặc tạo mới) shot:
-        Load 3 folder con: scenefiles, outputs, textures → 3 tab Preset
+        Load 4 folder con: scenefiles, outputs, textures, playblast → 4 tab bên phải
         """
         folder_scene = os.path.join(shot_folder, "scenefiles")
         folder_prod  = os.path.join(shot_folder, "outputs")
         folder_lib   = os.path.join(shot_folder, "textures")
+        folder_pb    = os.path.join(shot_folder, "playblast")
 
         self.scene_tab.load_from(folder_scene)
         self.product_tab.load_from(folder_prod)
         self.library_tab.load_from(folder_lib)
+        self.playblast_tab.load_from(folder_pb)
 
     def on_user_logout(self):
         """
-        Đăng xuất: xóa latest_user.json, mở LoginDialog, update user.
+        Đăng xuất: xóa user đã nhớ, mở LoginDialog, update user (LoginDialog lưu user mới).
         """
-        if os.path.exists(LATEST_USER_FILE):
-            os.remove(LATEST_USER_FILE)
+        clear_session()
 
         dlg = LoginDialog(self)
         if dlg.exec_() == QDialog.Accepted:
             new_user = dlg.user_edit.text().strip()
-            os.makedirs(os.path.dirname(LATEST_USER_FILE), exist_ok=True)
-            with open(LATEST_USER_FILE, "w", encoding="utf-8") as f:
-                json.dump({"last_user": new_user}, f, ensure_ascii=False, indent=2)
             self.username = new_user
+            self.session = open_session(new_user)
             self.user_btn.setText(f"👤 {self.username}")
             if self.project and os.path.isdir(self.project["path"]):
                 self.asset_tab.username = self.username
@@ -249,7 +283,7 @@ class MasterUI(QMainWindow):
 
     def on_project_hub(self):
         """
-        Chọn dự án mới → update project_root, ghi latest_project.json,
+        Chọn dự án mới → update project_root (ProjectSelectionDialog đã lưu vào Settings),
         reload AssetTab, clear 3 tab Preset.
         """
         dlg = ProjectSelectionDialog(self)
@@ -259,10 +293,6 @@ class MasterUI(QMainWindow):
                 self.project = proj
                 self.proj_btn.setText(f"📁 {proj['name']}")
 
-                os.makedirs(os.path.dirname(LATEST_PROJECT_FILE), exist_ok=True)
-                with open(LATEST_PROJECT_FILE, "w", encoding="utf-8") as f:
-                    json.dump(proj, f, ensure_ascii=False, indent=2)
-
                 # Cập nhật AssetTab và ShotTab
                 self.asset_tab.project_root = proj["path"]
                 self.asset_tab.load_assets()
@@ -273,11 +303,11 @@ class MasterUI(QMainWindow):
                 self.scene_tab.load_from("")
                 self.product_tab.load_from("")
                 self.library_tab.load_from("")
+                self.playblast_tab.set_fps(proj.get("fps", DEFAULT_FPS))
+                self.playblast_tab.load_from("")
 
     def closeEvent(self, event):
         """Ghi nhớ kích thước và vị trí cửa sổ khi đóng ứng dụng."""
-        settings_file = os.path.join(BASE_DIR, "data", "window_settings.json")
-        os.makedirs(os.path.dirname(settings_file), exist_ok=True)
         data = {
             "x": self.x(),
             "y": self.y(),
@@ -285,10 +315,10 @@ class MasterUI(QMainWindow):
             "height": self.height()
         }
         try:
-            with open(settings_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            settings().set("window", data)
         except Exception as e:
             print("Failed to save window state:", e)
+        self.session.flush()
         super().closeEvent(event)
 
     def on_refresh(self):
@@ -310,6 +340,8 @@ class MasterUI(QMainWindow):
         # Kết nối lại signal
         self.asset_tab.asset_selected.connect(self.on_asset_selected)
         self.shot_tab.shot_selected.connect(self.on_shot_selected)
+        self.asset_tab.entity_requested.connect(self.on_entity_requested)
+        self.shot_tab.entity_requested.connect(self.on_entity_requested)
 
         # Thêm lại vào tab widget bên trái
         self.left_tabs.insertTab(0, self.asset_tab, "Asset")
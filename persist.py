@@ -0,0 +1,186 @@
+# persist.py
+
+"""
+Ghi file JSON an toàn cho cả app:
+- write_json_atomic: ghi ra file tạm cùng thư mục → flush + fsync → os.replace
+  (người đọc chỉ thấy file cũ hoặc file mới hoàn chỉnh, không bao giờ thấy file bị cắt dở).
+- lock=True: giữ file_lock (<file>.lock) trong lúc ghi, dùng cho file trên ổ dự án dùng chung
+  (project.json, metadata entity / scene, 00_Pipeline/data).
+- os.replace bị từ chối tạm thời (Windows: file đích đang được máy khác mở) → thử lại có backoff.
+- replace_file / fsync_dir: hai bước cuối đó, cho module tự ghi file tạm (ảnh, file publish).
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import threading
+from contextlib import contextmanager
+
+# Lock file cũ hơn ngưỡng này coi như của máy đã crash / mất mạng giữa chừng
+LOCK_STALE_SECONDS = 30
+LOCK_TIMEOUT = 10
+REPLACE_RETRIES = 8
+
+
+def _read_lock(lock_path):
+    """
+    (token, thời điểm tạo theo đồng hồ của máy giữ lock) ghi trong lock file.
+    Không đọc được / chưa ghi xong / lock bản cũ → None.
+    """
+    try:
+        with open(lock_path, "r", encoding="utf-8") as f:
+            info = json.load(f)
+        return info["token"], float(info["time"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _is_stale(lock_path, info, stale):
+    if info is not None:
+        # So với thời điểm máy giữ lock tự ghi, không so đồng hồ máy này với mtime của server
+        return time.time() - info[1] > stale
+    # Lock không có nội dung hợp lệ (bản cũ, hoặc máy giữ lock chết ngay sau khi tạo file)
+    try:
+        return time.time() - os.path.getmtime(lock_path) > stale
+    except OSError:
+        return False
+
+
+def _break_stale(lock_path, info, stale):
+    """
+    Phá lock bị bỏ lại: đổi tên sang tên riêng (chỉ một máy đổi tên thành công), đọc lại nội dung
+    rồi mới xoá. Nếu giữa lúc đọc và lúc đổi tên lock đã được nhả và tạo lại (lock mới),
+    trả nó về chỗ cũ thay vì xoá.
+    """
+    broken = f"{lock_path}.{uuid.uuid4().hex}.stale"
+    try:
+        os.rename(lock_path, broken)
+    except OSError:
+        return  # Máy khác vừa phá / nhả lock
+    after = _read_lock(broken)
+    if after != info or not _is_stale(broken, after, stale):
+        try:
+            with open(broken, "rb") as f:
+                data = f.read()
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, data)
+            os.close(fd)
+        except OSError:
+            pass
+    try:
+        os.remove(broken)
+    except OSError:
+        pass
+
+
+@contextmanager
+def file_lock(lock_path, timeout=LOCK_TIMEOUT, stale=LOCK_STALE_SECONDS):
+    """
+    Khóa advisory liên tiến trình / liên máy bằng tạo file O_CREAT | O_EXCL (chạy được trên ổ mạng
+    SMB/NFS, nơi fcntl / msvcrt locking không đáng tin). Lock file ghi chủ (máy, pid, token) và
+    thời điểm tạo; lock bị bỏ lại quá `stale` giây thì được phá (_break_stale).
+    Hết timeout → TimeoutError.
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.01
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            info = _read_lock(lock_path)
+            stale_lock = _is_stale(lock_path, info, stale)
+            if stale_lock:
+                _break_stale(lock_path, info, stale)
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for lock: {lock_path}")
+            if not stale_lock:
+                time.sleep(delay)
+                delay = min(delay * 2, 0.2)
+    owned = (uuid.uuid4().hex, time.time())
+    try:
+        os.write(fd, json.dumps({"owner": f"{socket.gethostname()} {os.getpid()}",
+                                 "token": owned[0], "time": owned[1]}).encode("utf-8"))
+    except OSError:
+        os.close(fd)
+        os.remove(lock_path)
+        raise
+    os.close(fd)
+    try:
+        yield
+    finally:
+        # Chỉ xoá lock của chính mình: giữ quá `stale` giây thì máy khác có thể đã phá và tạo lock mới
+        if _read_lock(lock_path) == owned:
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+
+
+def replace_file(src, dst):
+    """
+    os.replace(src, dst), thử lại có backoff khi bị từ chối tạm thời.
+    """
+    delay = 0.02
+    for attempt in range(REPLACE_RETRIES):
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            if attempt == REPLACE_RETRIES - 1:
+                raise
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+
+def fsync_dir(folder):
+    # POSIX: fsync thư mục để phép rename cũng bền vững; Windows không mở được thư mục → bỏ qua
+    try:
+        fd = os.open(folder, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_text_atomic(path, text, lock=False, encoding="utf-8"):
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def write():
+        try:
+            with open(tmp, "w", encoding=encoding) as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            replace_file(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        fsync_dir(folder)
+
+    if lock:
+        with file_lock(path + ".lock"):
+            write()
+    else:
+        write()
+
+
+def write_json_atomic(path, data, lock=False, indent=2, ensure_ascii=False):
+    """
+    Ghi data ra path dạng JSON, atomic. Lỗi (OSError / TimeoutError) được raise cho caller;
+    file đích cũ không bị ảnh hưởng.
+    """
+    text = json.dumps(data, ensure_ascii=ensure_ascii, indent=indent)
+    write_text_atomic(path, text, lock=lock)
+
@@ -0,0 +1,135 @@
+# pixmap_budget.py
+
+import weakref
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtGui import QPixmapCache
+
+# Ngưỡng tổng pixmap đang gắn trên card; vượt ngưỡng → tab đang ẩn nhả hết pixmap
+DEFAULT_LIMIT_MB = 256
+# QPixmapCache (thumbnail dùng chung để nạp lại card) — mặc định Qt chỉ 10 MB
+PIXMAP_CACHE_KB = 64 * 1024
+
+
+def pixmap_bytes(pix):
+    return pix.width() * pix.height() * max(pix.depth(), 1) // 8
+
+
+class PixmapBudget(QObject):
+    """
+    Theo dõi bộ nhớ pixmap đang gắn trên QLabel của các card (mọi tab).
+    Pixmap dùng chung (cùng cacheKey, ví dụ logo scale sẵn trong QPixmapCache)
+    chỉ được tính một lần.
+    - set_pixmap / release: gắn / nhả pixmap của một label và cập nhật tổng.
+    - Tab đăng ký qua register_tab; khi tổng vượt limit, tab đang ẩn bị gọi
+      release_all_pixmaps() (nạp lại từ cache khi hiện lại).
+    changed được gom lại, emit tối đa một lần mỗi vòng event loop.
+    """
+    changed = pyqtSignal()
+
+    def __init__(self, limit_mb=DEFAULT_LIMIT_MB):
+        super().__init__()
+        self.limit = limit_mb * 1024 * 1024
+        self._labels = {}       # id(label) -> cacheKey
+        self._keys = {}         # cacheKey -> [bytes, số label dùng]
+        self._watched = set()   # id(label) đã nối destroyed
+        self._bytes = 0
+        self._tabs = weakref.WeakSet()
+
+        self._notify = QTimer(self)
+        self._notify.setSingleShot(True)
+        self._notify.setInterval(0)
+        self._notify.timeout.connect(self._on_notify)
+
+    # ---------- Thống kê ----------
+
+    def total_bytes(self):
+        return self._bytes
+
+    def pixmap_count(self):
+        """Số pixmap khác nhau đang được giữ."""
+        return len(self._keys)
+
+    def label_count(self):
+        """Số label (card / trang card) đang hiển thị pixmap."""
+        return len(self._labels)
+
+    # ---------- Gắn / nhả ----------
+
+    def set_pixmap(self, label, pix):
+        lid = id(label)
+        self._drop(lid)
+        label.setPixmap(pix)
+        key = pix.cacheKey()
+        entry = self._keys.get(key)
+        if entry is None:
+            entry = self._keys[key] = [pixmap_bytes(pix), 0]
+            self._bytes += entry[0]
+        entry[1] += 1
+        self._labels[lid] = key
+        if lid not in self._watched:
+            self._watched.add(lid)
+            label.destroyed.connect(lambda _=None, lid=lid: self._forget(lid))
+        self._changed()
+
+    def release(self, label):
+        lid = id(label)
+        if lid in self._labels:
+            self._drop(lid)
+            label.clear()
+            self._changed()
+
+    def holds(self, label):
+        return id(label) in self._labels
+
+    def _drop(self, lid):
+        key = self._labels.pop(lid, None)
+        if key is None:
+            return
+        entry = self._keys[key]
+        entry[1] -= 1
+        if entry[1] <= 0:
+            self._bytes -= entry[0]
+            del self._keys[key]
+
+    def _forget(self, lid):
+        self._watched.discard(lid)
+        if lid in self._labels:
+            self._drop(lid)
+            self._changed()
+
+    # ---------- Giới hạn ----------
+
+    def register_tab(self, tab):
+        self._tabs.add(tab)
+
+    def _changed(self):
+        try:
+            if not self._notify.isActive():
+                self._notify.start()
+        except RuntimeError:
+            pass  # app đang thoát, timer đã bị hủy trước các label
+
+    def _on_notify(self):
+        if self._bytes > self.limit:
+            for tab in list(self._tabs):
+                if not tab.isVisible():
+                    tab.release_all_pixmaps()
+        self.changed.emit()
+
+    def summary(self):
+        return f"Thumbnails: {self._bytes / (1024 * 1024):.1f} MB · {self.label_count()} cards"
+
+
+_budget = None
+
+
+def budget():
+    """
+    PixmapBudget dùng chung cho cả app (tạo lần đầu khi gọi, sau khi đã có QApplication).
+    """
+    global _budget
+    if _budget is None:
+        QPixmapCache.setCacheLimit(max(QPixmapCache.cacheLimit(), PIXMAP_CACHE_KB))
+        _budget = PixmapBudget()
+    return _budget
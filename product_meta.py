@@ -0,0 +1,612 @@
+# product_meta.py
+
+"""
+Đọc metadata của file output (Alembic / USD / FBX) chỉ từ header và các khối tóm tắt,
+không đọc toàn bộ file (cache Alembic vài GB vẫn chỉ tốn vài chục lần seek/read nhỏ).
+
+read_product_meta(path, file_size) trả về dict (các key có thể thiếu):
+    format, version, app, created, frame_start, frame_end, fps, objects, up_axis, file_size
+"""
+
+import os
+import re
+import struct
+import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from texture_cache import TextureMetaCache
+
+BASE_DIR  = os.path.dirname(__file__)
+CACHE_DIR = os.path.join(BASE_DIR, "data", "cache", "productmeta")
+
+# Giới hạn khi duyệt cây object Alembic (file rất lớn → hiển thị "N+")
+ABC_MAX_OBJECTS = 20000
+# USDA nhỏ hơn ngưỡng này thì đếm prim bằng cách quét text; lớn hơn thì bỏ qua
+USDA_SCAN_LIMIT = 8 * 1024 * 1024
+HEADER_READ     = 256 * 1024
+
+_AXES = ("X", "Y", "Z")
+
+
+class ProductMetaCache(TextureMetaCache):
+    """
+    Cache metadata output theo folder, lưu tại data/cache/productmeta/<hash folder>.json.
+    """
+    cache_dir = CACHE_DIR
+
+
+# ---------- Alembic (Ogawa) ----------
+
+_OGAWA_DATA_BIT = 0x8000000000000000
+
+
+def _ogawa_children(f, pos):
+    """
+    Danh sách con của group Ogawa tại pos: (is_data, pos). pos == 0 → group rỗng.
+    """
+    if pos == 0:
+        return []
+    f.seek(pos)
+    (count,) = struct.unpack("<Q", f.read(8))
+    if count == 0 or count > 1_000_000:
+        return []
+    raw = f.read(8 * count)
+    return [(bool(v & _OGAWA_DATA_BIT), v & ~_OGAWA_DATA_BIT)
+            for v in struct.unpack(f"<{count}Q", raw)]
+
+
+def _ogawa_data(f, pos, limit=1024 * 1024):
+    if pos == 0:
+        return b""
+    f.seek(pos)
+    (size,) = struct.unpack("<Q", f.read(8))
+    return f.read(min(size, limit))
+
+
+def _parse_abc_time_samplings(data):
+    """
+    Khối time sampling: mỗi sampling = uint32 max_sample, float64 time_per_cycle,
+    uint32 số time / cycle, rồi các float64 time. Sampling 0 là identity.
+    """
+    samplings = []
+    pos = 0
+    while pos + 16 <= len(data):
+        max_sample, tpc, n = struct.unpack_from("<IdI", data, pos)
+        pos += 16
+        if pos + 8 * n > len(data):
+            break
+        times = struct.unpack_from(f"<{n}d", data, pos)
+        pos += 8 * n
+        samplings.append((max_sample, tpc, times))
+    return samplings
+
+
+def _count_abc_objects(f, pos, limit):
+    """
+    Đếm object: group object có con 0 = properties, các con group tiếp theo là object con,
+    con data cuối là header. Duyệt theo stack, dừng khi vượt limit.
+    """
+    count = 0
+    stack = [pos]
+    while stack and count < limit:
+        for is_data, child in _ogawa_children(f, stack.pop())[1:]:
+            if not is_data and child:
+                count += 1
+                stack.append(child)
+    return count
+
+
+def read_abc_header(path):
+    meta = {"format": "Alembic"}
+    with open(path, "rb") as f:
+        head = f.read(16)
+        if head[:5] != b"Ogawa":
+            if head[:4] == b"\x89HDF":
+                meta["version"] = "HDF5"
+            return meta
+        (root_pos,) = struct.unpack_from("<Q", head, 8)
+        root = _ogawa_children(f, root_pos)
+        if len(root) < 5:
+            return meta
+
+        version = _ogawa_data(f, root[1][1])
+        if len(version) >= 4:
+            (lib,) = struct.unpack_from("<i", version)
+            meta["version"] = f"{lib // 10000}.{lib // 100 % 100}.{lib % 100}"
+
+        # Archive metadata: "key=value;key=value"
+        info = {}
+        for item in _ogawa_data(f, root[3][1]).decode("utf-8", "ignore").split(";"):
+            if "=" in item:
+                key, value = item.split("=", 1)
+                info[key] = value
+        if info.get("_ai_Application"):
+            meta["app"] = info["_ai_Application"]
+        if info.get("_ai_DateWritten"):
+            meta["created"] = info["_ai_DateWritten"]
+        fps = None
+        try:
+            fps = float(info.get("_ai_DCC_FPS", "") or 0) or None
+        except ValueError:
+            pass
+
+        # Frame range từ time sampling khác identity có nhiều sample nhất
+        best = None
+        for max_sample, tpc, times in _parse_abc_time_samplings(_ogawa_data(f, root[4][1]))[1:]:
+            if not times or max_sample <= 1:
+                continue
+            if best is None or max_sample > best[0]:
+                best = (max_sample, tpc, times)
+        if best:
+            max_sample, tpc, times = best
+            cycles, rem = divmod(max_sample - 1, len(times))
+            end_time = times[rem] + cycles * tpc
+            if fps is None and len(times) == 1 and tpc > 0:
+                fps = 1.0 / tpc
+            if fps:
+                meta["frame_start"] = round(times[0] * fps, 3)
+                meta["frame_end"] = round(end_time * fps, 3)
+        if fps:
+            meta["fps"] = round(fps, 3)
+
+        if not root[2][0]:
+            count = _count_abc_objects(f, root[2][1], ABC_MAX_OBJECTS)
+            meta["objects"] = count
+            if count >= ABC_MAX_OBJECTS:
+                meta["objects_capped"] = True
+    return meta
+
+
+# ---------- USD ----------
+
+def _usd_layer_meta(path):
+    """
+    Nếu có pxr (usd-core), đọc metadata layer ở chế độ metadataOnly (không nạp prim).
+    """
+    try:
+        from pxr import Sdf
+    except ImportError:
+        return None
+    try:
+        layer = Sdf.Layer.OpenAsAnonymous(path, True)
+    except Exception:
+        return None
+    if layer is None:
+        return None
+    meta = {}
+    up = layer.pseudoRoot.GetInfo("upAxis") if layer.pseudoRoot.HasInfo("upAxis") else None
+    if up:
+        meta["up_axis"] = str(up)
+    if layer.HasStartTimeCode():
+        meta["frame_start"] = layer.startTimeCode
+    if layer.HasEndTimeCode():
+        meta["frame_end"] = layer.endTimeCode
+    if layer.HasFramesPerSecond():
+        meta["fps"] = layer.framesPerSecond
+    elif layer.HasTimeCodesPerSecond():
+        meta["fps"] = layer.timeCodesPerSecond
+    return meta
+
+
+def read_usdc_header(path):
+    """
+    Crate: "PXR-USDC", 8 byte version, int64 vị trí TOC. TOC = uint64 số section,
+    mỗi section (tên 16 byte, int64 start, int64 size). PATHS / SPECS bắt đầu bằng uint64 số phần tử.
+    Cả hai đều có pseudo-root "/" của layer: trừ đi để số đếm khớp với số prim của USDA.
+    """
+    meta = {"format": "USD (crate)"}
+    with open(path, "rb") as f:
+        head = f.read(24)
+        if head[:8] != b"PXR-USDC":
+            return meta
+        meta["version"] = f"{head[8]}.{head[9]}.{head[10]}"
+        (toc,) = struct.unpack_from("<q", head, 16)
+        f.seek(toc)
+        (n_sections,) = struct.unpack("<Q", f.read(8))
+        sections = {}
+        for _ in range(min(n_sections, 64)):
+            name, start, size = struct.unpack("<16sqq", f.read(32))
+            sections[name.rstrip(b"\0").decode("ascii", "ignore")] = (start, size)
+        for key, section in (("paths", "PATHS"), ("specs", "SPECS")):
+            if section in sections:
+                f.seek(sections[section][0])
+                (count,) = struct.unpack("<Q", f.read(8))
+                meta[key] = max(count - 1, 0)
+    meta.update(_usd_layer_meta(path) or {})
+    return meta
+
+
+_USDA_KEYS = {
+    "upAxis":             ("up_axis", str),
+    "startTimeCode":      ("frame_start", float),
+    "endTimeCode":        ("frame_end", float),
+    "framesPerSecond":    ("fps", float),
+    "timeCodesPerSecond": ("tcps", float),
+}
+_USDA_ITEM = re.compile(r'^\s*(\w+)\s*=\s*"?([^"\n]*)"?\s*$', re.M)
+_USDA_PRIM = re.compile(rb'^\s*(?:def|over|class)\b', re.M)
+
+
+def read_usda_header(path, file_size=0):
+    """
+    USDA: dòng "#usda 1.0" rồi khối metadata "( ... )" ở đầu file.
+    """
+    meta = {"format": "USD (ascii)"}
+    with open(path, "rb") as f:
+        head = f.read(HEADER_READ)
+        first = head.split(b"\n", 1)[0].decode("ascii", "ignore")
+        if first.startswith("#usda"):
+            meta["version"] = first[5:].strip()
+        text = head.decode("utf-8", "ignore")
+        start = text.find("(")
+        end = text.find("\n)", start)
+        if start >= 0 and end > start and not text[:start].strip("#usda 0123456789.\r\n\t "):
+            for key, value in _USDA_ITEM.findall(text[start + 1:end]):
+                if key in _USDA_KEYS:
+                    name, conv = _USDA_KEYS[key]
+                    try:
+                        meta[name] = conv(value.strip())
+                    except ValueError:
+                        pass
+        tcps = meta.pop("tcps", None)
+        if "fps" not in meta and tcps:
+            meta["fps"] = tcps
+
+        if file_size and file_size <= USDA_SCAN_LIMIT:
+            count = len(_USDA_PRIM.findall(head))
+            while True:
+                chunk = f.read(1024 * 1024)
+                if not chunk:
+                    break
+                count += len(_USDA_PRIM.findall(chunk))
+            meta["objects"] = count
+    return meta
+
+
+def read_usd_header(path, file_size=0):
+    """
+    .usd có thể là crate hoặc text: xem 8 byte đầu.
+    """
+    with open(path, "rb") as f:
+        magic = f.read(8)
+    if magic == b"PXR-USDC":
+        return read_usdc_header(path)
+    return read_usda_header(path, file_size)
+
+
+# ---------- FBX ----------
+
+_FBX_MAGIC = b"Kaydara FBX Binary  \x00"
+_FBX_TICKS = 46186158000  # KTime: số tick mỗi giây
+_FBX_TIME_MODES = {
+    1: 120.0, 2: 100.0, 3: 60.0, 4: 50.0, 5: 48.0, 6: 30.0, 7: 30.0, 8: 29.97, 9: 29.97,
+    10: 25.0, 11: 24.0, 12: 1000.0, 13: 23.976, 15: 96.0, 16: 72.0, 17: 59.94, 18: 119.88,
+}
+_FBX_SCALARS = {b"Y": "<h", b"C": "<?", b"I": "<i", b"F": "<f", b"D": "<d", b"L": "<q"}
+
+
+def _fbx_properties(data, pos, count):
+    """
+    Giải mã danh sách property của một node (chỉ dùng cho node nhỏ như GlobalSettings).
+    Mảng (f/d/l/i/b) được bỏ qua.
+    """
+    values = []
+    for _ in range(count):
+        code = data[pos:pos + 1]
+        pos += 1
+        if code in _FBX_SCALARS:
+            fmt = _FBX_SCALARS[code]
+            values.append(struct.unpack_from(fmt, data, pos)[0])
+            pos += struct.calcsize(fmt)
+        elif code in (b"S", b"R"):
+            (length,) = struct.unpack_from("<I", data, pos)
+            raw = data[pos + 4:pos + 4 + length]
+            values.append(raw.decode("utf-8", "ignore") if code == b"S" else raw)
+            pos += 4 + length
+        elif code in (b"f", b"d", b"l", b"i", b"b"):
+            _, _, length = struct.unpack_from("<III", data, pos)
+            values.append(None)
+            pos += 12 + length
+        else:
+            break
+    return values
+
+
+class _FbxNodeBlock:
+    """
+    Một node top-level đã đọc vào bộ nhớ. Offset trong FBX tính theo đầu file,
+    nên giữ base để đổi sang vị trí trong data.
+    """
+
+    def __init__(self, data, base, wide):
+        self.data = data
+        self.base = base
+        self.head = "<QQQB" if wide else "<IIIB"
+        self.head_size = struct.calcsize(self.head)
+
+    def children(self, pos, end):
+        """
+        Duyệt các node con trong [pos, end): yield (name, n_props, props_pos, children_pos, node_end).
+        """
+        data, base = self.data, self.base
+        while pos + self.head_size <= end:
+            node_end, n_props, props_len, name_len = struct.unpack_from(self.head, data, pos - base)
+            if node_end == 0 or node_end <= pos:
+                break
+            name_pos = pos - base + self.head_size
+            name = data[name_pos:name_pos + name_len].decode("ascii", "ignore")
+            props_pos = pos + self.head_size + name_len
+            yield name, n_props, props_pos, props_pos + props_len, node_end
+            pos = node_end
+
+    def props(self, pos, count):
+        return _fbx_properties(self.data, pos - self.base, count)
+
+
+def read_fbx_header(path, file_size=0):
+    meta = {"format": "FBX"}
+    with open(path, "rb") as f:
+        head = f.read(27)
+        if not head.startswith(_FBX_MAGIC):
+            f.seek(0)
+            return _read_fbx_ascii(f.read(HEADER_READ), meta)
+        (version,) = struct.unpack_from("<I", head, 23)
+        meta["version"] = f"{version // 1000}.{version % 1000 // 100}"
+        wide = version >= 7500
+        head_fmt = "<QQQB" if wide else "<IIIB"
+        head_size = struct.calcsize(head_fmt)
+
+        # Chỉ đọc header của node top-level; node nhỏ cần thiết mới đọc cả node
+        pos = 27
+        wanted = {"FBXHeaderExtension", "CreationTime", "Creator", "GlobalSettings", "Definitions"}
+        settings = {}
+        while True:
+            f.seek(pos)
+            raw = f.read(head_size + 255)
+            if len(raw) < head_size:
+                break
+            node_end, n_props, props_len, name_len = struct.unpack_from(head_fmt, raw)
+            if node_end == 0 or node_end <= pos:
+                break
+            name = raw[head_size:head_size + name_len].decode("ascii", "ignore")
+            if name in wanted and node_end - pos <= 16 * 1024 * 1024:
+                f.seek(pos)
+                block = _FbxNodeBlock(f.read(node_end - pos), pos, wide)
+                props_pos = pos + head_size + name_len
+                _read_fbx_node(block, name, n_props, props_pos, props_pos + props_len, node_end,
+                               meta, settings)
+            pos = node_end
+
+    _apply_fbx_settings(meta, settings)
+    return meta
+
+
+def _read_fbx_node(block, name, n_props, props_pos, children_pos, node_end, meta, settings):
+    if name == "Creator":
+        values = block.props(props_pos, n_props)
+        if values and isinstance(values[0], str):
+            meta.setdefault("app", values[0])
+    elif name == "CreationTime":
+        values = block.props(props_pos, n_props)
+        if values and isinstance(values[0], str):
+            meta.setdefault("created", values[0])
+    elif name == "FBXHeaderExtension":
+        for child, c_props, c_pos, c_children, c_end in block.children(children_pos, node_end):
+            if child in ("Creator", "CreationTimeStamp"):
+                if child == "Creator":
+                    values = block.props(c_pos, c_props)
+                    if values and isinstance(values[0], str):
+                        meta["app"] = values[0]
+                    continue
+                stamp = {}
+                for part, p_props, p_pos, _, _ in block.children(c_children, c_end):
+                    values = block.props(p_pos, p_props)
+                    if values and isinstance(values[0], int):
+                        stamp[part] = values[0]
+                try:
+                    meta["created"] = datetime.datetime(
+                        stamp["Year"], stamp["Month"], stamp["Day"],
+                        stamp.get("Hour", 0), stamp.get("Minute", 0), stamp.get("Second", 0)
+                    ).isoformat(sep=" ")
+                except (KeyError, ValueError):
+                    pass
+    elif name == "GlobalSettings":
+        for child, _, _, c_children, c_end in block.children(children_pos, node_end):
+            if child != "Properties70":
+                continue
+            for prop, p_props, p_pos, _, _ in block.children(c_children, c_end):
+                if prop != "P":
+                    continue
+                values = block.props(p_pos, p_props)
+                if len(values) >= 5 and isinstance(values[0], str):
+                    settings[values[0]] = values[4]
+    elif name == "Definitions":
+        # ObjectType "Model" { Count: N } → số object trong scene
+        for child, c_props, c_pos, c_children, c_end in block.children(children_pos, node_end):
+            if child != "ObjectType":
+                continue
+            values = block.props(c_pos, c_props)
+            if values != ["Model"]:
+                continue
+            for sub, s_props, s_pos, _, _ in block.children(c_children, c_end):
+                if sub == "Count":
+                    counts = block.props(s_pos, s_props)
+                    if counts and isinstance(counts[0], int):
+                        meta["objects"] = counts[0]
+
+
+_FBX_ASCII_P = re.compile(r'P:\s*"(\w+)"\s*,\s*"[^"]*"\s*,\s*"[^"]*"\s*,\s*"[^"]*"\s*,\s*([-\d.eE]+)')
+_FBX_ASCII_CREATOR = re.compile(r'^\s*Creator:\s*"([^"]*)"', re.M)
+_FBX_ASCII_MODEL = re.compile(r'ObjectType:\s*"Model"\s*\{\s*Count:\s*(\d+)')
+
+
+def _read_fbx_ascii(head, meta):
+    text = head.decode("utf-8", "ignore")
+    if not text.lstrip().startswith(";"):
+        return meta
+    version = re.search(r"FBXVersion:\s*(\d+)", text)
+    if version:
+        v = int(version.group(1))
+        meta["version"] = f"{v // 1000}.{v % 1000 // 100} (ascii)"
+    creator = _FBX_ASCII_CREATOR.search(text)
+    if creator:
+        meta["app"] = creator.group(1)
+    models = _FBX_ASCII_MODEL.search(text)
+    if models:
+        meta["objects"] = int(models.group(1))
+    settings = {}
+    for key, value in _FBX_ASCII_P.findall(text):
+        try:
+            settings[key] = float(value) if "." in value or "e" in value.lower() else int(value)
+        except ValueError:
+            pass
+    _apply_fbx_settings(meta, settings)
+    return meta
+
+
+def _apply_fbx_settings(meta, settings):
+    up = settings.get("UpAxis")
+    if isinstance(up, (int, float)) and 0 <= int(up) <= 2:
+        sign = "-" if settings.get("UpAxisSign", 1) < 0 else ""
+        meta["up_axis"] = sign + _AXES[int(up)]
+    mode = int(settings.get("TimeMode", 0) or 0)
+    fps = settings.get("CustomFrameRate") if mode == 14 else _FBX_TIME_MODES.get(mode)
+    if fps and fps > 0:
+        meta["fps"] = round(float(fps), 3)
+        start, stop = settings.get("TimeSpanStart"), settings.get("TimeSpanStop")
+        if isinstance(start, (int, float)) and isinstance(stop, (int, float)) and stop >= start:
+            meta["frame_start"] = round(start / _FBX_TICKS * fps, 3)
+            meta["frame_end"] = round(stop / _FBX_TICKS * fps, 3)
+
+
+# ---------- Tổng hợp ----------
+
+_READERS = {
+    "abc":  lambda path, size: read_abc_header(path),
+    "usdc": lambda path, size: read_usdc_header(path),
+    "usda": read_usda_header,
+    "usd":  read_usd_header,
+    "fbx":  read_fbx_header,
+}
+
+
+def read_product_meta(path, file_size=0):
+    """
+    Đọc metadata header của một file output. Lỗi định dạng → dict chỉ có format/file_size.
+    """
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    reader = _READERS.get(ext)
+    meta = {}
+    if reader:
+        try:
+            meta = reader(path, file_size) or {}
+        except (OSError, struct.error, ValueError, UnicodeDecodeError):
+            meta = {"format": ext.upper()}
+    meta["file_size"] = file_size
+    return meta
+
+
+def _num(value):
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+
+def format_frame_range(meta):
+    if meta and "frame_start" in meta and "frame_end" in meta:
+        return f"{_num(meta['frame_start'])}-{_num(meta['frame_end'])}"
+    return ""
+
+
+def format_product_summary(meta):
+    """
+    Dòng ngắn trên card: frame range · số object · up axis.
+    """
+    if not meta:
+        return ""
+    parts = []
+    frames = format_frame_range(meta)
+    if frames:
+        parts.append(frames)
+    count = meta.get("objects", meta.get("specs"))
+    if count is not None:
+        parts.append(f"{count}{'+' if meta.get('objects_capped') else ''} obj")
+    if meta.get("up_axis"):
+        parts.append(f"{meta['up_axis']}-up")
+    return " · ".join(parts) or meta.get("format", "")
+
+
+def format_product_tooltip(meta, mtime=None):
+    if not meta:
+        return ""
+    lines = [f"{meta.get('format', '')} {meta.get('version', '')}".strip()]
+    if "frame_start" in meta:
+        fps = f" @ {_num(meta['fps'])} fps" if meta.get("fps") else ""
+        lines.append(f"Frames: {format_frame_range(meta)}{fps}")
+    if meta.get("objects") is not None:
+        lines.append(f"Objects: {meta['objects']}{'+' if meta.get('objects_capped') else ''}")
+    if meta.get("paths") is not None:
+        lines.append(f"Paths: {meta['paths']} · Specs: {meta.get('specs', '?')}")
+    if meta.get("up_axis"):
+        lines.append(f"Up axis: {meta['up_axis']}")
+    if meta.get("app"):
+        lines.append(f"Application: {meta['app']}")
+    if meta.get("created"):
+        lines.append(f"Created: {meta['created']}")
+    if mtime:
+        lines.append(f"Modified: {datetime.datetime.fromtimestamp(mtime):%Y-%m-%d %H:%M}")
+    return "\n".join(lines)
+
+
+# ---------- Worker ----------
+
+_pool = None
+
+
+def product_pool():
+    global _pool
+    if _pool is None:
+        _pool = QThreadPool()
+        _pool.setMaxThreadCount(1)
+    return _pool
+
+
+class ProductWorkerSignals(QObject):
+    # (folder, path, meta)
+    result = pyqtSignal(str, str, object)
+    finished = pyqtSignal(str)
+
+
+class ProductMetaWorker(QRunnable):
+    """
+    Đọc header cho danh sách file của một folder. Việc đọc chủ yếu là I/O (seek + read nhỏ,
+    có thể trên ổ mạng) nên chia cho một ThreadPoolExecutor nhỏ; kết quả emit về GUI thread.
+    jobs: list dict {path, size}
+    """
+
+    def __init__(self, folder, jobs, max_workers=4):
+        super().__init__()
+        self.folder = folder
+        self.jobs = jobs
+        self.max_workers = max_workers
+        self.cancelled = False
+        self.signals = ProductWorkerSignals()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(read_product_meta, job["path"], job["size"]): job
+                       for job in self.jobs}
+            for fut in as_completed(futures):
+                if self.cancelled:
+                    for other in futures:
+                        other.cancel()
+                    break
+                try:
+                    meta = fut.result()
+                except Exception:
+                    continue
+                self.signals.result.emit(self.folder, futures[fut]["path"], meta)
+        self.signals.finished.emit(self.folder)
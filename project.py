@@ -1,6 +1,5 @@
 import os
 import shutil
-import json
 import datetime
 from PyQt5.QtWidgets import (
     QDialog, QMessageBox, QFileDialog, QGridLayout, QVBoxLayout,
@@ -8,13 +7,15 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, pyqtSignal
 from tab_presets import CustomItemWidget
+from persist import write_json_atomic
+from settings import settings
+from remote_cache import remote_cache
+from verify import VerifyDialog
+from jobs import submit, copy_tree, BACKGROUND
 
 # Đường dẫn lưu trạng thái
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
-LATEST_DRIVE_FILE   = os.path.join(DATA_DIR, "latest_drive.json")
-LATEST_LOCAL_FILE   = os.path.join(DATA_DIR, "latest_local.json")
-LATEST_PROJECT_FILE = os.path.join(DATA_DIR, "latest_project.json")
 TEMPLATE_THUMB = os.path.join(BASE_DIR, "template", "thumbnail.png")
 
 
@@ -41,8 +42,7 @@ def create_project_folders(base_path: str, name: str, short: str) -> str:
         "short": short.strip(),
         "path": os.path.abspath(proj_folder)
     }
-    with open(os.path.join(proj_folder, "project.json"), "w", encoding="utf-8") as f:
-        json.dump(proj_data, f, ensure_ascii=False, indent=2)
+    write_json_atomic(os.path.join(proj_folder, "project.json"), proj_data, lock=True)
 
     return os.path.abspath(proj_folder)
 
@@ -122,17 +122,14 @@ class ProjectSelectionDialog(QDialog):
         self.add_btn.clicked.connect(self.on_add)
 
         # Load trạng thái gần nhất
-        os.makedirs(DATA_DIR, exist_ok=True)
-        if os.path.isfile(LATEST_DRIVE_FILE):
-            d = json.load(open(LATEST_DRIVE_FILE, 'r', encoding='utf-8')).get('path', '')
-            if os.path.isdir(d):
-                self.drive_root = d
-                self.choose_drive_btn.setText(d)
-        if os.path.isfile(LATEST_LOCAL_FILE):
-            l = json.load(open(LATEST_LOCAL_FILE, 'r', encoding='utf-8')).get('path', '')
-            if os.path.isdir(l):
-                self.local_root = l
-                self.choose_local_btn.setText(l)
+        d = settings().get("drive_root", "")
+        if d and os.path.isdir(d):
+            self.drive_root = d
+            self.choose_drive_btn.setText(d)
+        l = settings().get("local_root", "")
+        if l and os.path.isdir(l):
+            self.local_root = l
+            self.choose_local_btn.setText(l)
 
         if hasattr(self, 'drive_root') and hasattr(self, 'local_root'):
             self.add_btn.setEnabled(True)
@@ -149,7 +146,7 @@ class ProjectSelectionDialog(QDialog):
         if path:
             self.drive_root = path
             self.choose_drive_btn.setText(path)
-            json.dump({'path': path}, open(LATEST_DRIVE_FILE, 'w', encoding='utf-8'), ensure_ascii=False, indent=2)
+            settings().set("drive_root", path)
             if hasattr(self, 'local_root'):
                 self.add_btn.setEnabled(True)
             self.load_projects()
@@ -159,7 +156,7 @@ class ProjectSelectionDialog(QDialog):
         if path:
             self.local_root = path
             self.choose_local_btn.setText(path)
-            json.dump({'path': path}, open(LATEST_LOCAL_FILE, 'w', encoding='utf-8'), ensure_ascii=False, indent=2)
+            settings().set("local_root", path)
             if hasattr(self, 'drive_root'):
                 self.add_btn.setEnabled(True)
             self.load_projects()
@@ -167,10 +164,8 @@ class ProjectSelectionDialog(QDialog):
     def make_dblclick(self, proj_data):
         def on_dbl(ev):
             if ev.button() == Qt.LeftButton:
-                os.makedirs(os.path.dirname(LATEST_PROJECT_FILE), exist_ok=True)
                 try:
-                    with open(LATEST_PROJECT_FILE, 'w', encoding='utf-8') as f:
-                        json.dump(proj_data, f, ensure_ascii=False, indent=2)
+                    settings().set("project", proj_data)
                 except Exception:
                     pass
                 self.project_selected.emit(proj_data)
@@ -188,15 +183,15 @@ class ProjectSelectionDialog(QDialog):
 
         if not hasattr(self, 'drive_root'):
             return
-        folders = sorted(os.listdir(self.drive_root))
+        # Listing + project.json đọc qua mirror local (Drive chậm / offline vẫn mở được)
+        cache = remote_cache()
         cols = 3
         idx = 0
-        for nm in folders:
+        for nm, is_dir in cache.listdir(self.drive_root):
             pd = os.path.join(self.drive_root, nm)
-            pj = os.path.join(pd, 'project.json')
-            if not os.path.isfile(pj):
+            meta = cache.read_json(os.path.join(pd, 'project.json')) if is_dir else None
+            if not isinstance(meta, dict):
                 continue
-            meta = json.load(open(pj, 'r', encoding='utf-8'))
             proj_data = {
                 'name': meta.get('name', nm),
                 'short': meta.get('short', ''),
@@ -221,26 +216,46 @@ class ProjectSelectionDialog(QDialog):
             idx += 1
 
     def download(self, item):
-        try:
-            shutil.copytree(item.drive_path, item.local_path)
+        # Copy ở JobScheduler (tiến độ / hủy trong panel Jobs), dialog vẫn dùng được trong lúc tải.
+        # download_btn nối với cả on_download_clicked lẫn lambda ở load_projects → chỉ nhận lần đầu
+        if not item.download_btn.isEnabled():
+            return
+        item.download_btn.setEnabled(False)
+
+        def on_done(_):
             item.download_btn.hide()
-        except Exception as e:
-            QMessageBox.critical(self, 'Lỗi tải dự án', f'Không thể tải dự án:\n{e}')
+
+        def on_error(message):
+            item.download_btn.setEnabled(True)
+            QMessageBox.critical(self, 'Lỗi tải dự án', f'Không thể tải dự án:\n{message}')
+
+        submit(f"Download {os.path.basename(item.drive_path)}", copy_tree, item.drive_path, item.local_path,
+               priority=BACKGROUND, retries=2, on_done=on_done, on_error=on_error)
+
+    def extend_card_menu(self, menu, card):
+        # Project đã có bản Local → so khớp với Drive (hash song song, sửa file thiếu / sai)
+        local_path = getattr(card, "local_path", "")
+        if local_path and os.path.isdir(local_path):
+            menu.addAction("Verify Local Copy", lambda: self.verify(card))
+
+    def verify(self, item):
+        dlg = VerifyDialog(item.drive_path, item.local_path, self)
+        dlg.exec_()
 
     def on_add(self):
         dlg = AddProjectDialog(self)
         if dlg.exec_():
             pd = dlg.get_data()
             drive_proj = create_project_folders(self.drive_root, pd['name'], pd['short'])
+            remote_cache().invalidate(drive_proj)
             local_proj = os.path.join(self.local_root, os.path.basename(drive_proj))
-            shutil.copytree(drive_proj, local_proj)
-            # Hiển thị mới ngay
+            # Hiển thị mới ngay; bản Local tải như nút Download (job nền)
             proj_data = {'name': pd['name'], 'short': pd['short'], 'path': drive_proj, 'local_path': local_proj}
             thumb = os.path.join(drive_proj, 'thumbnail.png')
             item = CustomItemWidget(proj_data['name'], thumb, parent_tab=self)
             item.drive_path = drive_proj
             item.local_path = local_proj
-            item.download_btn.hide()
+            self.download(item)
             # attach double click
             item.mouseDoubleClickEvent = self.make_dblclick(proj_data)
             idx = self.grid.count()
@@ -249,10 +264,7 @@ class ProjectSelectionDialog(QDialog):
             self.grid.addWidget(item, row, col)
 
     def get_selected(self):
-        try:
-            return json.load(open(LATEST_PROJECT_FILE, 'r', encoding='utf-8'))
-        except:
-            return None
+        return settings().get("project")
 
 if __name__ == '__main__':
     import sys
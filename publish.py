@@ -0,0 +1,227 @@
+# publish.py
+
+import os
+import re
+import json
+import stat
+import hashlib
+from datetime import datetime
+
+from persist import file_lock, write_json_atomic, replace_file, fsync_dir
+
+# Kho object: <project>/00_Pipeline/publish/objects/<2 ký tự đầu hash>/<sha256><ext>
+STORE_PARTS = ("00_Pipeline", "publish", "objects")
+# Index publish của entity, nằm trong folder outputs mà ProductTab hiển thị
+INDEX_NAME = "publishes.json"
+INDEX_VERSION = 1
+CHUNK_SIZE = 8 * 1024 * 1024
+
+# "<tên>_v003", "<tên>.v3", "<tên>-V012" → "<tên>"
+_VERSION_SUFFIX = re.compile(r"[._-][vV]\d+$")
+
+
+def store_root(project_root):
+    return os.path.join(project_root, *STORE_PARTS)
+
+
+def object_path(project_root, digest, ext):
+    return os.path.join(store_root(project_root), digest[:2], digest + ext.lower())
+
+
+def index_path(outputs_folder):
+    return os.path.join(outputs_folder, INDEX_NAME)
+
+
+def project_root_of(path):
+    """
+    Root project chứa path (folder cha của 03_Production), hoặc "" nếu không xác định được.
+    """
+    p = os.path.abspath(path)
+    while True:
+        parent = os.path.dirname(p)
+        if parent == p:
+            return ""
+        if os.path.basename(p).lower() == "03_production":
+            return parent
+        p = parent
+
+
+def product_name_for(path):
+    return _VERSION_SUFFIX.sub("", os.path.splitext(os.path.basename(path))[0])
+
+
+def load_index(outputs_folder):
+    """
+    {"products": {product: {"latest": n, "versions": {"n": record}}}}; chưa có / lỗi → products rỗng.
+    """
+    try:
+        with open(index_path(outputs_folder), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == INDEX_VERSION and isinstance(data.get("products"), dict):
+            return data
+    except Exception:
+        pass
+    return {"version": INDEX_VERSION, "products": {}}
+
+
+def latest_publishes(outputs_folder):
+    """
+    Bản latest của mỗi product: list (product, version, record), sort theo tên product.
+    Không stat file nào, chỉ đọc index.
+    """
+    result = []
+    for product, info in sorted(load_index(outputs_folder)["products"].items()):
+        record = info.get("versions", {}).get(str(info.get("latest")))
+        if record:
+            result.append((product, info["latest"], record))
+    return result
+
+
+def hash_file(path, progress=None, cancelled=None):
+    """
+    sha256 của file (đọc theo khối CHUNK_SIZE). progress(bytes đã đọc). Bị hủy → None.
+    """
+    digest = hashlib.sha256()
+    done = 0
+    with open(path, "rb") as f:
+        while True:
+            if cancelled and cancelled():
+                return None
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            done += len(chunk)
+            if progress:
+                progress(done)
+    return digest.hexdigest()
+
+
+def store_object(project_root, src, digest, size, progress=None, cancelled=None):
+    """
+    Đưa file vào kho theo hash. Object đã có (cùng hash, cùng size) → không copy (dedupe).
+    Copy ra file tạm trong cùng folder rồi os.replace, object chỉ xuất hiện khi đã đủ nội dung;
+    object được đặt read-only. Trả về (path object, True nếu đã có sẵn) hoặc None nếu bị hủy.
+    """
+    target = object_path(project_root, digest, os.path.splitext(src)[1])
+    try:
+        if os.path.getsize(target) == size:
+            return target, True
+    except OSError:
+        pass
+    folder = os.path.dirname(target)
+    os.makedirs(folder, exist_ok=True)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    try:
+        done = 0
+        with open(src, "rb") as fin, open(tmp, "wb") as fout:
+            while True:
+                if cancelled and cancelled():
+                    raise InterruptedError
+                chunk = fin.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                fout.write(chunk)
+                done += len(chunk)
+                if progress:
+                    progress(done)
+            fout.flush()
+            os.fsync(fout.fileno())
+        os.chmod(tmp, stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH)
+        replace_file(tmp, target)
+    except BaseException as e:
+        try:
+            os.chmod(tmp, stat.S_IWRITE | stat.S_IREAD)
+            os.remove(tmp)
+        except OSError:
+            pass
+        if isinstance(e, InterruptedError):
+            return None
+        raise
+    fsync_dir(folder)
+    return target, False
+
+
+def register(outputs_folder, product, record):
+    """
+    Thêm version mới cho product trong index (giữ file_lock trong lúc đọc - sửa - ghi, ghi atomic:
+    "latest" chỉ đổi khi record đã nằm trong index). Nội dung trùng bản latest → không tạo version.
+    Trả về (version, True nếu là version mới).
+    """
+    path = index_path(outputs_folder)
+    os.makedirs(outputs_folder, exist_ok=True)
+    with file_lock(path + ".lock"):
+        data = load_index(outputs_folder)
+        info = data["products"].setdefault(product, {"latest": 0, "versions": {}})
+        latest = info["versions"].get(str(info["latest"]))
+        if latest and latest.get("hash") == record["hash"]:
+            return info["latest"], False
+        version = max([0] + [int(v) for v in info["versions"]]) + 1
+        info["versions"][str(version)] = record
+        info["latest"] = version
+        write_json_atomic(path, data, indent=None)
+    return version, True
+
+
+def publish_file(project_root, outputs_folder, src, product, context, progress=None, cancelled=None):
+    """
+    Hash → lưu object (dedupe) → ghi version vào index.
+    context: stage / user / source (file scene publish ra). progress(phase, bytes, tổng).
+    Trả về dict kết quả hoặc None nếu bị hủy.
+    """
+    size = os.path.getsize(src)
+    digest = hash_file(src, lambda n: progress and progress("hash", n, size), cancelled)
+    if digest is None:
+        return None
+    stored = store_object(project_root, src, digest, size,
+                          lambda n: progress and progress("copy", n, size), cancelled)
+    if stored is None:
+        return None
+    target, deduped = stored
+    record = {
+        "hash":    digest,
+        "size":    size,
+        "ext":     os.path.splitext(src)[1].lower(),
+        "object":  os.path.relpath(target, project_root).replace("\\", "/"),
+        "file":    os.path.basename(src),
+        "source":  context.get("source", ""),
+        "stage":   context.get("stage", ""),
+        "user":    context.get("user", ""),
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M"),
+    }
+    version, new = register(outputs_folder, product, record)
+    return {"product": product, "version": version, "new": new, "deduped": deduped, "size": size}
+
+
+# ---------- Job ----------
+
+def publish_files(job, project_root, outputs_folder, items, context):
+    """
+    Job (jobs.submit): publish lần lượt các file. items: list (src, product).
+    Bị hủy: file đang publish dừng giữa chừng, file chưa publish báo lỗi "Đã hủy"; GUI vẫn nhận
+    các version đã ghi. Trả về (list kết quả, list (file, lỗi)).
+    """
+    results, errors = [], []
+    for i, (src, product) in enumerate(items):
+        if job.cancelled:
+            errors.append((src, "Đã hủy"))
+            continue
+
+        def progress(phase, done, total, i=i, name=os.path.basename(src)):
+            part = done / total if total else 1.0
+            # hash và copy mỗi bước tính nửa tiến độ của file
+            overall = i + (0.5 + part / 2 if phase == "copy" else part / 2)
+            label = "Hashing" if phase == "hash" else "Copying"
+            job.report(100 * overall / len(items), f"{label} {name}")
+
+        try:
+            result = publish_file(project_root, outputs_folder, src, product, context,
+                                  progress, lambda: job.cancelled)
+        except (OSError, TimeoutError) as e:
+            errors.append((src, str(e)))
+            continue
+        if result is None:
+            errors.append((src, "Đã hủy"))
+        else:
+            results.append(result)
+    return results, errors
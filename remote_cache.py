@@ -0,0 +1,375 @@
+# remote_cache.py
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QThread, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+
+from persist import write_json_atomic
+from settings import settings
+
+BASE_DIR   = os.path.dirname(__file__)
+CACHE_DIR  = os.path.join(BASE_DIR, "data", "cache", "remote")
+INDEX_FILE = os.path.join(CACHE_DIR, "index.json")
+FILES_DIR  = os.path.join(CACHE_DIR, "files")
+
+# Trong khoảng này (giây) dùng bản mirror mà không hỏi Drive; quá hạn thì vẫn trả bản cũ
+# ngay và kiểm tra lại ở thread nền (stale-while-revalidate).
+REMOTE_TTL = 30
+# Gom các lần đổi index thành một lần ghi
+FLUSH_DELAY_MS = 2000
+
+KINDS = ("dirs", "json", "files")
+
+
+def _norm(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _under(path, root):
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+# ---------- Đọc từ Drive (chạy được ở thread nền, không đụng Qt) ----------
+
+def _fetch_dirs(path, known=None):
+    """
+    Listing của folder: {"mtime", "entries": [[name, is_dir], ...]}.
+    known = record cũ: mtime folder không đổi thì chỉ trả {"mtime", "same": True} (một lần stat).
+    """
+    st = os.stat(path)
+    if known and known.get("mtime") == st.st_mtime and "entries" in known:
+        return {"mtime": st.st_mtime, "same": True}
+    with os.scandir(path) as it:
+        entries = sorted([e.name, e.is_dir()] for e in it)
+    return {"mtime": st.st_mtime, "entries": entries}
+
+
+def _fetch_json(path, known=None):
+    st = os.stat(path)
+    if known and known.get("mtime") == st.st_mtime and known.get("size") == st.st_size:
+        return {"mtime": st.st_mtime, "size": st.st_size, "same": True}
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except ValueError:
+            data = None
+    return {"mtime": st.st_mtime, "size": st.st_size, "data": data}
+
+
+def _fetch_files(path, known=None):
+    """
+    Copy file (thumbnail) về FILES_DIR; tên bản copy gồm mtime + size nên file đổi là bản copy mới.
+    """
+    st = os.stat(path)
+    if (known and known.get("mtime") == st.st_mtime and known.get("size") == st.st_size
+            and os.path.exists(known.get("local", ""))):
+        return {"mtime": st.st_mtime, "size": st.st_size, "local": known["local"], "same": True}
+    key = hashlib.sha1(f"{_norm(path)}|{st.st_mtime}|{st.st_size}".encode("utf-8")).hexdigest()
+    local = os.path.join(FILES_DIR, key[:2], key + os.path.splitext(path)[1].lower())
+    if not os.path.exists(local):
+        os.makedirs(os.path.dirname(local), exist_ok=True)
+        tmp = f"{local}.{os.getpid()}.tmp"
+        shutil.copyfile(path, tmp)
+        os.replace(tmp, local)
+    return {"mtime": st.st_mtime, "size": st.st_size, "local": local}
+
+
+_FETCH = {"dirs": _fetch_dirs, "json": _fetch_json, "files": _fetch_files}
+
+
+def fetch(kind, path, known, root):
+    """
+    Đọc một record từ Drive. Trả về None nếu Drive không truy cập được (offline):
+    file / folder không tồn tại trong khi root vẫn có → record {"missing": True}.
+    """
+    try:
+        return _FETCH[kind](path, known)
+    except FileNotFoundError:
+        if root and not os.path.isdir(root):
+            return None
+        return {"missing": True}
+    except OSError:
+        return None
+
+
+_pool = None
+
+
+def remote_pool():
+    """
+    QThreadPool riêng cho RevalidateWorker. Việc chủ yếu là chờ mạng nên cho vài thread.
+    """
+    global _pool
+    if _pool is None:
+        _pool = QThreadPool()
+        _pool.setMaxThreadCount(4)
+    return _pool
+
+
+class RevalidateSignals(QObject):
+    # (kind, path, record mới hoặc None nếu offline)
+    result = pyqtSignal(str, str, object)
+    finished = pyqtSignal()
+
+
+class RevalidateWorker(QRunnable):
+    """
+    Kiểm tra lại các record đã quá REMOTE_TTL. jobs: list (kind, path, record cũ, root).
+    """
+
+    def __init__(self, jobs):
+        super().__init__()
+        self.jobs = jobs
+        self.signals = RevalidateSignals()
+
+    def run(self):
+        for kind, path, known, root in self.jobs:
+            self.signals.result.emit(kind, path, fetch(kind, path, known, root))
+        self.signals.finished.emit()
+
+
+class RemoteCache(QObject):
+    """
+    Mirror local (data/cache/remote) của listing folder, file JSON metadata và thumbnail
+    nằm trên Drive (settings "drive_root"). Path ngoài Drive được đọc thẳng, không cache.
+    - Record còn trong REMOTE_TTL → trả luôn, không I/O mạng.
+    - Quá hạn → trả bản cũ ngay, kiểm tra lại ở thread nền (stat mtime trước, đổi mới đọc lại);
+      nội dung khác thì cập nhật và emit changed(path) để tab đang hiển thị nạp lại.
+    - Drive mất kết nối → tiếp tục dùng bản mirror (offline).
+    - listdir / isdir / exists / read_json / local_file gọi được từ thread nền (ví dụ IndexEnricher):
+      record được giữ dưới _lock, hẹn ghi index / kiểm tra lại được chuyển về GUI thread.
+    Code trong app ghi lên Drive thì gọi invalidate(path) trước khi nạp lại.
+    """
+    changed = pyqtSignal(str)
+    # Phát từ thread nền: GUI thread hẹn ghi index / chạy kiểm tra lại đang chờ
+    _wake = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.data = {kind: {} for kind in KINDS}
+        try:
+            with open(INDEX_FILE, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for kind in KINDS:
+                if isinstance(data.get(kind), dict):
+                    self.data[kind] = data[kind]
+        except Exception:
+            pass
+        self._dirty = False
+        self._queue = []
+        self._pending = set()
+        self._workers = []
+        self._roots = None
+        self._lock = threading.RLock()
+        self._wake.connect(self._on_wake)
+        settings().changed.connect(self._on_setting_changed)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(FLUSH_DELAY_MS)
+        self._timer.timeout.connect(self.flush)
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.flush)
+
+    # ---------- Path nào nằm trên Drive ----------
+
+    def _on_setting_changed(self, key, value):
+        if key in ("drive_root", "local_root"):
+            self._roots = None
+
+    def remote_root(self, path):
+        """
+        Root Drive chứa path, hoặc None nếu path là local (Drive trùng Local cũng coi là local).
+        """
+        if self._roots is None:
+            drive = settings().get("drive_root") or ""
+            local = settings().get("local_root") or ""
+            self._roots = [_norm(drive)] if drive and (not local or _norm(drive) != _norm(local)) else []
+        if not path or not self._roots:
+            return None
+        key = _norm(path)
+        return next((r for r in self._roots if _under(key, r)), None)
+
+    # ---------- Tra record ----------
+
+    def _lookup(self, kind, path):
+        root = self.remote_root(path)
+        if root is None:
+            return fetch(kind, path, None, None)
+        key = _norm(path)
+        with self._lock:
+            record = self.data[kind].get(key)
+        if record is None:
+            # Đọc Drive ngoài lock; hai thread cùng đọc một path thì bản sau ghi đè, vô hại
+            record = fetch(kind, path, None, root)
+            if record is None:
+                return None
+            self._store(kind, key, record)
+        elif time.time() - record.get("checked", 0) > REMOTE_TTL:
+            self._revalidate(kind, path, record, root)
+        return record
+
+    def _in_gui_thread(self):
+        return QThread.currentThread() is self.thread()
+
+    def _store(self, kind, key, record):
+        record.pop("same", None)
+        record["checked"] = time.time()
+        with self._lock:
+            self.data[kind][key] = record
+            self._dirty = True
+        if self._in_gui_thread():
+            self._timer.start()
+        else:
+            self._wake.emit()
+
+    def _on_wake(self):
+        if self._dirty:
+            self._timer.start()
+        if self._queue:
+            self._dispatch()
+
+    def listdir(self, path):
+        """
+        List (name, is_dir) đã sort theo tên; [] nếu folder không có / không đọc được.
+        """
+        record = self._lookup("dirs", path)
+        if not record or record.get("missing"):
+            return []
+        return [tuple(e) for e in record["entries"]]
+
+    def isdir(self, path):
+        if self.remote_root(path) is None:
+            return os.path.isdir(path)
+        record = self._lookup("dirs", path)
+        return bool(record) and not record.get("missing")
+
+    def exists(self, path):
+        """
+        File / folder có tồn tại không, trả lời từ listing của folder cha.
+        """
+        if self.remote_root(path) is None:
+            return os.path.exists(path)
+        name = os.path.basename(os.path.normpath(path))
+        return any(n == name for n, _ in self.listdir(os.path.dirname(os.path.normpath(path))))
+
+    def read_json(self, path, default=None):
+        record = self._lookup("json", path)
+        if not record or record.get("missing") or record.get("data") is None:
+            return default
+        return record["data"]
+
+    def local_file(self, path):
+        """
+        Path local để đọc file (thumbnail): bản mirror nếu path ở Drive, ngược lại chính path.
+        """
+        if not path or self.remote_root(path) is None:
+            return path
+        record = self._lookup("files", path)
+        if record and record.get("local") and os.path.exists(record["local"]):
+            return record["local"]
+        return path
+
+    def invalidate(self, path):
+        """
+        Bỏ mirror của path và listing folder cha (app vừa ghi / xóa trên Drive).
+        Folder cha có thể cũng vừa được tạo (ví dụ type asset mới): đi tiếp lên trên, bỏ listing
+        của từng cấp cho tới cấp đã có sẵn folder con trong listing (tối đa tới root Drive).
+        """
+        key = _norm(path)
+        root = self.remote_root(path)
+        with self._lock:
+            dropped = [self.data[kind].pop(key, None) for kind in KINDS]
+            dirs = self.data["dirs"]
+            child, parent = key, os.path.dirname(key)
+            while parent != child:
+                dropped.append(dirs.pop(parent, None))
+                if root is None or parent == root or not _under(parent, root):
+                    break
+                child, parent = parent, os.path.dirname(parent)
+                known = dirs.get(parent)
+                if known and any(os.path.normcase(n) == os.path.basename(child)
+                                 for n, _ in known.get("entries", ())):
+                    break
+            if any(r is not None for r in dropped):
+                self._dirty = True
+        if self._dirty:
+            self._timer.start()
+
+    # ---------- Kiểm tra lại ở nền ----------
+
+    def _revalidate(self, kind, path, record, root):
+        with self._lock:
+            if (kind, _norm(path)) in self._pending:
+                return
+            self._pending.add((kind, _norm(path)))
+            first = not self._queue
+            self._queue.append((kind, path, dict(record), root))
+        if not first:
+            return
+        if self._in_gui_thread():
+            QTimer.singleShot(0, self._dispatch)
+        else:
+            self._wake.emit()
+
+    def _dispatch(self):
+        with self._lock:
+            jobs, self._queue = self._queue, []
+        if not jobs:
+            return
+        worker = RevalidateWorker(jobs)
+        worker.setAutoDelete(False)
+        worker.signals.result.connect(self._on_result)
+        worker.signals.finished.connect(lambda w=worker: self._workers.remove(w))
+        self._workers.append(worker)
+        remote_pool().start(worker)
+
+    def _on_result(self, kind, path, record):
+        key = _norm(path)
+        with self._lock:
+            self._pending.discard((kind, key))
+            old = self.data[kind].get(key)
+        if record is None:
+            # Offline: giữ bản cũ, hẹn kiểm tra lại sau REMOTE_TTL
+            if old is not None:
+                old["checked"] = time.time()
+            return
+        if record.get("same") and old is not None:
+            old["checked"] = time.time()
+            return
+        same = old is not None and all(
+            old.get(f) == record.get(f) for f in ("missing", "entries", "data", "local")
+        )
+        self._store(kind, key, record)
+        if not same:
+            self.changed.emit(path)
+
+    def flush(self):
+        self._timer.stop()
+        with self._lock:
+            if not self._dirty:
+                return
+            # Chụp lại trong lock: thread nền có thể đang thêm record trong lúc ghi
+            snapshot = {kind: dict(records) for kind, records in self.data.items()}
+            self._dirty = False
+        try:
+            write_json_atomic(INDEX_FILE, snapshot, indent=None)
+        except OSError:
+            self._dirty = True
+
+
+_cache = None
+
+
+def remote_cache():
+    global _cache
+    if _cache is None:
+        _cache = RemoteCache()
+    return _cache
@@ -0,0 +1,240 @@
+# search_index.py
+
+import os
+import math
+import heapq
+import threading
+from collections import defaultdict, Counter
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from remote_cache import remote_cache
+
+# Trọng số theo field: khớp tên quan trọng hơn khớp user
+FIELD_WEIGHTS = {
+    "name":  4.0,
+    "type":  2.0,
+    "stage": 2.0,
+    "user":  1.0,
+}
+
+
+def _words(text):
+    return [w for w in text.lower().replace("_", " ").replace("-", " ").split() if w]
+
+
+def _trigrams(word):
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+class SearchIndex:
+    """
+    Index trong bộ nhớ cho tìm kiếm as-you-type trên asset/shot.
+    - Mỗi entity (key = đường dẫn folder) có các field: name, type, stage, user.
+    - Khớp theo thứ tự ưu tiên: trùng từ > prefix của từ > chuỗi con (trigram).
+      Chỉ khi không có kết quả nào mới dùng khớp mờ (>= 60% trigram, cho lỗi chính tả).
+    - Các bảng prefix/trigram là dict/set nên một lần tìm chỉ tốn vài phép
+      giao tập hợp, đủ nhanh cho hơn 10k entity trong một frame.
+    - search() trả về list (key, score) đã sắp xếp giảm dần theo score.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._fields = {}                    # key -> {field: [words]}
+        self._prefix = defaultdict(dict)     # prefix -> {key: weight lớn nhất}
+        self._exact = defaultdict(dict)      # word -> {key: weight lớn nhất}
+        self._trigram = defaultdict(dict)    # trigram -> {key: weight lớn nhất}
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __contains__(self, key):
+        return key in self._fields
+
+    def add(self, key, **fields):
+        """
+        Thêm hoặc cập nhật entity. Field có thể là str hoặc list[str] (ví dụ nhiều stage).
+        """
+        if key in self._fields:
+            self.remove(key)
+
+        words_by_field = {}
+        for field, value in fields.items():
+            if not value:
+                continue
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            words = []
+            for v in values:
+                words.extend(_words(str(v)))
+            if words:
+                words_by_field[field] = words
+        self._fields[key] = words_by_field
+
+        for field, words in words_by_field.items():
+            weight = FIELD_WEIGHTS.get(field, 1.0)
+            for w in words:
+                exact = self._exact[w]
+                if exact.get(key, 0) < weight:
+                    exact[key] = weight
+                for i in range(1, len(w) + 1):
+                    bucket = self._prefix[w[:i]]
+                    if bucket.get(key, 0) < weight:
+                        bucket[key] = weight
+                for tg in _trigrams(w):
+                    bucket = self._trigram[tg]
+                    if bucket.get(key, 0) < weight:
+                        bucket[key] = weight
+
+    def update(self, key, **fields):
+        """
+        Bổ sung field cho entity đã có (giữ nguyên các field cũ).
+        """
+        current = {f: " ".join(ws) for f, ws in self._fields.get(key, {}).items()}
+        current.update({f: v for f, v in fields.items() if v})
+        self.add(key, **current)
+
+    def remove(self, key):
+        words_by_field = self._fields.pop(key, None)
+        if not words_by_field:
+            return
+        for words in words_by_field.values():
+            for w in words:
+                self._exact[w].pop(key, None)
+                for i in range(1, len(w) + 1):
+                    self._prefix[w[:i]].pop(key, None)
+                for tg in _trigrams(w):
+                    self._trigram[tg].pop(key, None)
+
+    def _best_weight(self, key, predicate):
+        best = 0.0
+        for field, words in self._fields[key].items():
+            if any(predicate(w) for w in words):
+                best = max(best, FIELD_WEIGHTS.get(field, 1.0))
+        return best
+
+    def _token_scores(self, token, fuzzy):
+        # prefix (bao gồm cả trùng từ) → weight × 2, trùng nguyên từ → weight × 3
+        scores = {k: w * 2.0 for k, w in self._prefix.get(token, {}).items()}
+        for k, w in self._exact.get(token, {}).items():
+            scores[k] = max(scores[k], w * 3.0)
+
+        if len(token) < 3:
+            return scores
+
+        trigs = _trigrams(token)
+        postings = sorted((self._trigram.get(tg, {}) for tg in trigs), key=len)
+        if postings and postings[0]:
+            # Chuỗi con nằm giữa từ: phải có đủ mọi trigram, sau đó kiểm tra lại
+            for k in postings[0].keys() - scores.keys():
+                if all(k in p for p in postings[1:]):
+                    w = self._best_weight(k, lambda word: token in word)
+                    if w:
+                        scores[k] = w
+
+        if scores or not fuzzy:
+            return scores
+
+        # Khớp mờ: đếm trigram trùng; weight lấy thẳng từ posting (field có trigram đó),
+        # không duyệt lại field của từng ứng viên
+        hits = Counter()
+        for posting in postings:
+            hits.update(posting.keys())
+        need = max(1, math.ceil(len(trigs) * 0.6))
+        for k, n in hits.items():
+            if n >= need:
+                scores[k] = 0.5 * n / len(trigs) * max(p.get(k, 0) for p in postings)
+        return scores
+
+    def search(self, query, limit=None):
+        """
+        Mọi token trong query đều phải khớp (AND). Trả về [(key, score)] giảm dần.
+        """
+        tokens = _words(query)
+        if not tokens:
+            return []
+
+        result = None
+        for token in sorted(tokens, key=len, reverse=True):
+            cands = self._token_scores(token, fuzzy=True)
+            if result is None:
+                result = cands
+            else:
+                result = {k: score + cands[k] for k, score in result.items() if k in cands}
+            if not result:
+                return []
+
+        if limit:
+            return heapq.nsmallest(limit, result.items(), key=lambda kv: (-kv[1], kv[0]))
+        return sorted(result.items(), key=lambda kv: (-kv[1], kv[0]))
+
+
+def read_entity_search_fields(entity_dir, entity_name):
+    """
+    Đọc user/stage của một asset hoặc shot từ metadata JSON:
+    - <entity>/<entity>.json            → user, type
+    - <entity>/scenefiles/*.json        → stage (và user) của từng file .blend
+    Đọc qua remote_cache (entity trên Drive lấy từ bản mirror), gọi được từ thread nền.
+    """
+    cache = remote_cache()
+    fields = {}
+    users = set()
+    stages = []
+
+    meta = cache.read_json(os.path.join(entity_dir, f"{entity_name}.json"))
+    if isinstance(meta, dict):
+        if meta.get("type"):
+            fields["type"] = meta["type"]
+        if meta.get("user"):
+            users.add(meta["user"])
+
+    scene_dir = os.path.join(entity_dir, "scenefiles")
+    for fname, is_dir in cache.listdir(scene_dir):
+        if is_dir or not fname.lower().endswith(".json"):
+            continue
+        info = cache.read_json(os.path.join(scene_dir, fname))
+        if not isinstance(info, dict):
+            continue
+        if info.get("stage"):
+            stages.append(info["stage"])
+        if info.get("user"):
+            users.add(info["user"])
+
+    if users:
+        fields["user"] = sorted(users)
+    if stages:
+        fields["stage"] = stages
+    return fields
+
+
+class IndexEnricher(QObject):
+    """
+    Đọc metadata JSON cho toàn bộ entity ở thread nền, sau đó emit
+    finished(dict key -> fields) về GUI thread để cập nhật SearchIndex.
+    Mỗi lần start() tăng generation, kết quả của lần chạy cũ bị bỏ qua.
+    """
+
+    finished = pyqtSignal(int, dict)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.generation = 0
+
+    def start(self, entities):
+        """
+        entities: list (key, entity_dir, entity_name)
+        """
+        self.generation += 1
+        gen = self.generation
+        remote_cache()  # Tạo RemoteCache ở GUI thread trước khi thread nền dùng tới
+
+        def run():
+            out = {}
+            for key, entity_dir, entity_name in entities:
+                if gen != self.generation:
+                    return
+                out[key] = read_entity_search_fields(entity_dir, entity_name)
+            self.finished.emit(gen, out)
+
+        threading.Thread(target=run, daemon=True).start()
@@ -0,0 +1,177 @@
+# selection.py
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QKeySequence
+from PyQt5.QtWidgets import QShortcut
+
+
+class SelectionModel:
+    """
+    Tập card đang chọn của một tab, giữ trực tiếp (không quét self.cards):
+    mỗi thao tác chỉ gọi set_selected cho card đổi trạng thái.
+    - current: card thao tác gần nhất (Ctrl+E / Ctrl+C… và tab chi tiết dùng card này);
+    - anchor: điểm gốc cho Shift (chọn vùng).
+    order(): list card đang hiện theo thứ tự hiển thị, chỉ cần cho Shift / phím mũi tên.
+    on_current(card): gọi khi user (click / phím) đổi current sang một card đang được chọn.
+    """
+
+    def __init__(self, order, on_current=None):
+        self._order = order
+        self._on_current = on_current
+        self._selected = {}  # card -> None, dict giữ thứ tự chọn
+        self.anchor = None
+        self.current = None
+
+    def __len__(self):
+        return len(self._selected)
+
+    def __contains__(self, card):
+        return card in self._selected
+
+    def selected(self):
+        return list(self._selected)
+
+    def primary(self):
+        """
+        Card chính của vùng chọn: current nếu đang được chọn, không thì card chọn sau cùng.
+        """
+        if self.current in self._selected:
+            return self.current
+        return next(reversed(self._selected), None) if self._selected else None
+
+    def _set(self, card, on):
+        if on == (card in self._selected):
+            return
+        if on:
+            self._selected[card] = None
+        else:
+            del self._selected[card]
+        try:
+            card.set_selected(on)
+        except RuntimeError:
+            pass  # Card đã bị xoá ở phía C++
+
+    def _replace(self, cards):
+        keep = dict.fromkeys(cards)
+        for c in [c for c in self._selected if c not in keep]:
+            self._set(c, False)
+        for c in keep:
+            self._set(c, True)
+
+    def clear(self):
+        self._replace(())
+        self.anchor = self.current = None
+
+    def select_only(self, card):
+        """
+        Chọn riêng card (gọi từ code: chọn lại card gần nhất, card mới tạo…), không gọi on_current.
+        """
+        self._replace((card,))
+        self.anchor = self.current = card
+
+    def select_all(self):
+        order = self._order()
+        self._replace(order)
+        if order and self.current not in self._selected:
+            self.anchor = self.current = order[0]
+
+    def discard(self, card):
+        """
+        Card bị gỡ khỏi tab (xoá / build lại).
+        """
+        self._selected.pop(card, None)
+        if self.anchor is card:
+            self.anchor = None
+        if self.current is card:
+            self.current = None
+
+    def reset(self):
+        """
+        Toàn bộ card của tab bị huỷ: quên vùng chọn, không chạm vào widget.
+        """
+        self._selected.clear()
+        self.anchor = self.current = None
+
+    def _range(self, order, a, b):
+        try:
+            i, j = order.index(a), order.index(b)
+        except ValueError:
+            return [b]
+        return order[min(i, j):max(i, j) + 1]
+
+    def click(self, card, modifiers=Qt.NoModifier):
+        """
+        Click chuột: thường = chọn riêng; Ctrl = bật / tắt card; Shift = chọn vùng từ anchor
+        (Ctrl+Shift = thêm vùng vào vùng chọn hiện có).
+        """
+        if modifiers & Qt.ShiftModifier and self.anchor is not None:
+            cards = self._range(self._order(), self.anchor, card)
+            if modifiers & Qt.ControlModifier:
+                for c in cards:
+                    self._set(c, True)
+            else:
+                self._replace(cards)
+            self.current = card
+        elif modifiers & Qt.ControlModifier:
+            self._set(card, card not in self._selected)
+            self.anchor = self.current = card
+        else:
+            self.select_only(card)
+        if card in self._selected and self._on_current:
+            self._on_current(card)
+
+    def press(self, card):
+        """
+        Chuột phải: card chưa chọn thì chọn riêng card đó; đã nằm trong vùng chọn thì giữ nguyên
+        vùng chọn (menu thao tác trên cả nhóm).
+        """
+        if card not in self._selected:
+            self.select_only(card)
+        else:
+            self.current = card
+
+    def move(self, step, extend=False):
+        """
+        Phím mũi tên: dời current đi step card theo thứ tự hiển thị (chặn ở hai đầu).
+        extend (Shift) = chọn vùng từ anchor tới card mới. Trả về card mới hoặc None.
+        """
+        order = self._order()
+        if not order:
+            return None
+        if self.current in order:
+            index = max(0, min(len(order) - 1, order.index(self.current) + step))
+        else:
+            index = 0 if step > 0 else len(order) - 1
+        card = order[index]
+        if extend and self.anchor is not None:
+            self._replace(self._range(order, self.anchor, card))
+            self.current = card
+        else:
+            self.select_only(card)
+        if self._on_current:
+            self._on_current(card)
+        return card
+
+
+def is_shown(card):
+    """
+    Card không bị ẩn chủ động (card vừa thêm vào layout cũng isHidden() cho tới khi layout show).
+    """
+    return not (card.isHidden() and card.testAttribute(Qt.WA_WState_ExplicitShowHide))
+
+
+def add_navigation_shortcuts(widget, selection, columns=None):
+    """
+    Phím mũi tên (Shift+mũi tên = chọn vùng) và Ctrl+A cho tab chứa card, chỉ khi focus nằm
+    trong tab. columns(): số card mỗi hàng (Thumbnail View) cho Lên / Xuống; None = một cột.
+    """
+    def vertical(sign, extend):
+        return lambda: selection.move(sign * (columns() if columns else 1), extend)
+
+    for key, action in (("Up", vertical(-1, False)), ("Down", vertical(1, False)),
+                        ("Shift+Up", vertical(-1, True)), ("Shift+Down", vertical(1, True)),
+                        ("Left", lambda: selection.move(-1)), ("Right", lambda: selection.move(1)),
+                        ("Shift+Left", lambda: selection.move(-1, True)),
+                        ("Shift+Right", lambda: selection.move(1, True)),
+                        ("Ctrl+A", selection.select_all)):
+        QShortcut(QKeySequence(key), widget, activated=action, context=Qt.WidgetWithChildrenShortcut)
@@ -0,0 +1,125 @@
+# session_state.py
+
+import os
+import re
+import json
+
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtWidgets import QApplication
+
+from persist import write_json_atomic
+
+BASE_DIR    = os.path.dirname(__file__)
+SESSION_DIR = os.path.join(BASE_DIR, "data", "session")
+# Gom các thay đổi liên tiếp (duyệt asset bằng phím mũi tên) thành một lần ghi
+FLUSH_DELAY_MS = 2000
+
+# File "latest" cũ trên ổ dự án, chỉ còn đọc để chuyển sang session local lần đầu
+LEGACY_LATEST = {
+    "asset": ("latest_asset.json", "asset_path"),
+    "shot":  ("latest_shot.json", "shot_path"),
+}
+
+
+def _project_key(project_root):
+    return os.path.normcase(os.path.abspath(project_root)) if project_root else ""
+
+
+class SessionState(QObject):
+    """
+    Trạng thái phiên của một user, lưu local tại data/session/<user>.json (không lên ổ dự án):
+    lựa chọn gần nhất (asset / shot) và trạng thái UI theo từng project.
+    - set() chỉ sửa trong bộ nhớ rồi hẹn flush sau FLUSH_DELAY_MS (debounce);
+      giá trị không đổi thì không hẹn ghi.
+    - flush() khi thoát app (aboutToQuit / closeEvent) hoặc khi đổi user.
+    """
+
+    def __init__(self, username, parent=None):
+        super().__init__(parent)
+        self.username = username or ""
+        safe = re.sub(r"[^\w.-]", "_", self.username) or "default"
+        self.path = os.path.join(SESSION_DIR, f"{safe}.json")
+        self.data = {"projects": {}}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data.get("projects"), dict):
+                self.data = data
+        except Exception:
+            pass
+        self._dirty = False
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(FLUSH_DELAY_MS)
+        self._timer.timeout.connect(self.flush)
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.flush)
+
+    def _project(self, project_root, create=False):
+        key = _project_key(project_root)
+        projects = self.data["projects"]
+        if create:
+            return projects.setdefault(key, {})
+        return projects.get(key, {})
+
+    def get(self, project_root, key, default=None):
+        return self._project(project_root).get(key, default)
+
+    def set(self, project_root, key, value):
+        state = self._project(project_root, create=True)
+        if state.get(key) == value:
+            return
+        state[key] = value
+        self._dirty = True
+        self._timer.start()
+
+    def flush(self):
+        self._timer.stop()
+        if not self._dirty:
+            return
+        try:
+            write_json_atomic(self.path, self.data)
+            self._dirty = False
+        except OSError:
+            pass
+
+
+_session = None
+
+
+def open_session(username):
+    """
+    Mở session của username (flush session cũ nếu đổi user).
+    """
+    global _session
+    if _session is not None:
+        if _session.username == (username or ""):
+            return _session
+        _session.flush()
+    _session = SessionState(username)
+    return _session
+
+
+def session_state():
+    if _session is None:
+        return open_session("")
+    return _session
+
+
+def latest_selection(project_root, kind):
+    """
+    Asset / shot được chọn gần nhất trong project (kind: "asset" hoặc "shot").
+    Session local chưa có → đọc file latest_*.json cũ trên ổ dự án (chỉ đọc, không tạo folder).
+    """
+    key = f"latest_{kind}"
+    value = session_state().get(project_root, key)
+    if value is not None or not project_root:
+        return value or None
+    name, field = LEGACY_LATEST[kind]
+    try:
+        with open(os.path.join(project_root, "00_Pipeline", "data", name), "r", encoding="utf-8") as f:
+            return json.load(f).get(field) or None
+    except Exception:
+        return None
@@ -0,0 +1,102 @@
+# settings.py
+
+import os
+import json
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from persist import write_json_atomic
+
+BASE_DIR = os.path.dirname(__file__)
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+# key → (file trong data/, field trong file; None = cả file là giá trị)
+# Giữ nguyên tên / định dạng file cũ để bản cũ và bản mới đọc chung được.
+SETTING_FILES = {
+    "user":       ("latest_user.json", "last_user"),
+    "project":    ("latest_project.json", None),
+    "drive_root": ("latest_drive.json", "path"),
+    "local_root": ("latest_local.json", "path"),
+    "window":     ("window_settings.json", None),
+}
+
+
+class Settings(QObject):
+    """
+    Cài đặt local của app (user đăng nhập, project đang mở, thư mục Drive / Local, vị trí cửa sổ).
+    - Đọc từ data/*.json một lần khi khởi tạo, sau đó chỉ dùng bản trong bộ nhớ.
+    - set() ghi ngay (atomic, persist.write_json_atomic) và emit changed(key, value)
+      cho các widget đang cache giá trị.
+    """
+    changed = pyqtSignal(str, object)
+
+    def __init__(self, data_dir=DATA_DIR, parent=None):
+        super().__init__(parent)
+        self.data_dir = data_dir
+        self.values = {}
+        for key, (name, field) in SETTING_FILES.items():
+            try:
+                with open(os.path.join(data_dir, name), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception:
+                continue
+            value = data if field is None else (data.get(field) if isinstance(data, dict) else None)
+            if value is not None:
+                self.values[key] = value
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def set(self, key, value):
+        """
+        Đổi một cài đặt. Lỗi ghi file được raise cho caller (giá trị trong bộ nhớ vẫn đổi).
+        """
+        if self.values.get(key) == value:
+            return
+        self.values[key] = value
+        name, field = SETTING_FILES[key]
+        try:
+            write_json_atomic(os.path.join(self.data_dir, name), value if field is None else {field: value})
+        finally:
+            self.changed.emit(key, value)
+
+    def clear(self, key):
+        if key not in self.values:
+            return
+        del self.values[key]
+        try:
+            os.remove(os.path.join(self.data_dir, SETTING_FILES[key][0]))
+        except OSError:
+            pass
+        self.changed.emit(key, None)
+
+    # ---------- Truy cập nhanh ----------
+
+    def user(self):
+        return self.values.get("user") or ""
+
+    def project(self):
+        """Project đang mở (dict name / short / path / local_path) hoặc None nếu không hợp lệ."""
+        project = self.values.get("project")
+        if isinstance(project, dict) and all(k in project for k in ("name", "path")):
+            return project
+        return None
+
+    def project_path(self):
+        return (self.project() or {}).get("path", "")
+
+    def project_short(self):
+        return (self.project() or {}).get("short", "")
+
+
+_settings = None
+
+
+def settings():
+    """
+    Settings dùng chung cho cả app (đọc file lần đầu khi gọi).
+    """
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
@@ -1,25 +1,98 @@
 # shot.py
 
 import os
-import time
-import json
 import shutil
 from datetime import datetime
 
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QPushButton, QScrollArea,
-    QLabel, QShortcut, QMessageBox, QMenu, QSizePolicy, QApplication
+    QWidget, QVBoxLayout, QPushButton, QScrollArea, QLineEdit,
+    QLabel, QShortcut, QMessageBox, QMenu, QSizePolicy, QApplication, QInputDialog
 )
-from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtGui import QKeySequence, QPixmap, QFont
+from PyQt5.QtCore import Qt, pyqtSignal, QTimer
+from PyQt5.QtGui import QKeySequence, QFont
 
 from tab_presets import CustomItemWidget
+from search_index import SearchIndex, IndexEnricher
+from card_builder import CardBuilder
+from id_allocator import IdAllocator, AllocationError
+from persist import write_json_atomic
+from session_state import session_state, latest_selection
+from settings import settings
+from remote_cache import remote_cache
+from dependency_index import dependency_index, fill_dependency_menu
+from jobs import submit, remove_tree, save_thumbnails, DONE
+from thumb_cache import LEGACY_THUMB, entity_thumbnails
+from thumb_atlas import load_atlas, schedule_refresh
+from selection import SelectionModel, add_navigation_shortcuts, is_shown
 
 BASE_DIR         = os.path.dirname(__file__)
 THUMB_TEMPLATE   = os.path.join(BASE_DIR, "template", "thumbnail", "thumb_project.png")
 BLENDER_TEMPLATE = os.path.join(BASE_DIR, "template", "app", "blender_template.blend")
 
 
+def populate_shots(job, created, project_short, user_name, creator):
+    """
+    Chạy ở JobScheduler: tạo nội dung cho các folder shot vừa được cấp (list (shot_name, folder)).
+    Trả về list cảnh báo để GUI thread hiển thị.
+    """
+    warnings = []
+    for i, (shot_name, new_folder) in enumerate(created):
+        job.progress(100 * i / len(created), shot_name)
+        warnings.extend(populate_shot(shot_name, new_folder, project_short, user_name, creator))
+    return warnings
+
+
+SHOT_SUBFOLDERS = ("scenefiles", "outputs", "playblast", "textures")
+
+
+def populate_shot(shot_name, new_folder, project_short, user_name, creator):
+    """
+    Subfolders, JSON metadata chung, template .blend cho stage Animation và JSON riêng của file .blend.
+    """
+    for sub in SHOT_SUBFOLDERS:
+        try:
+            os.makedirs(os.path.join(new_folder, sub), exist_ok=True)
+        except Exception:
+            pass
+
+    # 1) Tạo JSON metadata chung cho shot
+    data = {
+        "name":    shot_name,
+        "user":    creator,
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M")
+    }
+    json_path = os.path.join(new_folder, f"{shot_name}.json")
+    try:
+        write_json_atomic(json_path, data, lock=True, indent=4)
+    except Exception:
+        pass
+
+    # 2) Copy template .blend vào scenefiles và tạo JSON kèm theo
+    if not (project_short and os.path.exists(BLENDER_TEMPLATE)):
+        return []
+    new_blend_name = f"{project_short}_{shot_name}_animation.blend"
+    dest_blend = os.path.join(new_folder, "scenefiles", new_blend_name)
+    try:
+        shutil.copy(BLENDER_TEMPLATE, dest_blend)
+    except Exception as e:
+        return [f"Không thể copy template .blend:\n{e}"]
+
+    name_no_ext = os.path.splitext(new_blend_name)[0]
+    json_per_file = os.path.join(new_folder, "scenefiles", f"{name_no_ext}.json")
+    metadata = {
+        "name":    shot_name,
+        "stage":   "Animation",
+        "user":    user_name,
+        "version": "001",
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M")
+    }
+    try:
+        write_json_atomic(json_per_file, metadata, lock=True, indent=4)
+    except Exception as e:
+        return [f"Không thể tạo JSON cho file .blend:\n{e}"]
+    return []
+
+
 class ShotItemWidget(CustomItemWidget):
     """
     Mở rộng CustomItemWidget để hiển thị mỗi Shot dưới dạng List View.
@@ -27,8 +100,10 @@ class ShotItemWidget(CustomItemWidget):
     - Khi click phải: hiện context menu với Open, Copy Path, Create Thumbnail, Delete shot.
     """
 
-    def __init__(self, title: str, image_path: str, shot_path: str, parent_tab=None):
-        super().__init__(title, image_path, text1="", text2="", text3="", parent_tab=parent_tab)
+    def __init__(self, title: str, image_path: str, shot_path: str, parent_tab=None, image_variants=None,
+                 atlas_region=None):
+        super().__init__(title, image_path, text1="", text2="", text3="", parent_tab=parent_tab,
+                         image_variants=image_variants, atlas_region=atlas_region)
         self.shot_path = shot_path
 
         # Chuyển sang List View và tùy chỉnh kích thước/căn lề icon
@@ -47,15 +122,9 @@ class ShotItemWidget(CustomItemWidget):
             icon_label.setFixedSize(70, 48)
             icon_label.setAlignment(Qt.AlignCenter)
 
-            orig_pix = icon_label.pixmap()
-            if orig_pix and not orig_pix.isNull():
-                scaled = orig_pix.scaled(
-                    icon_label.width(),
-                    icon_label.height(),
-                    Qt.KeepAspectRatio,
-                    Qt.SmoothTransformation
-                )
-                icon_label.setPixmap(scaled)
+            # Nạp lại icon, scale giữ tỉ lệ vừa khung mới
+            self.release_pixmaps("list")
+            self.load_pixmap("list")
 
             self.title_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
             self.title_label.setFont(QFont("Roboto", 9, QFont.Bold))
@@ -65,10 +134,8 @@ class ShotItemWidget(CustomItemWidget):
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton and self.parent_tab:
-            self.parent_tab.clear_selection()
-            self.set_selected(True)
-            self.parent_tab._write_latest_shot(self.shot_path)
-            self.parent_tab.shot_selected.emit(self.shot_path)
+            # Ctrl / Shift: chọn nhiều; card chính mới được mở ở các tab chi tiết (_on_current_card)
+            self.parent_tab.selection.click(self, event.modifiers())
             event.accept()
         else:
             super().mousePressEvent(event)
@@ -81,14 +148,23 @@ class ShotItemWidget(CustomItemWidget):
 
     def contextMenuEvent(self, event):
         if self.parent_tab:
-            self.parent_tab.clear_selection()
-        self.set_selected(True)
+            self.parent_tab.selection.press(self)
+        else:
+            self.set_selected(True)
 
         menu = QMenu(self)
         menu.addAction("Open in Explorer", self.open_folder)
         menu.addAction("Copy File Path", self.copy_path)
         menu.addAction("Create Thumbnail", self.create_thumbnail)
         menu.addAction("Delete", self.delete_folder)
+        if self.parent_tab and self.parent_tab.project_root:
+            # Asset được link trong shot này (index dependency, quét lại ở nền nếu cũ)
+            deps = dependency_index(self.parent_tab.project_root)
+            deps.refresh_if_stale()
+            assets = deps.uses(self.shot_path)
+            menu.addSeparator()
+            fill_dependency_menu(menu.addMenu(f"Assets ({len(assets)})"), assets,
+                                 deps.is_scanning(), self.parent_tab.entity_requested.emit)
         menu.exec_(event.globalPos())
 
     def open_folder(self):
@@ -110,32 +186,47 @@ class ShotItemWidget(CustomItemWidget):
         if confirm != QMessageBox.Yes:
             return
 
-        shutil.rmtree(self.shot_path)
-        if self.parent_tab and self in self.parent_tab.cards:
-            self.parent_tab.cards.remove(self)
-            self.parent_tab.container_layout.removeWidget(self)
-        self.setParent(None)
-        self.deleteLater()
+        # Xoá folder ở JobScheduler, chỉ bỏ card khi folder đã xoá xong;
+        # lỗi / bị hủy giữa chừng (folder có thể còn một phần) → nạp lại danh sách
+        tab, shot_path = self.parent_tab, self.shot_path
+
+        def on_done(_):
+            remote_cache().invalidate(shot_path)
+            if tab:
+                tab.remove_shot(shot_path)
+
+        def on_error(message):
+            QMessageBox.warning(tab, "Warning", f"Không thể xoá shot:\n{shot_path}\n{message}")
+
+        def on_finished(job):
+            if job.state != DONE:
+                remote_cache().invalidate(shot_path)
+                if tab:
+                    tab.load_shots()
+
+        submit(f"Delete shot {os.path.basename(shot_path)}", remove_tree, shot_path, retries=1,
+               on_done=on_done, on_error=on_error, on_finished=on_finished)
 
     def create_thumbnail(self):
         clipboard = QApplication.clipboard()
-        timeout = time.time() + 30
         img = clipboard.image()
 
         if img.isNull():
             QMessageBox.warning(self, "Warning", "Không lấy được ảnh từ Clipboard. Vui lòng thử lại.")
             return
 
-        thumb_path = os.path.join(self.shot_path, "thumbnail.png")
-        if not img.save(thumb_path, "PNG"):
-            QMessageBox.warning(self, "Warning", "Không thể lưu ảnh thumbnail.")
-            return
+        # Encode các cỡ (icon / card / preview) ở JobScheduler, không ghi ảnh full-size lên Drive
+        submit(f"Thumbnail shot {self.title}", save_thumbnails, self.shot_path, img,
+               on_done=self._on_thumbnail_saved,
+               on_error=lambda message: QMessageBox.warning(self, "Warning", "Không thể lưu ảnh thumbnail."))
 
-        list_widget = self.stack.widget(1)
-        icon_label = list_widget.findChildren(QLabel)[0]
-        pix = QPixmap(thumb_path)
-        pix = pix.scaled(100, 64, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        icon_label.setPixmap(pix)
+    def _on_thumbnail_saved(self, variants):
+        for path in list(variants.values()) + [os.path.join(self.shot_path, LEGACY_THUMB)]:
+            remote_cache().invalidate(path)
+        self.set_image_variants(variants)
+        # Chỉ cập nhật ô của shot này trong atlas của sequencer
+        if self.parent_tab:
+            self.parent_tab.refresh_atlas(only=[os.path.basename(self.shot_path)])
 
 
 class ShotTab(QWidget):
@@ -143,14 +234,17 @@ class ShotTab(QWidget):
     Tab quản lý Shot:
     - Lưu trữ tất cả shot trong <project_root>/03_Production/sequencer
     - Nút "Thêm Shot": tự động tăng dần số thứ tự (001, 002, …), tạo subfolders: scenefiles, outputs, playblast, textures.
+      Số shot cấp từ IdAllocator; chuột phải lên nút để tạo nhiều shot một lần.
     - Khi tạo shot mới:
         • Tạo <shot_folder>/<shot_name>.json metadata chung.
         • Copy template .blend vào <shot_folder>/scenefiles/<PROJECT_SHORT>_<SHOT_NAME>_animation.blend.
         • Tạo kèm file JSON metadata riêng cho file .blend vừa tạo.
-    - Mỗi lần chọn hoặc tạo mới, ghi latest_shot.json trong <project_root>/00_Pipeline/data.
+    - Mỗi lần chọn hoặc tạo mới, nhớ shot gần nhất trong session_state (local, ghi có debounce).
     """
 
     shot_selected = pyqtSignal(str)
+    # (kind, entity_path): mở entity khác (ví dụ chọn trong menu "Assets")
+    entity_requested = pyqtSignal(str, str)
 
     def __init__(self, project_root=None, username=None):
         super().__init__()
@@ -162,9 +256,26 @@ class ShotTab(QWidget):
         self.setFocusPolicy(Qt.StrongFocus)
         QShortcut(QKeySequence("Ctrl+Q"), self, activated=self._create_thumbnail_selected)
 
+        # Vùng chọn (click / Ctrl / Shift / phím mũi tên), xem selection.SelectionModel
+        self.selection = SelectionModel(self.visible_cards, self._on_current_card)
+        add_navigation_shortcuts(self, self.selection)
+
         main_layout = QVBoxLayout(self)
         self.setLayout(main_layout)
 
+        # Ô tìm kiếm: lọc shot theo tên/stage/user ngay khi gõ
+        self.search_index = SearchIndex()
+        self.index_enricher = IndexEnricher(self)
+        self.index_enricher.finished.connect(self._on_index_enriched)
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Tìm shot (tên, stage, user)...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.apply_filter)
+        self.search_edit.returnPressed.connect(self._select_best_match)
+        main_layout.addWidget(self.search_edit)
+        QShortcut(QKeySequence("Ctrl+F"), self, activated=self.search_edit.setFocus)
+
         self.scroll = QScrollArea()
         self.scroll.setWidgetResizable(True)
         main_layout.addWidget(self.scroll)
@@ -177,6 +288,9 @@ class ShotTab(QWidget):
 
         self.add_button = QPushButton("Thêm Shot")
         self.add_button.clicked.connect(self.add_shot)
+        # Chuột phải: tạo nhiều shot một lần (giữ một dải số liên tiếp)
+        self.add_button.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.add_button.customContextMenuRequested.connect(self._show_add_menu)
         main_layout.addWidget(self.add_button)
 
         # Thiết lập phím tắt
@@ -190,12 +304,31 @@ class ShotTab(QWidget):
         self.sc_copy  .activated.connect(self._copy_selected)
         self.sc_delete.activated.connect(self._delete_selected)
 
+        # Tạo card theo lát thời gian khi có nhiều shot
+        self.card_builder = CardBuilder(self)
+
         self._last_shot_path = None
         self._load_latest_shot()
 
+        # Mirror Drive phát hiện thay đổi (kiểm tra nền) → nạp lại, gom nhiều thay đổi thành một lần
+        self._reload_timer = QTimer(self)
+        self._reload_timer.setSingleShot(True)
+        self._reload_timer.setInterval(500)
+        self._reload_timer.timeout.connect(self.load_shots)
+        remote_cache().changed.connect(self._on_remote_changed)
+
         if self.project_root:
             self.load_shots()
 
+    def _on_remote_changed(self, path):
+        if self.project_root and os.path.normcase(path).startswith(os.path.normcase(self.get_shot_root())):
+            self._reload_timer.start()
+
+    def _show_add_menu(self, pos):
+        menu = QMenu(self)
+        menu.addAction("Thêm nhiều shot…", self.add_shots_dialog)
+        menu.exec_(self.add_button.mapToGlobal(pos))
+
     def get_shot_root(self) -> str:
         """
         Trả về thư mục chung chứa các shot: <project_root>/03_Production/sequencer.
@@ -204,193 +337,217 @@ class ShotTab(QWidget):
         os.makedirs(seq_folder, exist_ok=True)
         return seq_folder
 
-    def _get_pipeline_data_dir(self) -> str:
-        """
-        Trả về thư mục lưu trữ file latest_shot.json: <project_root>/00_Pipeline/data.
-        """
-        data_dir = os.path.join(self.project_root, "00_Pipeline", "data")
-        os.makedirs(data_dir, exist_ok=True)
-        return data_dir
-
     def _write_latest_shot(self, shot_path: str):
         """
-        Ghi đường dẫn shot hiện tại vào latest_shot.json (nếu khác với lần trước).
+        Nhớ shot hiện tại trong session_state (nếu khác với lần trước). Chỉ sửa trong bộ nhớ;
+        file session local được ghi gộp sau, không ghi lên ổ dự án.
         """
-        data_dir   = self._get_pipeline_data_dir()
-        latest_file = os.path.join(data_dir, "latest_shot.json")
-
         if self._last_shot_path == shot_path:
             return
-
-        try:
-            with open(latest_file, "w", encoding="utf-8") as f:
-                json.dump({"shot_path": shot_path}, f, ensure_ascii=False, indent=2)
-            self._last_shot_path = shot_path
-        except Exception:
-            pass
+        session_state().set(self.project_root, "latest_shot", shot_path)
+        self._last_shot_path = shot_path
 
     def _load_latest_shot(self):
         """
-        Đọc latest_shot.json (nếu có) để nhớ lần chọn shot gần nhất.
-        """
-        data_dir   = self._get_pipeline_data_dir()
-        latest_file = os.path.join(data_dir, "latest_shot.json")
-        if os.path.exists(latest_file):
-            try:
-                with open(latest_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                shot_path = data.get("shot_path", "")
-                if shot_path and os.path.isdir(shot_path):
-                    self._last_shot_path = shot_path
-                else:
-                    self._last_shot_path = None
-            except Exception:
-                self._last_shot_path = None
-        else:
-            self._last_shot_path = None
+        Lấy shot được chọn gần nhất (session_state) để chọn lại khi load.
+        """
+        shot_path = latest_selection(self.project_root, "shot")
+        self._last_shot_path = shot_path if shot_path and os.path.isdir(shot_path) else None
 
     def load_shots(self):
         """
         Load tất cả folder shot (tên là số) trong sequencer, mỗi folder tạo 1 ShotItemWidget.
         Nếu có latest_shot, chọn luôn.
         """
-        # Xóa layout cũ
+        # Hủy build cũ (nếu đang chạy dở) và xóa layout cũ
+        self.card_builder.cancel()
         while self.container_layout.count():
             item = self.container_layout.takeAt(0)
             w = item.widget()
             if w:
                 w.deleteLater()
         self.cards.clear()
+        self.selection.reset()
+        self.search_index.clear()
 
         shot_root = self.get_shot_root()
         shot_list = []
-        for name in os.listdir(shot_root):
-            full = os.path.join(shot_root, name)
-            if os.path.isdir(full) and name.isdigit():
-                shot_list.append((name, full))
+        for name, is_dir in remote_cache().listdir(shot_root):
+            if is_dir and name.isdigit():
+                shot_list.append((name, os.path.join(shot_root, name)))
         shot_list.sort(key=lambda x: int(x[0]))
 
+        first_batch = self.scroll.viewport().height() // 64 + 1
+        self.card_builder.start(
+            self._iter_cards(shot_list), on_done=self._on_shots_loaded, first_batch=first_batch
+        )
+
+    def _iter_cards(self, shot_list):
+        """
+        Generator: mỗi lần yield là đã tạo xong một ShotItemWidget.
+        Shot gần nhất được chọn lại ngay khi card của nó được tạo.
+        """
+        cache = remote_cache()
+        # Có atlas: mọi icon cắt từ một ảnh, không list / đọc file từng shot
+        atlas = load_atlas(self.project_root, self.get_shot_root())
+        self.refresh_atlas()
         for shot_name, shot_folder in shot_list:
-            self._add_card(shot_name, shot_folder)
+            if atlas is not None:
+                card = self._add_card(shot_name, shot_folder, atlas_region=atlas.get(shot_name))
+            else:
+                card = self._add_card(shot_name, shot_folder,
+                                      [n for n, d in cache.listdir(shot_folder) if not d])
+            if shot_folder == self._last_shot_path:
+                self.selection.select_only(card)
+                self.shot_selected.emit(self._last_shot_path)
+            yield card
+
+    def refresh_atlas(self, only=None):
+        """
+        Cập nhật atlas icon của sequencer ở nền (quét toàn bộ tối đa một lần mỗi RESCAN_AFTER,
+        only=[tên] cho shot vừa đổi thumbnail); atlas đổi thì card đã tạo cắt icon từ ảnh mới.
+        """
+        schedule_refresh(self.project_root, self.get_shot_root(), self._apply_atlas, only=only)
 
-        if self._last_shot_path:
-            for c in self.cards:
-                if c.shot_path == self._last_shot_path:
-                    c.set_selected(True)
-                    self.shot_selected.emit(self._last_shot_path)
-                    break
+    def _apply_atlas(self):
+        atlas = load_atlas(self.project_root, self.get_shot_root())
+        if atlas is None:
+            return
+        for card in self.cards:
+            card.set_atlas_region(atlas.get(os.path.basename(card.shot_path)))
+
+    def _on_shots_loaded(self):
+        # Đọc user/stage từ metadata JSON ở thread nền rồi bổ sung vào index
+        self.index_enricher.start([
+            (c.shot_path, c.shot_path, os.path.basename(c.shot_path)) for c in self.cards
+        ])
+        dependency_index(self.project_root).refresh_if_stale()
+        self.apply_filter(self.search_edit.text())
+
+    def _on_index_enriched(self, generation, fields_by_key):
+        if generation != self.index_enricher.generation:
+            return
+        for key, fields in fields_by_key.items():
+            if key in self.search_index and fields:
+                self.search_index.update(key, **fields)
+        if self.search_edit.text().strip():
+            self.apply_filter(self.search_edit.text())
+
+    def apply_filter(self, text):
+        """
+        Ẩn/hiện ShotItemWidget có sẵn theo kết quả tìm kiếm (không tạo lại widget).
+        """
+        text = text.strip()
+        matched = {k for k, _ in self.search_index.search(text)} if text else None
+        for c in self.cards:
+            visible = matched is None or c.shot_path in matched
+            if c.isHidden() == visible:
+                c.setVisible(visible)
+
+    def _select_best_match(self):
+        """
+        Enter trong ô tìm kiếm → chọn shot có điểm cao nhất.
+        """
+        ranked = self.search_index.search(self.search_edit.text(), limit=1)
+        if not ranked:
+            return
+        best = next((c for c in self.cards if c.shot_path == ranked[0][0]), None)
+        if best:
+            self.selection.select_only(best)
+            self._on_current_card(best)
 
     def add_shot(self):
         """
-        Tạo shot mới với tên tự động (tiếp theo 001,002,…):
-        - Tạo folder <shot_root>/<shot_name> và subfolders: scenefiles, outputs, playblast, textures.
-        - Tạo file JSON metadata chung: <shot_name>.json.
-        - Copy template .blend vào <shot_folder>/scenefiles/<PROJECT_SHORT>_<SHOT_NAME>_animation.blend và tạo kèm file JSON riêng.
-        - Thêm card vào UI, chọn mặc định, ghi latest_shot.json và emit signal.
+        Tạo một shot mới với số tự động (tiếp theo 001, 002, …), xem add_shots.
         """
-        shot_root = self.get_shot_root()
-        existing = [int(n) for n in os.listdir(shot_root) if n.isdigit()]
-        next_num = max(existing) + 1 if existing else 1
+        self.add_shots(1)
+
+    def add_shots_dialog(self):
+        count, ok = QInputDialog.getInt(self, "Thêm nhiều shot", "Số shot:", 10, 1, 500)
+        if ok:
+            self.add_shots(count)
 
-        shot_name  = f"{next_num:03d}"
-        new_folder = os.path.join(shot_root, shot_name)
+    def add_shots(self, count):
+        """
+        Tạo count shot mới:
+        - Số shot lấy từ IdAllocator (file counter dùng chung + lock trên ổ mạng), giữ nguyên
+          một dải cho cả lô; không listdir sequencer mỗi lần, hai người bấm cùng lúc không trùng số.
+        - Mỗi shot: folder <shot_root>/<shot_name> và subfolders scenefiles, outputs, playblast, textures,
+          file JSON metadata chung <shot_name>.json, template .blend
+          <PROJECT_SHORT>_<SHOT_NAME>_animation.blend kèm file JSON riêng (populate_shots, chạy ở JobScheduler).
+        - Thêm card vào UI, chọn shot cuối, nhớ shot cuối trong session và emit signal.
+        """
+        # Build nốt danh sách shot (nếu đang build dở) để card mới nằm cuối
+        self.card_builder.finish()
+
+        shot_root = self.get_shot_root()
+        allocator = IdAllocator(self.project_root, "shot", scan_root=shot_root)
         try:
-            os.makedirs(new_folder, exist_ok=False)
-        except Exception as e:
+            created = allocator.create_dirs(shot_root, count)
+        except AllocationError as e:
             QMessageBox.critical(self, "Lỗi", f"Không thể tạo folder shot mới:\n{e}")
             return
 
-        # Tạo subfolders
-        for sub in ["scenefiles", "outputs", "playblast", "textures"]:
-            try:
-                os.makedirs(os.path.join(new_folder, sub), exist_ok=True)
-            except Exception:
-                pass
-
-        # 1) Tạo JSON metadata chung cho shot
-        data = {
-            "name":    shot_name,
-            "user":    self.username or "",
-            "created": datetime.now().strftime("%Y-%m-%d %H:%M")
-        }
-        json_path = os.path.join(new_folder, f"{shot_name}.json")
-        try:
-            with open(json_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
-        except Exception:
-            pass
+        # project_short và user đăng nhập lấy từ Settings (đã nạp sẵn trong bộ nhớ)
+        project_short = settings().project_short()
+        user_name = settings().user() if self.project_root else ""
 
-        # 2) Copy template .blend vào scenefiles và tạo JSON kèm theo
-        #    Lấy project_short từ latest_project.json
-        project_short = ""
-        latest_proj_file = os.path.join(os.path.dirname(__file__), "data", "latest_project.json")
-        if os.path.exists(latest_proj_file):
-            try:
-                with open(latest_proj_file, "r", encoding="utf-8") as f:
-                    proj_data = json.load(f)
-                project_short = proj_data.get("short", "")
-            except Exception:
-                project_short = ""
-
-        if project_short and os.path.exists(BLENDER_TEMPLATE):
-            new_blend_name = f"{project_short}_{shot_name}_animation.blend"
-            dest_blend = os.path.join(new_folder, "scenefiles", new_blend_name)
-            try:
-                shutil.copy(BLENDER_TEMPLATE, dest_blend)
-            except Exception as e:
-                QMessageBox.warning(self, "Warning", f"Không thể copy template .blend:\n{e}")
-            else:
-                # Tạo JSON metadata riêng cho file .blend vừa tạo
-                name_no_ext = os.path.splitext(new_blend_name)[0]
-                json_per_file = os.path.join(new_folder, "scenefiles", f"{name_no_ext}.json")
-
-                # Lấy last_user từ latest_user.json
-                user_name = ""
-                if self.project_root:
-                    latest_user_file = os.path.join(BASE_DIR, "data", "latest_user.json")
-                    if os.path.exists(latest_user_file):
-                        try:
-                            with open(latest_user_file, "r", encoding="utf-8") as uf:
-                                udata = json.load(uf)
-                            user_name = udata.get("last_user", "")
-                        except Exception:
-                            user_name = ""
-
-                timestamp   = datetime.now().strftime("%Y-%m-%d %H:%M")
-                version_str = "001"
-
-                metadata = {
-                    "name":    shot_name,
-                    "stage":   "Animation",
-                    "user":    user_name,
-                    "version": version_str,
-                    "created": timestamp
-                }
-                try:
-                    with open(json_per_file, "w", encoding="utf-8") as jf:
-                        json.dump(metadata, jf, ensure_ascii=False, indent=4)
-                except Exception as e:
-                    QMessageBox.warning(self, "Warning", f"Không thể tạo JSON cho file .blend:\n{e}")
-
-        # 3) Thêm card mới vào UI và chọn nó
-        card = self._add_card(shot_name, new_folder)
-        self.clear_selection()
-        card.set_selected(True)
-
-        # 4) Ghi lại latest_shot và emit signal
-        self._write_latest_shot(new_folder)
-        self.shot_selected.emit(new_folder)
-
-    def _add_card(self, shot_name: str, shot_folder: str):
+        # Folder đã được cấp → thêm card ngay; nội dung (subfolders, JSON, template .blend) tạo ở JobScheduler
+        card = None
+        for shot_name, new_folder in created:
+            card = self._add_card(shot_name, new_folder)
+        if card is None:
+            return
+        submit(f"Create {len(created)} shot" if len(created) > 1 else f"Create shot {created[0][0]}",
+               populate_shots, created, project_short, user_name, self.username or "",
+               on_done=lambda warnings: self._on_shots_populated(created, warnings),
+               on_error=lambda message: self._on_shots_populated(created, [message]))
+
+        # Chọn shot cuối, ghi lại latest_shot và emit signal
+        self.selection.select_only(card)
+        self._on_current_card(card)
+
+    def _on_shots_populated(self, created, warnings):
+        for _, new_folder in created:
+            remote_cache().invalidate(new_folder)
+            for sub in SHOT_SUBFOLDERS:
+                remote_cache().invalidate(os.path.join(new_folder, sub))
+        if warnings:
+            # Lỗi thường giống nhau cho cả lô → chỉ hiện một lần
+            QMessageBox.warning(self, "Warning", "\n\n".join(dict.fromkeys(warnings)))
+        # Shot vừa tạo vẫn đang được chọn → mở lại để Scene / Product / Library thấy file template
+        card = self.get_selected_widget()
+        if card and card.shot_path in {folder for _, folder in created}:
+            self.shot_selected.emit(card.shot_path)
+
+    def _add_card(self, shot_name: str, shot_folder: str, file_names=(), atlas_region=None):
         """
         Tạo ShotItemWidget và thêm vào container_layout, lưu vào self.cards.
+        file_names: tên file trong folder shot (từ listing) để tìm thumbnail đã lưu.
+        atlas_region: icon List View cắt từ atlas của sequencer (thay cho file_names).
         """
-        thumb = THUMB_TEMPLATE if os.path.exists(THUMB_TEMPLATE) else ""
-        card = ShotItemWidget(shot_name, thumb, shot_folder, parent_tab=self)
+        variants, legacy = entity_thumbnails(shot_folder, file_names)
+        thumb = legacy or (THUMB_TEMPLATE if os.path.exists(THUMB_TEMPLATE) else "")
+        card = ShotItemWidget(shot_name, thumb, shot_folder, parent_tab=self, image_variants=variants,
+                              atlas_region=atlas_region)
         self.container_layout.addWidget(card)
         self.cards.append(card)
+        self.search_index.add(shot_folder, name=shot_name)
         return card
 
+    def remove_shot(self, shot_path):
+        """
+        Folder shot đã bị xoá: bỏ card và entry trong search index.
+        """
+        self.search_index.remove(shot_path)
+        card = next((c for c in self.cards if c.shot_path == shot_path), None)
+        if card is None:
+            return
+        self.cards.remove(card)
+        self.selection.discard(card)
+        card.setParent(None)
+        card.deleteLater()
+
     def clear_layout(self, layout):
         """
         Xóa toàn bộ widgets trong layout.
@@ -405,17 +562,30 @@ class ShotTab(QWidget):
         """
         Bỏ chọn toàn bộ ShotItemWidget hiện tại.
         """
-        for c in self.cards:
-            c.set_selected(False)
+        self.selection.clear()
 
     def get_selected_widget(self):
         """
-        Trả về widget đang được chọn (nếu có), ngược lại None.
+        Trả về widget chính của vùng chọn (nếu có), ngược lại None.
         """
-        for c in self.cards:
-            if c._selected:
-                return c
-        return None
+        return self.selection.primary()
+
+    def get_selected_widgets(self):
+        return self.selection.selected()
+
+    def visible_cards(self):
+        """
+        Card đang hiện (khớp ô tìm kiếm) theo thứ tự trên màn hình.
+        """
+        return [c for c in self.cards if is_shown(c)]
+
+    def _on_current_card(self, card):
+        """
+        User đổi card chính (click / phím mũi tên / Enter ở ô tìm kiếm): nhớ lại và mở ở các tab chi tiết.
+        """
+        self._write_latest_shot(card.shot_path)
+        self.shot_selected.emit(card.shot_path)
+        self.scroll.ensureWidgetVisible(card, 0, 0)
 
     def _open_selected(self):
         w = self.get_selected_widget()
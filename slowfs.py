@@ -0,0 +1,162 @@
+# slowfs.py
+
+import os
+import time
+import shutil
+import builtins
+import threading
+from collections import Counter
+
+# Độ trễ mặc định giống ổ SMB qua VPN / Wi-Fi văn phòng (ms mỗi round trip, MB/s đọc file)
+DEFAULT_LATENCY_MS = 5.0
+DEFAULT_BANDWIDTH_MBPS = 40.0
+
+
+class _SlowFile:
+    """
+    Bọc file object: read/readinto chờ theo số byte đọc được (băng thông giả lập).
+    """
+
+    def __init__(self, fs, f):
+        self._fs = fs
+        self._f = f
+
+    def read(self, *args):
+        data = self._f.read(*args)
+        self._fs._transfer(len(data))
+        return data
+
+    def readinto(self, buffer):
+        n = self._f.readinto(buffer)
+        self._fs._transfer(n or 0)
+        return n
+
+    def readline(self, *args):
+        data = self._f.readline(*args)
+        self._fs._transfer(len(data))
+        return data
+
+    def __iter__(self):
+        for line in self._f:
+            self._fs._transfer(len(line))
+            yield line
+
+    def __enter__(self):
+        self._f.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._f.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+
+class SlowFS:
+    """
+    Giả lập ổ mạng chậm cho benchmark, không cần FUSE: trong khối `with SlowFS(root):`
+    các lời gọi os.stat / lstat / listdir / scandir / path.exists|isdir|isfile / open
+    tới path nằm dưới root bị chờ latency_ms mỗi round trip; đọc file chờ thêm theo
+    bandwidth_mbps. Path ngoài root (cache local, template) không bị ảnh hưởng.
+    - time.sleep nhả GIL: nhiều thread đọc song song thì độ trễ chồng lên nhau như mạng thật.
+    - counts: số lần gọi theo loại thao tác, để so "bao nhiêu round trip" giữa hai bản code.
+    Giới hạn: đọc file từ phía C++ (QImageReader, QPixmap) không đi qua Python nên không bị trễ.
+    """
+
+    def __init__(self, root, latency_ms=DEFAULT_LATENCY_MS, bandwidth_mbps=DEFAULT_BANDWIDTH_MBPS):
+        self.roots = [os.path.normcase(os.path.abspath(r)) for r in
+                      ([root] if isinstance(root, (str, os.PathLike)) else root)]
+        self.latency = latency_ms / 1000.0
+        self.bandwidth = bandwidth_mbps * 1024 * 1024 if bandwidth_mbps else 0
+        self.counts = Counter()
+        self.bytes_read = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._saved = []
+
+    # ---------- Độ trễ ----------
+
+    def _is_remote(self, path):
+        try:
+            path = os.fspath(path)
+        except TypeError:
+            return False  # file descriptor
+        if isinstance(path, bytes):
+            path = os.fsdecode(path)
+        key = os.path.normcase(os.path.abspath(path))
+        return any(key == r or key.startswith(r.rstrip(os.sep) + os.sep) for r in self.roots)
+
+    def _round_trip(self, op, path):
+        # Không tính trùng khi một hàm bị patch gọi hàm bị patch khác (path.isdir → os.stat)
+        if getattr(self._local, "depth", 0) or not self._is_remote(path):
+            return False
+        with self._lock:
+            self.counts[op] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return True
+
+    def _transfer(self, nbytes):
+        with self._lock:
+            self.bytes_read += nbytes
+        if self.bandwidth and nbytes:
+            time.sleep(nbytes / self.bandwidth)
+
+    def _wrap(self, op, func):
+        fs = self
+
+        def wrapper(path, *args, **kwargs):
+            fs._round_trip(op, path)
+            fs._local.depth = getattr(fs._local, "depth", 0) + 1
+            try:
+                return func(path, *args, **kwargs)
+            finally:
+                fs._local.depth -= 1
+        wrapper.__wrapped__ = func
+        return wrapper
+
+    def _wrap_open(self, func):
+        fs = self
+
+        def slow_open(file, mode="r", *args, **kwargs):
+            remote = fs._round_trip("open", file)
+            f = func(file, mode, *args, **kwargs)
+            if remote and "r" in mode and "+" not in mode:
+                return _SlowFile(fs, f)
+            return f
+        slow_open.__wrapped__ = func
+        return slow_open
+
+    # ---------- Patch / bỏ patch ----------
+
+    def _patch(self, owner, name, value):
+        self._saved.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, value)
+
+    def __enter__(self):
+        for name in ("stat", "lstat", "listdir", "scandir"):
+            self._patch(os, name, self._wrap(name, getattr(os, name)))
+        for name in ("exists", "isdir", "isfile"):
+            self._patch(os.path, name, self._wrap(name, getattr(os.path, name)))
+        self._patch(builtins, "open", self._wrap_open(builtins.open))
+        # copyfile dùng sendfile (không qua read()) → tắt để tính băng thông khi copy
+        if hasattr(shutil, "_USE_CP_SENDFILE"):
+            self._patch(shutil, "_USE_CP_SENDFILE", False)
+        if hasattr(shutil, "_HAS_FCOPYFILE"):
+            self._patch(shutil, "_HAS_FCOPYFILE", False)
+        return self
+
+    def __exit__(self, *exc):
+        while self._saved:
+            owner, name, value = self._saved.pop()
+            setattr(owner, name, value)
+        return False
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+            self.bytes_read = 0
+
+    def summary(self):
+        ops = ", ".join(f"{k} {v}" for k, v in sorted(self.counts.items()))
+        return f"{sum(self.counts.values())} round trips ({ops or '-'}), {self.bytes_read / 1048576:.1f} MB read"
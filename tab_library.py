@@ -1,10 +1,35 @@
 # tab_library.py
 
 import os
-from PyQt5.QtGui import QPixmap, QImageReader, QPixmapCache
-from PyQt5.QtCore import QSize, Qt
-from PyQt5.QtWidgets import QLabel
+from PyQt5.QtGui import QPixmap, QPixmapCache
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QAction, QActionGroup
 from tab_presets import BaseCardTab, CustomItemWidget
+from texture_cache import (
+    TextureMetaCache, TextureMetaWorker, texture_pool, format_file_size, format_resolution
+)
+from texture_decoders import supported_extensions
+from thumb_cache import level_path, load_level
+from remote_cache import remote_cache
+
+# Mọi extension có decoder khả dụng (PNG/JPG/BMP/TGA/TIFF qua Qt, EXR qua OpenEXR, ...)
+TEXTURE_EXTS = supported_extensions()
+
+# (label, key) cho menu "Sort by"
+SORT_MODES = [
+    ("Name",       "name"),
+    ("Resolution", "resolution"),
+    ("File size",  "size"),
+]
+# (label, cạnh dài tối thiểu) cho menu "Min resolution"
+MIN_RESOLUTIONS = [
+    ("All",    0),
+    ("≥ 512",  512),
+    ("≥ 1K",   1024),
+    ("≥ 2K",   2048),
+    ("≥ 4K",   4096),
+]
+
 
 class LibraryTab(BaseCardTab):
     def __init__(self):
@@ -15,8 +40,17 @@ class LibraryTab(BaseCardTab):
         # Mặc định hiển thị Thumbnail View
         self.set_view_mode("thumbnail")
 
-        # Không gian tối đa dành cho mỗi thumbnail (width × height)
-        self.thumb_size = QSize(160, 160)
+        # Cache metadata (kích thước, kênh, bit depth, ...) theo folder + worker nền
+        self.meta_cache = None
+        self._workers = []
+        self._stats = {}            # path -> (name, mtime, size)
+        self._cards_by_path = {}    # path -> card đã tạo
+        self._pending = {}          # path -> (meta, pix) về trước khi card được tạo
+        self._queued = set()        # path đang chờ thumbnail (mức zoom hiện tại) ở worker
+        self._requests = []         # path cần tạo thumbnail, gom lại rồi tạo một worker
+
+        self.sort_key = "name"
+        self.min_resolution = 0
 
     def load_from(self, folder_path):
         """
@@ -25,129 +59,321 @@ class LibraryTab(BaseCardTab):
             self.library_tab.load_from(os.path.join(asset_path, "textures"))
         Chúng ta sẽ:
          1. Xóa toàn bộ cards cũ và widget cũ trong thumb_container + list_layout
-         2. Duyệt qua từng file ảnh trong folder_path
-         3. Với mỗi file, tạo thumbnail giữ tỉ lệ, canh giữa trong QPixmap 180×180
-            bằng QImageReader + tính toán tỉ lệ, hoặc lấy từ QPixmapCache nếu đã có
-         4. Tạo CustomItemWidget và gán thumbnail vào QLabel nằm giữa item
-         5. Cuối cùng gọi self.relayout() để BaseCardTab tự sắp xếp grid Thumbnail
+         2. Duyệt folder một lần (scandir) để lấy tên, mtime, size của từng ảnh
+         3. Lấy metadata từ TextureMetaCache (khớp mtime + size → không mở file);
+            file chưa có metadata hoặc chưa có thumbnail pyramid trên đĩa được
+            đưa vào TextureMetaWorker chạy ở QThreadPool
+         4. Tạo CustomItemWidget theo lát thời gian (CardBuilder); label/thumbnail
+            được điền ngay khi worker trả kết quả
+         5. Chọn folder khác giữa chừng sẽ hủy build cũ và worker cũ
         """
 
         full_folder = folder_path
         self.current_folder = full_folder
         self.folder_path = full_folder
 
-        # 1) Xóa cards cũ và gỡ toàn bộ widget cũ trong thumb_container lẫn list_layout
-        self.cards.clear()
-        # thumb_container là QWidget chứa FlowLayout cho thumbnail
-        grid_layout = self.thumb_container.layout()
-        while grid_layout and grid_layout.count():
-            it = grid_layout.takeAt(0)
-            w = it.widget()
-            if w:
-                w.setParent(None)
-
-        # list_layout là QVBoxLayout dùng cho chế độ list view
-        list_layout = self.list_layout
-        while list_layout.count():
-            it = list_layout.takeAt(0)
-            w = it.widget()
-            if w:
-                w.setParent(None)
+        # 1) Hủy build/worker cũ, xóa cards cũ và widget trong grid + list
+        self.clear_cards()
+        self._cancel_workers()
+        self._stats = {}
+        self._cards_by_path = {}
+        self._pending = {}
+        self.meta_cache = None
 
         # 2) Nếu folder không tồn tại hoặc không phải thư mục, để thumbnail grid trống
         if not full_folder or not os.path.isdir(full_folder):
             self.relayout()
             return
 
-        # 3) Duyệt tất cả file ảnh trong thư mục
-        exts = {'.png', '.jpg', '.jpeg', '.bmp'}
-        for fname in sorted(os.listdir(full_folder)):
-            full = os.path.join(full_folder, fname)
-            if not os.path.isfile(full):
-                continue
-            ext = os.path.splitext(fname)[1].lower()
-            if ext not in exts:
-                continue
+        try:
+            entries = sorted(
+                (e for e in os.scandir(full_folder)
+                 if e.is_file() and os.path.splitext(e.name)[1].lower() in TEXTURE_EXTS),
+                key=lambda e: e.name
+            )
+        except OSError:
+            entries = []
+
+        # 3) Đối chiếu cache, gom các file cần đọc ở thread nền
+        self.meta_cache = TextureMetaCache(full_folder)
+        jobs = []
+        files = []
+        for entry in entries:
+            st = entry.stat()
+            self._stats[entry.path] = (entry.name, st.st_mtime, st.st_size)
+            files.append(entry.path)
+            meta = self.meta_cache.get(entry.name, st.st_mtime, st.st_size)
+            need_thumb = (QPixmapCache.find(self._thumb_key(entry.path)) is None and not os.path.exists(
+                level_path(entry.path, st.st_mtime, st.st_size, self.thumb_level)))
+            if meta is None or need_thumb:
+                jobs.append({"path": entry.path, "size": st.st_size, "mtime": st.st_mtime,
+                             "meta": meta, "need_thumb": need_thumb})
+        self.meta_cache.prune([e.name for e in entries])
+
+        if jobs:
+            self._start_worker(jobs)
+        else:
+            self.meta_cache.save()
+
+        # 4) Tạo card theo lát thời gian: card trong viewport hiện trước
+        self.build_cards(self._iter_cards(files), on_done=self.apply_sort_filter)
+
+    def _iter_cards(self, files):
+        """
+        Generator: mỗi lần yield là đã tạo xong và thêm một card vào layout.
+        Không mở file ảnh nào ở đây: metadata lấy từ cache, thumbnail từ QPixmapCache;
+        card ngoài viewport được nạp thumbnail sau (update_resident_pixmaps).
+        """
+        for full in files:
+            fname, mtime, size = self._stats[full]
+            meta = self.meta_cache.get(fname, mtime, size)
 
-            # 3.1) Lấy metadata để hiển thị
             title = os.path.splitext(fname)[0]
-            text1 = ext.lstrip('.')  # ví dụ "png"
-            # Đọc kích thước gốc của ảnh (chỉ header)
-            reader_info = QImageReader(full)
-            reader_info.setAutoTransform(True)
-            size = reader_info.size()
-            if size.isValid():
-                text2 = f"{size.width()}×{size.height()}"
-            else:
-                text2 = ""
-            size_kb = os.path.getsize(full) / 1024
-            if size_kb < 1024:
-                text3 = f"{size_kb:.1f} KB"
-            else:
-                text3 = f"{(size_kb/1024):.1f} MB"
-
-            # 3.2) Tạo hoặc lấy thumbnail từ QPixmapCache
-            cache_key = f"thumb::{full}"
-            pix = QPixmapCache.find(cache_key)
-            if pix is None or pix.isNull():
-                # Đọc ảnh gốc, tính tỉ lệ để scale sao cho tối đa bằng thumb_size
-                reader = QImageReader(full)
-                reader.setAutoTransform(True)
-
-                orig_size = reader.size()
-                if orig_size.isValid() and (orig_size.width() > 0 and orig_size.height() > 0):
-                    ow, oh = orig_size.width(), orig_size.height()
-                    tw, th = self.thumb_size.width(), self.thumb_size.height()
-
-                    if ow > oh:
-                        # Chiều ngang gốc lớn hơn, scale theo chiều ngang
-                        new_w = tw
-                        new_h = int(oh * (tw / ow))
-                    else:
-                        # Chiều dọc gốc >= chiều ngang, scale theo chiều dọc
-                        new_h = th
-                        new_w = int(ow * (th / oh))
-
-                    # Đảm bảo không vượt quá thumb_size
-                    new_w = min(new_w, tw)
-                    new_h = min(new_h, th)
-                    reader.setScaledSize(QSize(new_w, new_h))
-                else:
-                    # Nếu không đọc được size gốc hoặc kích thước không hợp lệ, scale mặc định
-                    reader.setScaledSize(self.thumb_size)
-
-                image = reader.read()
-                if not image.isNull():
-                    pix = QPixmap.fromImage(image)
-                else:
-                    pix = QPixmap()
-
-                # Lưu vào cache (nếu pix không rỗng)
-                if not pix.isNull():
-                    QPixmapCache.insert(cache_key, pix)
-
-            # 3.3) Tạo CustomItemWidget (thumbnail mode) nhưng ban đầu để image_path = ""
-            card = CustomItemWidget(title, "", text1, text2, text3, parent_tab=self)
+            text1 = os.path.splitext(fname)[1].lower().lstrip('.')  # ví dụ "png"
+            text2 = format_resolution(meta) or "…"
+            text3 = format_file_size(size)
+
+            # Tạo CustomItemWidget (thumbnail mode) với image_path = "" rồi gán pixmap sau
+            card = CustomItemWidget(title, "", text1, text2, text3, parent_tab=self,
+                                    thumb_size=self.thumb_level)
             card.file_path = full
+            card.meta = meta
+            card.file_size = size
+
+            card.filtered = False
+
+            self._cards_by_path[full] = card
+            self.append_card(card)
+            self._update_filtered(card)
+
+            pix = QPixmapCache.find(self._thumb_key(full))
+            if pix is not None and not pix.isNull():
+                self._set_card_pixmap(card, pix)
+
+            pending = self._pending.pop(full, None)
+            if pending:
+                self._apply_result(card, *pending)
+            yield card
+
+    def _add_imported_card(self, path, folder):
+        """
+        File kéo thả vào đã copy xong: tạo card cùng đường với load_from (metadata + thumbnail
+        ở worker, nên EXR / TGA / TIFF float cũng có preview), chọn card đó.
+        """
+        remote_cache().invalidate(path)
+        if folder != self.current_folder or self.meta_cache is None:
+            return
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        self._stats[path] = (os.path.basename(path), st.st_mtime, st.st_size)
+        self._start_worker([{"path": path, "size": st.st_size, "mtime": st.st_mtime,
+                             "meta": None, "need_thumb": True}])
+        # _iter_cards đã đưa card vào layout của view hiện tại; relayout() chỉ dành cho Thumbnail View
+        for card in self._iter_cards([path]):
+            self.selection.select_only(card)
+        if self.view_mode != "list":
+            self.relayout()
+
+    def _thumb_key(self, path, level=None):
+        return f"thumb::{level or self.thumb_level}::{path}"
+
+    def _start_worker(self, jobs):
+        worker = TextureMetaWorker(self.current_folder, jobs, self.thumb_level)
+        worker.setAutoDelete(False)
+        worker.signals.result.connect(self._on_meta_result)
+        worker.signals.finished.connect(self._on_meta_finished)
+        self._workers.append(worker)
+        self._queued.update(job["path"] for job in jobs if job["need_thumb"])
+        texture_pool().start(worker)
+
+    def _cancel_workers(self):
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+        self._queued = set()
+        self._requests = []
+
+    def _request_thumb(self, path):
+        """
+        Card tới gần viewport nhưng chưa có thumbnail trên đĩa: gom lại để tạo trong một worker.
+        """
+        if not self._requests:
+            QTimer.singleShot(0, self._flush_requests)
+        self._requests.append(path)
+        self._queued.add(path)
+
+    def _flush_requests(self):
+        paths, self._requests = self._requests, []
+        jobs = []
+        for path in paths:
+            if path not in self._stats:
+                continue
+            name, mtime, size = self._stats[path]
+            jobs.append({"path": path, "size": size, "mtime": mtime,
+                         "meta": self.meta_cache.get(name, mtime, size), "need_thumb": True})
+        if jobs:
+            self._start_worker(jobs)
+
+    def card_pixmap(self, card):
+        """
+        Nạp lại thumbnail cho card quay về gần viewport: QPixmapCache → pyramid trên đĩa
+        → (chưa có) yêu cầu worker tạo. Không decode ảnh gốc ở GUI thread.
+        """
+        path = card.file_path
+        pix = QPixmapCache.find(self._thumb_key(path))
+        if pix is None and path in self._stats:
+            _, mtime, size = self._stats[path]
+            image = load_level(path, mtime, size, self.thumb_level)
+            if image is not None:
+                pix = QPixmap.fromImage(image)
+                QPixmapCache.insert(self._thumb_key(path), pix)
+            elif path not in self._queued:
+                self._request_thumb(path)
+        return pix
+
+    def _set_card_pixmap(self, card, pix):
+        # Card ở xa viewport không giữ pixmap (PixmapBudget); thumbnail vẫn nằm trong cache
+        if self.near_viewport(card):
+            card.set_page_pixmap(card.view_mode, pix)
+
+    def _apply_result(self, card, meta, pix):
+        if meta is not None:
+            card.meta = meta
+            card.set_extra_text(1, format_resolution(meta))
+            if self._update_filtered(card):
+                self.grid.invalidate()
+        if pix is not None:
+            self._set_card_pixmap(card, pix)
+
+    def _on_meta_result(self, folder, path, meta, image, level):
+        """
+        Nhận kết quả từ TextureMetaWorker (GUI thread): lưu metadata vào cache,
+        chuyển QImage → QPixmap và đưa vào QPixmapCache theo mức thumbnail.
+        """
+        if folder != self.current_folder or path not in self._stats:
+            return
+        if meta is not None:
+            name, mtime, _ = self._stats[path]
+            meta = self.meta_cache.put(name, mtime, meta)
+        pix = None
+        if image is not None:
+            pix = QPixmap.fromImage(image)
+            QPixmapCache.insert(self._thumb_key(path, level), pix)
+            if level != self.thumb_level:
+                pix = None  # kết quả của mức zoom cũ
+            else:
+                self._queued.discard(path)
+
+        card = self._cards_by_path.get(path)
+        if card is None:
+            self._pending[path] = (meta, pix)
+        else:
+            self._apply_result(card, meta, pix)
+
+    def _on_meta_finished(self, folder):
+        if folder != self.current_folder or self.meta_cache is None:
+            return
+        self._workers = [w for w in self._workers if w.signals is not self.sender()]
+        if self._workers:
+            return
+        self.meta_cache.save()
+        if self.sort_key != "name" and not self.card_builder.is_running():
+            self.apply_sort_filter()
+
+    def on_cards_removed(self, cards):
+        for card in cards:
+            self._cards_by_path.pop(card.file_path, None)
+            self._stats.pop(card.file_path, None)
+
+    def on_zoom_changed(self, level):
+        """
+        Đổi mức zoom: thumbnail mức cũ đã được nhả (set_thumb_size); card gần viewport
+        được nạp mức mới từ QPixmapCache / pyramid trên đĩa ở update_resident_pixmaps
+        (không decode lại ảnh gốc). Worker cũ bị hủy, chỉ tạo lại job metadata còn thiếu.
+        """
+        if not self.current_folder or self.meta_cache is None:
+            return
+        self._cancel_workers()
+        jobs = []
+        for path, (name, mtime, size) in self._stats.items():
+            if self.meta_cache.get(name, mtime, size) is None:
+                jobs.append({"path": path, "size": size, "mtime": mtime, "meta": None, "need_thumb": False})
+        if jobs:
+            self._start_worker(jobs)
+
+    # ---------- Sort / filter theo độ phân giải ----------
+
+    def _passes_filter(self, card):
+        if not self.min_resolution:
+            return True
+        meta = getattr(card, "meta", None)
+        if not meta:
+            return True  # chưa biết kích thước → vẫn hiển thị
+        return max(meta.get("width", 0), meta.get("height", 0)) >= self.min_resolution
+
+    def _update_filtered(self, card):
+        """
+        Ẩn/hiện card theo bộ lọc; trả về True nếu trạng thái thay đổi.
+        (Không so với isHidden(): card vừa thêm vào layout vẫn ẩn cho tới khi layout show.)
+        """
+        filtered = not self._passes_filter(card)
+        if filtered == card.filtered:
+            return False
+        card.filtered = filtered
+        card.setVisible(not filtered)
+        return True
+
+    def _sort_value(self, card):
+        meta = getattr(card, "meta", None) or {}
+        if self.sort_key == "resolution":
+            return (-(meta.get("width", 0) * meta.get("height", 0)), card.title.lower())
+        if self.sort_key == "size":
+            return (-getattr(card, "file_size", 0), card.title.lower())
+        return (card.title.lower(),)
+
+    def apply_sort_filter(self):
+        """
+        Sắp xếp lại card có sẵn và ẩn card dưới độ phân giải tối thiểu (không tạo lại widget).
+        """
+        self.cards.sort(key=self._sort_value)
+        for card in self.cards:
+            self._update_filtered(card)
+        if self.view_mode == "list":
+            self.relayout_list()
+        else:
+            order = {id(c): i for i, c in enumerate(self.cards)}
+            self.grid.sortItems(lambda w: order.get(id(w), len(order)))
+
+    def set_sort_key(self, key):
+        self.sort_key = key
+        self.apply_sort_filter()
+
+    def set_min_resolution(self, value):
+        self.min_resolution = value
+        self.apply_sort_filter()
+
+    def extend_background_menu(self, menu):
+        menu.addSeparator()
+
+        sort_menu = menu.addMenu("Sort by")
+        grp = QActionGroup(sort_menu)
+        for label, key in SORT_MODES:
+            act = QAction(label, grp)
+            act.setCheckable(True)
+            act.setChecked(self.sort_key == key)
+            act.triggered.connect(lambda _, k=key: self.set_sort_key(k))
+            sort_menu.addAction(act)
 
-            # 3.4) Thay thế QLabel 'img' trong stacked widget index 0
-            #     Đảm bảo label canh giữa và chỉ hiển thị pix (với KeepAspectRatio)
-            thumb_widget = card.stack.widget(0)
-            img_labels = thumb_widget.findChildren(QLabel)
-            if img_labels:
-                img_label = img_labels[0]
-                img_label.setFixedSize(self.thumb_size)   # giữ nguyên vùng 180×180
-                img_label.setAlignment(Qt.AlignCenter)    # canh giữa
-                if not pix.isNull():
-                    img_label.setPixmap(pix)
-                else:
-                    img_label.clear()
-
-            # Thêm vào danh sách self.cards
-            self.cards.append(card)
-
-        # 4) Cuối cùng gọi relayout() để BaseCardTab tự sắp thumbnail grid
-        self.relayout()
+        res_menu = menu.addMenu("Min resolution")
+        grp2 = QActionGroup(res_menu)
+        for label, value in MIN_RESOLUTIONS:
+            act = QAction(label, grp2)
+            act.setCheckable(True)
+            act.setChecked(self.min_resolution == value)
+            act.triggered.connect(lambda _, v=value: self.set_min_resolution(v))
+            res_menu.addAction(act)
 
 
 def create_library_tab():
@@ -0,0 +1,518 @@
+# tab_playblast.py
+
+import os
+import re
+
+from PyQt5.QtWidgets import (
+    QWidget, QLabel, QVBoxLayout, QHBoxLayout, QComboBox, QPushButton, QSlider, QSizePolicy
+)
+from PyQt5.QtGui import QImageReader, QPixmap
+from PyQt5.QtCore import (
+    Qt, QObject, QRunnable, QThreadPool, QTimer, QElapsedTimer, QSize, pyqtSignal
+)
+
+from texture_decoders import (
+    supported_extensions, decode_preview, needs_process_pool, get_executor, preview_to_qimage
+)
+
+DEFAULT_FPS = 24
+# Ngưỡng bộ nhớ cho frame đã decode (ảnh đã scale vừa khung xem, không phải ảnh gốc)
+DEFAULT_CACHE_MB = 384
+# Số frame decode trước playhead và giữ lại sau playhead (để scrub lùi không decode lại)
+PREFETCH_AHEAD = 48
+KEEP_BEHIND = 12
+
+# Định dạng Qt đọc thẳng + mọi định dạng có decoder trong texture_decoders (EXR khi có OpenEXR, ...)
+SEQUENCE_EXTS = {".png", ".jpg", ".jpeg", ".tif", ".tiff", ".tga", ".bmp"} | supported_extensions()
+# Cạnh dài khi decode qua texture_decoders mà chưa biết kích thước khung xem
+FALLBACK_SIDE = 2048
+# name.1001.png / name_1001.png / name1001.png → (prefix, số frame, đuôi)
+_FRAME_RE = re.compile(r"^(.*?)(\d+)(\.[^.]+)$")
+
+
+class ImageSequence:
+    """
+    Một chuỗi ảnh đánh số: prefix + frame (padding cố định) + ext.
+    frames: list số frame đã sort, paths: đường dẫn tương ứng.
+    """
+
+    def __init__(self, folder, prefix, padding, ext, frames):
+        self.folder = folder
+        self.prefix = prefix
+        self.padding = padding
+        self.ext = ext
+        self.frames = sorted(frames)
+        self.paths = [
+            os.path.join(folder, f"{prefix}{str(frame).zfill(padding)}{ext}") for frame in self.frames
+        ]
+
+    @property
+    def first(self):
+        return self.frames[0]
+
+    @property
+    def last(self):
+        return self.frames[-1]
+
+    def label(self):
+        name = self.prefix.rstrip("._-") or "sequence"
+        return f"{name} [{self.first}-{self.last}] ({len(self.frames)} frames){self.ext}"
+
+    def missing(self):
+        """Số frame bị thiếu giữa first và last."""
+        return self.last - self.first + 1 - len(self.frames)
+
+
+def find_sequences(folder, min_frames=2):
+    """
+    Duyệt folder một lần, gom file ảnh đánh số thành ImageSequence.
+    Nhóm theo (prefix, độ dài số, ext); nhóm ít hơn min_frames file bị bỏ qua.
+    Trả về list sắp theo tên, chuỗi mới nhất (mtime file cuối) lên đầu.
+    """
+    groups = {}
+    stamps = {}
+    try:
+        entries = list(os.scandir(folder))
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.is_file():
+            continue
+        match = _FRAME_RE.match(entry.name)
+        if not match or match.group(3).lower() not in SEQUENCE_EXTS:
+            continue
+        prefix, digits, ext = match.groups()
+        key = (prefix, len(digits), ext)
+        groups.setdefault(key, []).append(int(digits))
+        try:
+            stamps[key] = max(stamps.get(key, 0), entry.stat().st_mtime)
+        except OSError:
+            pass
+
+    sequences = [
+        ImageSequence(folder, prefix, padding, ext, frames)
+        for (prefix, padding, ext), frames in groups.items() if len(frames) >= min_frames
+    ]
+    sequences.sort(key=lambda s: (-stamps.get((s.prefix, s.padding, s.ext), 0), s.prefix))
+    return sequences
+
+
+def image_bytes(image):
+    return image.bytesPerLine() * image.height()
+
+
+_pool = None
+
+
+def playblast_pool():
+    """
+    QThreadPool riêng cho decode frame (không chiếm pool thumbnail / global pool của Qt).
+    """
+    global _pool
+    if _pool is None:
+        _pool = QThreadPool()
+        _pool.setMaxThreadCount(max(2, min(4, QThreadPool.globalInstance().maxThreadCount() - 1)))
+    return _pool
+
+
+class FrameDecodeSignals(QObject):
+    # (generation, index, QImage hoặc None)
+    decoded = pyqtSignal(int, int, object)
+
+
+class FrameDecodeWorker(QRunnable):
+    """
+    Decode một frame, scale ngay khi đọc (QImageReader.setScaledSize) về kích thước khung xem
+    nên frame 4K chỉ tốn bộ nhớ cỡ ảnh hiển thị. Frame Qt không đọc được (EXR, TIFF float…)
+    đi qua registry texture_decoders; decoder nặng chạy ở process pool dùng chung.
+    """
+
+    def __init__(self, signals, generation, index, path, box):
+        super().__init__()
+        self.signals = signals
+        self.generation = generation
+        self.index = index
+        self.path = path
+        self.box = box
+
+    def run(self):
+        image = None
+        try:
+            reader = QImageReader(self.path)
+            if reader.canRead():
+                reader.setAutoTransform(True)
+                size = reader.size()
+                if size.isValid() and self.box.isValid() and (
+                        size.width() > self.box.width() or size.height() > self.box.height()):
+                    reader.setScaledSize(size.scaled(self.box, Qt.KeepAspectRatio))
+                image = reader.read()
+            else:
+                image = self._decode_registry()
+            if image is not None and image.isNull():
+                image = None
+        except Exception:
+            image = None
+        self.signals.decoded.emit(self.generation, self.index, image)
+
+    def _decode_registry(self):
+        side = max(self.box.width(), self.box.height()) if self.box.isValid() else FALLBACK_SIDE
+        if needs_process_pool(self.path):
+            result = get_executor().submit(decode_preview, self.path, side, True).result()
+        else:
+            result = decode_preview(self.path, side)
+        preview = result.get("preview")
+        return preview_to_qimage(preview, self.box if self.box.isValid() else None) if preview else None
+
+
+class FrameRingBuffer(QObject):
+    """
+    Bộ đệm vòng frame đã decode quanh playhead.
+    - Cửa sổ giữ: [playhead - KEEP_BEHIND, playhead + ahead] (có vòng lại đầu khi loop).
+    - ahead bị giới hạn bởi limit_bytes / kích thước một frame.
+    - Frame ngoài cửa sổ bị bỏ; decode được xếp theo thứ tự gần playhead trước,
+      tối đa max_inflight việc cùng lúc nên scrub tới đâu thì frame đó được ưu tiên.
+    - Đổi chuỗi ảnh hoặc kích thước khung → tăng generation, kết quả cũ bị bỏ qua.
+    """
+    frame_ready = pyqtSignal(int)
+
+    def __init__(self, limit_mb=DEFAULT_CACHE_MB, parent=None):
+        super().__init__(parent)
+        self.limit = limit_mb * 1024 * 1024
+        self.paths = []
+        self.box = QSize()
+        self.generation = 0
+        self.frames = {}        # index -> QImage
+        self.inflight = set()
+        self.failed = set()
+        self.frame_bytes = 0
+        self.bytes = 0
+        self.playhead = 0
+        self.loop = True
+        self.max_inflight = playblast_pool().maxThreadCount() * 2
+        self.signals = FrameDecodeSignals()
+        self.signals.decoded.connect(self._on_decoded)
+
+    def reset(self, paths, box):
+        self.generation += 1
+        self.paths = list(paths)
+        self.box = QSize(box)
+        self.frames = {}
+        self.inflight = set()
+        self.failed = set()
+        self.frame_bytes = 0
+        self.bytes = 0
+        self.playhead = 0
+
+    def clear(self):
+        self.reset([], self.box)
+
+    def set_box(self, box):
+        if box != self.box and self.paths:
+            self.reset(self.paths, box)
+
+    def ahead(self):
+        if not self.frame_bytes:
+            return 4  # chưa biết kích thước frame: decode vài frame đầu
+        fit = self.limit // self.frame_bytes - KEEP_BEHIND
+        return max(2, min(PREFETCH_AHEAD, fit))
+
+    def window(self):
+        """Danh sách index trong cửa sổ, theo thứ tự ưu tiên (playhead, rồi tới trước, rồi lùi)."""
+        count = len(self.paths)
+        if not count:
+            return []
+        order = []
+        for step in range(min(self.ahead() + 1, count)):
+            index = self.playhead + step
+            if index >= count:
+                if not self.loop:
+                    break
+                index %= count
+            order.append(index)
+        for step in range(1, KEEP_BEHIND + 1):
+            index = self.playhead - step
+            if index < 0:
+                break
+            if index not in order:
+                order.append(index)
+        return order
+
+    def get(self, index):
+        return self.frames.get(index)
+
+    def set_playhead(self, index):
+        self.playhead = index
+        self._evict()
+        self._fill()
+
+    def _evict(self):
+        keep = set(self.window())
+        for index in [i for i in self.frames if i not in keep]:
+            self.bytes -= image_bytes(self.frames.pop(index))
+
+    def _fill(self):
+        for index in self.window():
+            if len(self.inflight) >= self.max_inflight:
+                break
+            if index in self.frames or index in self.inflight or index in self.failed:
+                continue
+            if self.frame_bytes and self.bytes + len(self.inflight) * self.frame_bytes >= self.limit:
+                break
+            self.inflight.add(index)
+            worker = FrameDecodeWorker(self.signals, self.generation, index, self.paths[index], self.box)
+            playblast_pool().start(worker)
+
+    def _on_decoded(self, generation, index, image):
+        if generation != self.generation:
+            return
+        self.inflight.discard(index)
+        if image is None:
+            self.failed.add(index)
+        elif index in self.window():
+            self.frames[index] = image
+            size = image_bytes(image)
+            self.bytes += size
+            self.frame_bytes = max(self.frame_bytes, size)
+            self.frame_ready.emit(index)
+        self._fill()
+
+    def buffered_ahead(self):
+        """Số frame liên tiếp đã sẵn sàng tính từ playhead (hiển thị trên thanh trạng thái)."""
+        count = 0
+        for index in self.window()[:self.ahead() + 1]:
+            if index not in self.frames:
+                break
+            count += 1
+        return count
+
+
+class PlayblastTab(QWidget):
+    """
+    Xem playblast của shot (<shot>/playblast) dạng flipbook:
+    - Tự nhận các chuỗi ảnh đánh số trong folder (find_sequences), chọn trong combo.
+    - Phát theo fps của project (mặc định 24) bằng đồng hồ thực: frame chưa decode kịp
+      thì bỏ qua (drop) thay vì làm chậm nhịp phát.
+    - Frame được decode trước playhead ở playblast_pool vào FrameRingBuffer có giới hạn bộ nhớ.
+    - Kéo slider / phím ←→ để scrub, Space để phát / dừng.
+    """
+
+    def __init__(self, fps=DEFAULT_FPS):
+        super().__init__()
+        self.fps = fps or DEFAULT_FPS
+        self.folder_path = None
+        self.sequences = []
+        self.sequence = None
+        self.position = 0
+        self.dropped = 0
+        self._shown = -1
+        self._play_from = 0
+
+        self.setFocusPolicy(Qt.StrongFocus)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(10, 10, 10, 10)
+
+        top = QHBoxLayout()
+        self.seq_combo = QComboBox()
+        self.seq_combo.currentIndexChanged.connect(self.on_sequence_changed)
+        top.addWidget(self.seq_combo, 1)
+        layout.addLayout(top)
+
+        self.viewer = QLabel("No playblast")
+        self.viewer.setAlignment(Qt.AlignCenter)
+        self.viewer.setMinimumSize(160, 90)
+        self.viewer.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+        self.viewer.setStyleSheet("background-color: #202020; color: #808080;")
+        layout.addWidget(self.viewer, 1)
+
+        controls = QHBoxLayout()
+        self.play_btn = QPushButton("▶")
+        self.play_btn.setFixedWidth(36)
+        self.play_btn.clicked.connect(self.toggle_play)
+        controls.addWidget(self.play_btn)
+
+        self.frame_slider = QSlider(Qt.Horizontal)
+        self.frame_slider.setEnabled(False)
+        self.frame_slider.valueChanged.connect(self.seek)
+        controls.addWidget(self.frame_slider, 1)
+
+        self.frame_label = QLabel("")
+        self.frame_label.setMinimumWidth(150)
+        controls.addWidget(self.frame_label)
+        layout.addLayout(controls)
+
+        self.buffer = FrameRingBuffer(parent=self)
+        self.buffer.frame_ready.connect(self._on_frame_ready)
+
+        self.clock = QElapsedTimer()
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self._tick)
+
+        # Đổi kích thước khung xem → decode lại ở kích thước mới (gom lại, không decode mỗi pixel)
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(150)
+        self._resize_timer.timeout.connect(self._apply_viewer_size)
+
+    # ---------- Nạp folder ----------
+
+    def set_fps(self, fps):
+        self.fps = fps or DEFAULT_FPS
+        if self.timer.isActive():
+            self.pause()
+            self.play()
+        self._update_label()
+
+    def load_from(self, folder_path):
+        """
+        folder_path: <shot>/playblast. Folder rỗng / không tồn tại → tab trống.
+        """
+        self.pause()
+        self.folder_path = folder_path
+        self.sequences = find_sequences(folder_path) if folder_path and os.path.isdir(folder_path) else []
+        self.seq_combo.blockSignals(True)
+        self.seq_combo.clear()
+        for seq in self.sequences:
+            self.seq_combo.addItem(seq.label())
+        self.seq_combo.blockSignals(False)
+        self.on_sequence_changed(0)
+
+    def on_sequence_changed(self, idx):
+        self.pause()
+        self.sequence = self.sequences[idx] if 0 <= idx < len(self.sequences) else None
+        self.position = 0
+        self._shown = -1
+        self.dropped = 0
+        self.viewer.clear()
+        if self.sequence is None:
+            self.buffer.clear()
+            self.viewer.setText("No playblast")
+            self.frame_slider.setEnabled(False)
+            self.frame_label.setText("")
+            return
+        self.buffer.reset(self.sequence.paths, self._viewer_box())
+        self.frame_slider.blockSignals(True)
+        self.frame_slider.setRange(0, len(self.sequence.paths) - 1)
+        self.frame_slider.setValue(0)
+        self.frame_slider.blockSignals(False)
+        self.frame_slider.setEnabled(True)
+        self.buffer.set_playhead(0)
+        self._update_label()
+
+    # ---------- Phát / scrub ----------
+
+    def toggle_play(self):
+        if self.timer.isActive():
+            self.pause()
+        else:
+            self.play()
+
+    def play(self):
+        if self.sequence is None or not self.isVisible():
+            return
+        self._play_from = self.position
+        self.dropped = 0
+        self.clock.start()
+        self.timer.start(max(1, int(500 / self.fps)))  # tick nhanh gấp đôi fps, frame lấy theo đồng hồ
+        self.play_btn.setText("⏸")
+
+    def pause(self):
+        self.timer.stop()
+        self.play_btn.setText("▶")
+        self._update_label()
+
+    def seek(self, index):
+        """
+        Scrub tới frame index: dời cửa sổ prefetch, frame hiện ngay nếu đã decode.
+        """
+        if self.sequence is None:
+            return
+        self.position = index
+        if self.timer.isActive():
+            self._play_from = index
+            self.clock.restart()
+        self.buffer.set_playhead(index)
+        self._show(index)
+
+    def _tick(self):
+        count = len(self.sequence.paths)
+        target = self._play_from + int(self.clock.elapsed() * self.fps / 1000)
+        target %= count  # hết chuỗi thì vòng lại đầu
+        if target == self.position:
+            return
+        self.position = target
+        self.buffer.set_playhead(target)
+        self.frame_slider.blockSignals(True)
+        self.frame_slider.setValue(target)
+        self.frame_slider.blockSignals(False)
+        if not self._show(target):
+            self.dropped += 1
+        self._update_label()
+
+    def _show(self, index):
+        image = self.buffer.get(index)
+        if image is None:
+            return False
+        self.viewer.setPixmap(QPixmap.fromImage(image))
+        self._shown = index
+        return True
+
+    def _on_frame_ready(self, index):
+        if index == self.position and self._shown != index:
+            self._show(index)
+        if not self.timer.isActive():
+            self._update_label()
+
+    def _update_label(self):
+        if self.sequence is None:
+            return
+        frame = self.sequence.frames[min(self.position, len(self.sequence.frames) - 1)]
+        text = f"{frame} / {self.sequence.last} @ {self.fps:g} fps"
+        if self.dropped:
+            text += f" · {self.dropped} dropped"
+        self.frame_label.setText(text)
+
+    # ---------- Kích thước / hiển thị ----------
+
+    def _viewer_box(self):
+        size = self.viewer.size()
+        return QSize(max(size.width(), 160), max(size.height(), 90))
+
+    def _apply_viewer_size(self):
+        if self.sequence is None:
+            return
+        box = self._viewer_box()
+        if box == self.buffer.box:
+            return
+        self.buffer.set_box(box)
+        self.buffer.set_playhead(self.position)
+        self._shown = -1
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._resize_timer.start()
+
+    def hideEvent(self, event):
+        # Tab bị ẩn: dừng phát, bỏ frame đã decode (giải phóng bộ nhớ)
+        self.pause()
+        if self.sequence is not None:
+            self.buffer.reset(self.sequence.paths, self.buffer.box)
+        super().hideEvent(event)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.sequence is not None:
+            self.buffer.set_box(self._viewer_box())
+            self.buffer.set_playhead(self.position)
+
+    def keyPressEvent(self, event):
+        if self.sequence is None:
+            return super().keyPressEvent(event)
+        if event.key() == Qt.Key_Space:
+            self.toggle_play()
+        elif event.key() in (Qt.Key_Left, Qt.Key_Right):
+            step = -1 if event.key() == Qt.Key_Left else 1
+            self.pause()
+            self.frame_slider.setValue((self.position + step) % len(self.sequence.paths))
+        else:
+            super().keyPressEvent(event)
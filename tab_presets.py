@@ -3,19 +3,122 @@ import time
 from PyQt5.QtWidgets import (
     QWidget, QLabel, QVBoxLayout, QHBoxLayout, QStackedWidget,
     QGridLayout, QScrollArea, QMenu, QAction, QActionGroup,
-    QApplication, QShortcut, QSizePolicy, QPushButton
+    QApplication, QShortcut, QSizePolicy, QPushButton, QSlider, QMessageBox, QFileDialog
 )
-from PyQt5.QtGui import QPixmap, QFont, QFontMetrics, QKeySequence, QDrag
-from PyQt5.QtCore import Qt, QEvent, QPoint, QMimeData, QUrl
+from PyQt5.QtGui import (
+    QPixmap, QPixmapCache, QFont, QFontMetrics, QKeySequence, QDrag, QPainter, QColor, QPen, QPalette
+)
+from PyQt5.QtCore import Qt, QEvent, QPoint, QMimeData, QUrl, QTimer, QRectF
 from flowlayout import FlowLayout
+from card_builder import CardBuilder
+from thumb_cache import THUMB_LEVELS, DEFAULT_LEVEL, nearest_level, pick_variant
+from pixmap_budget import budget
+from remote_cache import remote_cache
+from jobs import submit, import_file, remove_files, copy_batch, move_batch, remove_batch
+from selection import SelectionModel, add_navigation_shortcuts, is_shown
+from texture_decoders import supported_extensions
 
 BASE_DIR = os.path.dirname(__file__)
 PRODUCTS_FOLDER = os.path.join(BASE_DIR, "Products")
 
+# Màu card theo trạng thái: (nền, màu viền, độ dày viền, màu chữ); None = không vẽ
+CARD_THEME = {
+    "normal":   (None,      "#1d3557", 1, "#1D1D1D"),
+    "hovered":  ("#e63946", None,      0, "#000000"),
+    "selected": ("#1d3557", "#1d3557", 2, "#ffffff"),
+}
+CARD_RADIUS = 10
+
+_card_palettes = {}
+
+
+def card_size_for(level):
+    """
+    Kích thước card (width, height) ở Thumbnail View cho một mức thumbnail.
+    Mức 128 cho đúng kích thước card cũ 180×250.
+    """
+    return level + 52, level + 122
+
+
+def source_pixmap(image_path, box=None):
+    """
+    QPixmap của logo/ảnh nhỏ, dùng chung qua QPixmapCache để đổi mức zoom
+    hay nạp lại card không phải đọc lại file. box=(w, h): bản đã scale vừa khung,
+    mọi card cùng ảnh + cùng khung dùng chung một pixmap. Key gồm mtime nên
+    ảnh được ghi đè (ví dụ Create Thumbnail) sẽ được đọc lại.
+    Ảnh nằm trên Drive được đọc từ bản mirror local (remote_cache).
+    """
+    if not image_path:
+        return QPixmap()
+    image_path = remote_cache().local_file(image_path)
+    try:
+        stamp = os.path.getmtime(image_path)
+    except OSError:
+        return QPixmap()
+    key = f"src::{image_path}::{stamp}"
+    pix = QPixmapCache.find(key)
+    if pix is None:
+        pix = QPixmap(image_path)
+        if pix.isNull():
+            return pix
+        QPixmapCache.insert(key, pix)
+    if box is None or (pix.width() <= box[0] and pix.height() <= box[1]):
+        return pix
+    scaled_key = f"src::{box[0]}x{box[1]}::{image_path}::{stamp}"
+    scaled = QPixmapCache.find(scaled_key)
+    if scaled is None:
+        scaled = pix.scaled(box[0], box[1], Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        QPixmapCache.insert(scaled_key, scaled)
+    return scaled
+
+def card_palette(state):
+    """
+    QPalette dùng chung cho mọi card ở trạng thái state (chỉ đặt màu chữ, role khác vẫn kế thừa).
+    """
+    pal = _card_palettes.get(state)
+    if pal is None:
+        pal = QPalette()
+        color = QColor(CARD_THEME[state][3])
+        pal.setColor(QPalette.WindowText, color)
+        pal.setColor(QPalette.Text, color)
+        _card_palettes[state] = pal
+    return pal
+
+
+class CardPage(QWidget):
+    """
+    Một trang (Thumbnail / List View) của CustomItemWidget. Tự vẽ nền + viền bo góc theo
+    trạng thái card (CARD_THEME) thay cho stylesheet: hover / chọn chỉ là update(), không parse CSS.
+    """
+
+    def __init__(self, card):
+        super().__init__()
+        self.card = card
+
+    def paintEvent(self, event):
+        bg, border, width, _ = CARD_THEME[self.card.state()]
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(QPen(QColor(border), width) if border and width else Qt.NoPen)
+        painter.setBrush(QColor(bg) if bg else Qt.NoBrush)
+        # Lùi nửa độ dày viền để nét không bị cắt ở mép widget
+        half = width / 2
+        painter.drawRoundedRect(QRectF(self.rect()).adjusted(half, half, -half, -half), CARD_RADIUS, CARD_RADIUS)
+        painter.end()
+
+
 class CustomItemWidget(QWidget):
-    def __init__(self, title: str, image_path: str, text1: str = "", text2: str = "", text3: str = "", parent_tab=None):
+    def __init__(self, title: str, image_path: str, text1: str = "", text2: str = "", text3: str = "", parent_tab=None,
+                 thumb_size: int = DEFAULT_LEVEL, image_variants=None, atlas_region=None):
         super().__init__()
         self.title = title
+        self.image_path = image_path
+        # Thumbnail dựng sẵn nhiều cỡ (cỡ -> path, xem thumb_cache.write_entity_thumbnails);
+        # có thì nạp cỡ nhỏ nhất vừa khung thay cho image_path
+        self.image_variants = dict(image_variants or {})
+        # Icon List View cắt từ atlas của section: (QPixmap atlas, QRect), xem thumb_atlas
+        self.atlas_region = atlas_region
+        self.thumb_size = thumb_size
         self.text1 = text1
         self.text2 = text2
         self.text3 = text3
@@ -23,6 +126,7 @@ class CustomItemWidget(QWidget):
         self.parent_tab = parent_tab
         self._hovered = False
         self._selected = False
+        self._style_state = None
         self.file_path = image_path
         self.drive_path = None  # Thêm thuộc tính drive_path
         self.local_path = None  # Thêm thuộc tính local_path
@@ -31,19 +135,17 @@ class CustomItemWidget(QWidget):
         self.stack.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
 
         # Thumbnail view
-        thumb = QWidget()
-        thumb.setObjectName("card")
+        thumb = CardPage(self)
         t_layout = QVBoxLayout(thumb)
         t_layout.setContentsMargins(6, 6, 6, 6)
         t_layout.setSpacing(4)
 
-        pix = QPixmap(image_path)
+        # Pixmap chỉ được gắn cho trang đang hiển thị (switch_view / load_pixmap)
         img = QLabel()
-        img.setFixedSize(160, 160)
+        img.setFixedSize(thumb_size + 32, thumb_size + 32)
         img.setAlignment(Qt.AlignCenter)
-        if not pix.isNull():
-            img.setPixmap(pix.scaled(120, 120, Qt.KeepAspectRatio, Qt.SmoothTransformation))
         t_layout.addWidget(img)
+        self.img_label = img
 
         self.title_lbl = QLabel(title)
         self.title_lbl.setFont(QFont("Roboto", 14, QFont.Bold))
@@ -74,8 +176,7 @@ class CustomItemWidget(QWidget):
         self.stack.addWidget(thumb)
 
         # List view
-        lst = QWidget()
-        lst.setObjectName("card")
+        lst = CardPage(self)
         lst.setFixedHeight(80)
         lst.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
 
@@ -86,9 +187,8 @@ class CustomItemWidget(QWidget):
         icon = QLabel()
         icon.setFixedSize(64, 64)
         icon.setAlignment(Qt.AlignCenter)
-        if not pix.isNull():
-            icon.setPixmap(pix.scaled(64, 64, Qt.KeepAspectRatio, Qt.SmoothTransformation))
         l_layout.addWidget(icon)
+        self.icon_label = icon
 
         info = QVBoxLayout()
         info.setSpacing(2)
@@ -137,10 +237,12 @@ class CustomItemWidget(QWidget):
             self.parent_tab.download(self)
 
     def switch_view(self, mode: str):
+        if getattr(self, "view_mode", None) == mode:
+            return
         idx = 0 if mode == "thumbnail" else 1
         self.stack.setCurrentIndex(idx)
         if mode == "thumbnail":
-            self.setFixedSize(180, 220 + 30)  # Tăng chiều cao để chứa nút Download
+            self.setFixedSize(*card_size_for(self.thumb_size))  # Đã tính cả chiều cao nút Download
             self.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
         else:
             self.setFixedHeight(80)
@@ -150,6 +252,96 @@ class CustomItemWidget(QWidget):
         self.view_mode = mode
         self.update_style()
 
+        # Chỉ giữ pixmap của trang đang hiển thị
+        self.release_pixmaps("list" if mode == "thumbnail" else "thumbnail")
+        self.load_pixmap(mode)
+
+    def _pixmap_label(self, mode):
+        return self.img_label if mode == "thumbnail" else self.icon_label
+
+    def _pixmap_box(self, mode):
+        if mode == "thumbnail":
+            return self.thumb_size, self.thumb_size
+        return self.icon_label.width(), self.icon_label.height()
+
+    def has_pixmap(self, mode: str = None) -> bool:
+        return budget().holds(self._pixmap_label(mode or self.view_mode))
+
+    def set_page_pixmap(self, mode: str, pix):
+        """
+        Gắn pixmap cho trang mode (scale vừa khung nếu lớn hơn), tính vào PixmapBudget.
+        """
+        if pix is None or pix.isNull():
+            return
+        w, h = self._pixmap_box(mode)
+        if pix.width() > w or pix.height() > h:
+            pix = pix.scaled(w, h, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        budget().set_pixmap(self._pixmap_label(mode), pix)
+
+    def load_pixmap(self, mode: str = None, pix=None):
+        """
+        Nạp pixmap cho trang mode nếu đang trống. pix=None → lấy từ image_path (đã cache).
+        """
+        mode = mode or self.view_mode
+        if self.has_pixmap(mode):
+            return
+        if pix is None:
+            box = self._pixmap_box(mode)
+            if mode == "list" and self.atlas_region is not None and not self.image_variants:
+                pix = self.atlas_region[0].copy(self.atlas_region[1])
+            else:
+                pix = source_pixmap(pick_variant(self.image_variants, box) or self.image_path, box)
+        self.set_page_pixmap(mode, pix)
+
+    def set_atlas_region(self, region):
+        """
+        Atlas của section vừa được tạo lại → cắt icon từ ảnh mới (nếu card không có bộ thumbnail riêng).
+        """
+        self.atlas_region = region
+        if not self.image_variants and self.has_pixmap("list"):
+            self.release_pixmaps("list")
+            self.load_pixmap("list")
+
+    def set_image_variants(self, variants):
+        """
+        Gắn bộ thumbnail mới (ví dụ vừa Create Thumbnail) và nạp lại trang đang hiển thị.
+        """
+        self.image_variants = dict(variants)
+        self.release_pixmaps()
+        self.load_pixmap()
+
+    def release_pixmaps(self, mode: str = None):
+        """
+        Nhả pixmap của trang mode (None = cả hai trang) để giải phóng bộ nhớ.
+        """
+        for m in ((mode,) if mode else ("thumbnail", "list")):
+            budget().release(self._pixmap_label(m))
+
+    def set_thumb_size(self, size: int):
+        """
+        Đổi mức thumbnail của card (zoom). Card có image_path tự scale lại từ
+        pixmap gốc đã cache; LibraryTab tự gán pixmap theo mức mới.
+        """
+        if size == self.thumb_size:
+            return
+        self.thumb_size = size
+        self.img_label.setFixedSize(size + 32, size + 32)
+        if self.has_pixmap("thumbnail"):
+            self.release_pixmaps("thumbnail")
+            self.load_pixmap("thumbnail")
+        if self.view_mode == "thumbnail":
+            self.setFixedSize(*card_size_for(size))
+
+    def set_extra_text(self, index: int, text: str):
+        """
+        Cập nhật dòng text phụ thứ index trên cả Thumbnail View và List View
+        (ví dụ khi metadata được đọc xong ở thread nền).
+        """
+        if index < len(self.sub_labels):
+            self.sub_labels[index].setText(text)
+        if index < len(self.sub2_labels):
+            self.sub2_labels[index].setText(text)
+
     def eventFilter(self, obj, ev):
         if ev.type() in (QEvent.Enter, QEvent.Leave):
             self._hovered = (ev.type()==QEvent.Enter)
@@ -160,42 +352,42 @@ class CustomItemWidget(QWidget):
         self._selected = sel
         self.update_style()
 
-    def update_style(self):
-        bg, bd = "transparent", "1px solid #1d3557"
-        color = "#1D1D1D"  # Màu chữ mặc định
-
+    def state(self) -> str:
         if self._selected:
-            bg, bd = "#1d3557", "2px solid #1d3557"
-            color = "#ffffff"
-        elif self._hovered:
-            bg, bd = "#e63946", "0px solid #457b9d"
-            color = "#000000"
-
-        style = f"""
-            #card {{
-                background-color: {bg};
-                border: {bd};
-                border-radius: 10px;
-            }}
-        """
-        self.stack.widget(0).setStyleSheet(style)
-        self.stack.widget(1).setStyleSheet(style)
-        self.title_label.setStyleSheet(f"color: {color};")
-        self.title_lbl.setStyleSheet(f"color: {color};")
-        for lbl in self.sub_labels:
-            lbl.setStyleSheet(f"color: {color};")
-        for lbl in self.sub2_labels:
-            lbl.setStyleSheet(f"color: {color};")
+            return "selected"
+        return "hovered" if self._hovered else "normal"
 
+    def update_style(self):
+        """
+        Đổi trạng thái hiển thị: gắn palette chữ dùng chung của trạng thái mới (chỉ khi đổi)
+        và vẽ lại trang đang hiện (CardPage tự vẽ nền / viền).
+        """
+        state = self.state()
+        if state != self._style_state:
+            self._style_state = state
+            self.setPalette(card_palette(state))
+        self.stack.currentWidget().update()
 
     def contextMenuEvent(self, event):
-        if self.parent_tab:
-            self.parent_tab.clear_selection()
-        self.set_selected(True)
+        selection = getattr(self.parent_tab, "selection", None)
+        if selection is not None:
+            selection.press(self)
+        else:
+            if self.parent_tab:
+                self.parent_tab.clear_selection()
+            self.set_selected(True)
         menu = QMenu(self)
+        # Đang chọn nhiều card → menu thao tác hàng loạt trên cả vùng chọn
+        if selection is not None and len(selection) > 1:
+            self.parent_tab.fill_batch_menu(menu, selection.selected())
+            menu.exec_(event.globalPos())
+            return
         menu.addAction("Open in Explorer", self.open_in_explorer)
         menu.addAction("Copy File Path", self.copy_file_path)
         menu.addAction("Delete", self.delete_file)
+        extend = getattr(self.parent_tab, "extend_card_menu", None)
+        if extend:
+            extend(menu, self)
         menu.exec_(event.globalPos())
 
     def mouseMoveEvent(self, event):
@@ -226,21 +418,42 @@ class CustomItemWidget(QWidget):
         QApplication.clipboard().setText(self.file_path)
 
     def delete_file(self):
-        if os.path.exists(self.file_path):
-            os.remove(self.file_path)
-        self.setParent(None)
-        self.deleteLater()
-        if self.parent_tab:
-            self.parent_tab.cards.remove(self)
-            if self.parent_tab.view_mode == "list":
-                self.parent_tab.relayout_list()
-            else:
-                self.parent_tab.relayout()
+        # Xoá file ở JobScheduler; card chỉ bỏ khỏi UI khi file đã xoá xong
+        # (job lỗi / bị hủy thì card vẫn còn, khớp với file trên đĩa)
+        path = self.file_path
+        title = f"Delete {os.path.basename(path)}"
+
+        def done(_):
+            remote_cache().invalidate(path)
+            self._remove_from_tab()
+
+        def failed(message):
+            remote_cache().invalidate(path)
+            QMessageBox.warning(None, "Warning", f"{title}:\n{message}")
+
+        submit(title, remove_files, [path], retries=1, on_done=done, on_error=failed)
+
+    def _remove_from_tab(self):
+        try:
+            tab = self.parent_tab
+            if tab is None or self not in tab.cards:
+                # Tab đã build lại trong lúc xoá: card này không còn hiển thị
+                self.setParent(None)
+                self.deleteLater()
+                return
+        except RuntimeError:
+            return  # Card đã bị huỷ ở phía C++
+        # Cùng đường với xoá hàng loạt: bỏ khỏi vùng chọn, bảng path -> card của tab con, relayout
+        tab.remove_cards([self])
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton and self.parent_tab:
-            self.parent_tab.clear_selection()
-            self.set_selected(True)
+            selection = getattr(self.parent_tab, "selection", None)
+            if selection is not None:
+                selection.click(self, event.modifiers())
+            else:
+                self.parent_tab.clear_selection()
+                self.set_selected(True)
             event.accept()
         else:
             super().mousePressEvent(event)
@@ -256,9 +469,13 @@ class BaseCardTab(QWidget):
         self.scroll_list = QScrollArea() 
         self.cards = []
         self.view_mode = "thumbnail"
+        self.thumb_level = DEFAULT_LEVEL
 
         self.setFocusPolicy(Qt.StrongFocus)
 
+        # Vùng chọn (click / Ctrl / Shift / phím mũi tên), xem selection.SelectionModel
+        self.selection = SelectionModel(self.visible_cards, self._on_current_card)
+
         layout = QVBoxLayout(self)
         layout.setContentsMargins(10, 10, 10, 10)
 
@@ -309,9 +526,38 @@ class BaseCardTab(QWidget):
 
         self.stack.addWidget(list_page)
 
+        # --- Thanh zoom: mỗi nấc là một mức thumbnail đã tạo sẵn ---
+        zoom_row = QHBoxLayout()
+        zoom_row.setContentsMargins(0, 4, 0, 0)
+        zoom_row.addStretch()
+        self.zoom_slider = QSlider(Qt.Horizontal)
+        self.zoom_slider.setRange(0, len(THUMB_LEVELS) - 1)
+        self.zoom_slider.setPageStep(1)
+        self.zoom_slider.setTickPosition(QSlider.TicksBelow)
+        self.zoom_slider.setFixedWidth(140)
+        self.zoom_slider.setValue(THUMB_LEVELS.index(self.thumb_level))
+        self.zoom_slider.valueChanged.connect(lambda i: self.set_zoom_level(THUMB_LEVELS[i]))
+        self.zoom_label = QLabel(f"{self.thumb_level}px")
+        self.zoom_label.setFixedWidth(44)
+        zoom_row.addWidget(self.zoom_slider)
+        zoom_row.addWidget(self.zoom_label)
+        layout.addLayout(zoom_row)
+
+        # Tạo card theo lát thời gian cho folder lớn
+        self.card_builder = CardBuilder(self)
+
+        # Chỉ giữ pixmap cho card gần viewport, nạp lại khi cuộn tới (PixmapBudget)
+        self._resident_timer = QTimer(self)
+        self._resident_timer.setSingleShot(True)
+        self._resident_timer.setInterval(30)
+        self._resident_timer.timeout.connect(self.update_resident_pixmaps)
+        self.scroll_thumb.verticalScrollBar().valueChanged.connect(self.schedule_resident_update)
+        self.scroll_list.verticalScrollBar().valueChanged.connect(self.schedule_resident_update)
+        budget().register_tab(self)
+
         # tạo card
         for title, img, t1, t2, t3 in data_list:
-            card = CustomItemWidget(title, img, t1, t2, t3, parent_tab=self)
+            card = CustomItemWidget(title, img, t1, t2, t3, parent_tab=self, thumb_size=self.thumb_level)
             self.cards.append(card)
 
         self.relayout()
@@ -321,6 +567,7 @@ class BaseCardTab(QWidget):
         QShortcut(QKeySequence("Ctrl+E"), self, activated=self._short_open)
         QShortcut(QKeySequence("Ctrl+C"), self, activated=self._short_copy)
         QShortcut(QKeySequence("Ctrl+X"), self, activated=self._short_delete)
+        add_navigation_shortcuts(self, self.selection, self.grid_columns)
 
     def extract_metadata(self, filepath):
         """
@@ -347,18 +594,33 @@ class BaseCardTab(QWidget):
         a_list.triggered.connect(lambda: self.set_view_mode("list"))
 
         menu.addActions([a_thumb, a_list])
+        self.extend_background_menu(menu)
         menu.exec_(global_pos)
 
+    def extend_background_menu(self, menu: QMenu):
+        """
+        Các tab con override để thêm action vào menu chuột phải vùng trống.
+        """
+        pass
+
+    def extend_card_menu(self, menu: QMenu, card):
+        """
+        Các tab con override để thêm action vào menu chuột phải của một card.
+        """
+        pass
+
     def toggle_view_mode(self):
         self.set_view_mode("list" if self.view_mode == "thumbnail" else "thumbnail")
 
     def set_view_mode(self, mode: str):
         self.view_mode = mode
         self.stack.setCurrentIndex(0 if mode == "thumbnail" else 1)
+        self.zoom_slider.setEnabled(mode == "thumbnail")
         if mode == "thumbnail":
             self.relayout()
         else:
             self.relayout_list()
+        self.schedule_resident_update()
 
     def relayout(self):
         for card in self.cards:
@@ -367,6 +629,85 @@ class BaseCardTab(QWidget):
                 self.grid.addWidget(card)
         self.grid.invalidate()
 
+    def set_zoom_level(self, level: int):
+        """
+        Đổi kích thước card theo mức thumbnail gần nhất (64/128/256/512).
+        Không decode lại ảnh gốc: card tự scale từ pixmap đã cache, tab con lấy
+        mức tương ứng từ thumbnail pyramid (on_zoom_changed). Tắt vẽ trong lúc
+        đổi kích thước hàng loạt và chỉ tính lại FlowLayout một lần ở cuối.
+        """
+        level = nearest_level(level)
+        if level == self.thumb_level:
+            return
+        self.thumb_level = level
+        self.zoom_label.setText(f"{level}px")
+        if self.zoom_slider.value() != THUMB_LEVELS.index(level):
+            self.zoom_slider.blockSignals(True)
+            self.zoom_slider.setValue(THUMB_LEVELS.index(level))
+            self.zoom_slider.blockSignals(False)
+
+        self.thumb_container.setUpdatesEnabled(False)
+        try:
+            for card in self.cards:
+                card.set_thumb_size(level)
+            self.on_zoom_changed(level)
+            self.grid.invalidate()
+        finally:
+            self.thumb_container.setUpdatesEnabled(True)
+        self.schedule_resident_update()
+
+    def on_zoom_changed(self, level: int):
+        """
+        Các tab con override để cập nhật thumbnail theo mức zoom mới.
+        """
+        pass
+
+    # ---------- Pixmap theo viewport ----------
+
+    def schedule_resident_update(self, *args):
+        self._resident_timer.start()
+
+    def card_pixmap(self, card):
+        """
+        Pixmap để nạp lại card khi quay về gần viewport. None → card tự lấy từ
+        image_path; LibraryTab override để lấy từ thumbnail cache.
+        """
+        return None
+
+    def near_viewport(self, card) -> bool:
+        # Card vừa thêm vào layout cũng isHidden() cho tới khi layout show; chỉ bỏ qua card bị ẩn chủ động
+        if card.parent() is None or (card.isHidden() and card.testAttribute(Qt.WA_WState_ExplicitShowHide)):
+            return False
+        scroll = self.scroll_thumb if self.view_mode == "thumbnail" else self.scroll_list
+        top = scroll.verticalScrollBar().value()
+        height = scroll.viewport().height()
+        geo = card.geometry()
+        # Giữ thêm một màn hình phía trên và phía dưới để cuộn không bị nháy
+        return geo.bottom() >= top - height and geo.top() <= top + 2 * height
+
+    def update_resident_pixmaps(self):
+        """
+        Card gần viewport: nạp pixmap trang đang hiển thị nếu đang trống.
+        Card ở xa: nhả pixmap. Tab đang ẩn giữ nguyên (PixmapBudget nhả khi vượt ngưỡng).
+        """
+        if not self.isVisible():
+            return
+        mode = self.view_mode
+        for card in self.cards:
+            if self.near_viewport(card):
+                if not card.has_pixmap(mode):
+                    card.load_pixmap(mode, self.card_pixmap(card))
+            elif card.has_pixmap("thumbnail") or card.has_pixmap("list"):
+                card.release_pixmaps()
+
+    def release_all_pixmaps(self):
+        for card in self.cards:
+            card.release_pixmaps()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.schedule_resident_update()
+
     def relayout_list(self):
         while self.list_layout.count():
             it = self.list_layout.takeAt(0)
@@ -379,16 +720,102 @@ class BaseCardTab(QWidget):
             self.list_layout.addWidget(card)
 
         self.list_layout.addStretch()
+        # Báo QScrollArea tính lại kích thước list_container theo chiều cao thật của danh sách
+        QApplication.postEvent(self.scroll_list, QEvent(QEvent.LayoutRequest))
+
+    def clear_cards(self):
+        """
+        Hủy build đang chạy, xóa self.cards và gỡ widget khỏi cả grid lẫn list.
+        """
+        self.card_builder.cancel()
+        self.cards.clear()
+        self.selection.reset()
+        for layout in (self.grid, self.list_layout):
+            while layout.count():
+                it = layout.takeAt(0)
+                w = it.widget()
+                if w:
+                    w.setParent(None)
+                    w.deleteLater()
+
+    def viewport_capacity(self):
+        """
+        Ước lượng số card lấp đầy viewport hiện tại (để build trước).
+        """
+        if self.view_mode == "thumbnail":
+            vp = self.scroll_thumb.viewport().size()
+            card_w, card_h = card_size_for(self.thumb_level)
+            cols = max(1, vp.width() // (card_w + 20))
+            rows = vp.height() // (card_h + 20) + 1
+            return cols * rows
+        vp = self.scroll_list.viewport().size()
+        return vp.height() // 90 + 1
+
+    def append_card(self, card):
+        """
+        Thêm một card vào self.cards và đưa ngay vào layout của view hiện tại,
+        để card hiện lên khi đang build dở.
+        """
+        self.cards.append(card)
+        card.set_thumb_size(self.thumb_level)
+        if self.view_mode == "list":
+            card.switch_view("list")
+            idx = self.list_layout.count()
+            last = self.list_layout.itemAt(idx - 1) if idx else None
+            if last is not None and last.spacerItem() is not None:
+                idx -= 1
+            self.list_layout.insertWidget(idx, card)
+        else:
+            card.switch_view("thumbnail")
+            self.grid.addWidget(card)
+
+    def build_cards(self, gen, on_done=None):
+        """
+        gen: generator tạo card (gọi append_card rồi yield).
+        Build phần trong viewport trước, phần còn lại theo lát thời gian.
+        """
+        def done():
+            if self.view_mode == "list":
+                self.relayout_list()
+            else:
+                self.grid.invalidate()
+            if on_done:
+                on_done()
+            self.schedule_resident_update()
+
+        self.card_builder.start(gen, on_done=done, first_batch=self.viewport_capacity())
 
     def clear_selection(self):
-        for c in self.cards:
-            c.set_selected(False)
+        self.selection.clear()
+
+    def visible_cards(self):
+        """
+        Card đang hiện theo thứ tự hiển thị (cho Shift / phím mũi tên).
+        """
+        return [c for c in self.cards if is_shown(c)]
+
+    def grid_columns(self):
+        """
+        Số card mỗi hàng ở Thumbnail View (FlowLayout) cho phím Lên / Xuống; List View = 1.
+        """
+        if self.view_mode == "list":
+            return 1
+        cards = self.visible_cards()
+        if not cards:
+            return 1
+        top = cards[0].y()
+        return next((i for i, c in enumerate(cards) if c.y() != top), len(cards))
+
+    def _on_current_card(self, card):
+        scroll = self.scroll_thumb if self.view_mode == "thumbnail" else self.scroll_list
+        scroll.ensureWidgetVisible(card, 0, 0)
 
     def eventFilter(self, obj, event):
         # 1) Thumbnail View: nếu click ra ngoài thumbnail, bỏ chọn
         if obj is self.scroll_thumb.viewport() and self.view_mode == "thumbnail":
             if event.type() == QEvent.Resize:
                 self.relayout()
+                self.schedule_resident_update()
                 return False
             if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
                 w = self.scroll_thumb.viewport().childAt(event.pos())
@@ -399,6 +826,8 @@ class BaseCardTab(QWidget):
 
         # 2) List View: nếu click ra ngoài list, bỏ chọn
         if obj is self.scroll_list.viewport() and self.view_mode == "list":
+            if event.type() == QEvent.Resize:
+                self.schedule_resident_update()
             if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
                 w = self.scroll_list.viewport().childAt(event.pos())
                 # Nếu click không trúng một CustomItemWidget, bỏ chọn tất cả
@@ -409,20 +838,123 @@ class BaseCardTab(QWidget):
         return super().eventFilter(obj, event)
 
     def get_selected_widget(self):
-        return next((c for c in self.cards if c._selected), None)
+        return self.selection.primary()
+
+    def get_selected_widgets(self):
+        return self.selection.selected()
 
     def _short_open(self):
         w = self.get_selected_widget()
         if w: w.open_in_explorer()
 
     def _short_copy(self):
+        if len(self.selection) > 1:
+            self.copy_paths(self.selection.selected())
+            return
         w = self.get_selected_widget()
         if w: w.copy_file_path()
 
     def _short_delete(self):
+        if len(self.selection) > 1:
+            self.batch_delete(self.selection.selected())
+            return
         w = self.get_selected_widget()
         if w: w.delete_file()
 
+    # ---------- Thao tác hàng loạt (nhiều card đang chọn) ----------
+
+    def card_files(self, card):
+        """
+        Các file thuộc về card, file chính đứng đầu. SceneTab thêm file JSON cùng tên.
+        """
+        return (card.file_path,)
+
+    def can_modify(self, card) -> bool:
+        """
+        Card có được xoá / di chuyển không. ProductTab chặn bản publish (bất biến).
+        """
+        return True
+
+    def fill_batch_menu(self, menu: QMenu, cards):
+        n = len(cards)
+        movable = [c for c in cards if self.can_modify(c)]
+        menu.addAction(f"Copy {n} File Paths", lambda: self.copy_paths(cards))
+        menu.addAction(f"Copy {n} Files to…", lambda: self.batch_copy(cards))
+        menu.addAction(f"Move {len(movable)} Files to…", lambda: self.batch_move(movable)).setEnabled(bool(movable))
+        menu.addAction(f"Delete {len(movable)} Files", lambda: self.batch_delete(movable)).setEnabled(bool(movable))
+
+    def copy_paths(self, cards):
+        QApplication.clipboard().setText("\n".join(c.file_path for c in cards))
+
+    def batch_copy(self, cards):
+        folder = QFileDialog.getExistingDirectory(self, f"Copy {len(cards)} file tới", "")
+        if folder:
+            self._submit_batch(f"Copy {len(cards)} files", copy_batch, cards, folder)
+
+    def batch_move(self, cards):
+        folder = QFileDialog.getExistingDirectory(self, f"Move {len(cards)} file tới", "")
+        if folder:
+            self._submit_batch(f"Move {len(cards)} files", move_batch, cards, folder, remove=True)
+
+    def batch_delete(self, cards):
+        cards = [c for c in cards if self.can_modify(c)]
+        if not cards:
+            return
+        if QMessageBox.question(self, "Delete", f"Xoá {len(cards)} file?") != QMessageBox.Yes:
+            return
+        self._submit_batch(f"Delete {len(cards)} files", remove_batch, cards, remove=True)
+
+    def _submit_batch(self, title, fn, cards, folder=None, remove=False):
+        """
+        Chạy thao tác file của cả lô ở JobScheduler (song song, jobs.run_batch). Xong thì gỡ các
+        card đã move / xoá thành công một lượt (relayout một lần) và báo các file lỗi.
+        """
+        items = {tuple(self.card_files(c)): c for c in cards}
+        args = (list(items),) if folder is None else (list(items), folder)
+
+        def done(result):
+            ok, errors = result
+            for item in ok:
+                for path in item:
+                    remote_cache().invalidate(path)
+                    if folder:
+                        remote_cache().invalidate(os.path.join(folder, os.path.basename(path)))
+            if remove:
+                self.remove_cards([items[item] for item in ok])
+            if errors:
+                lines = [f"{os.path.basename(item[0])}: {message}" for item, message in errors[:20]]
+                if len(errors) > 20:
+                    lines.append(f"… và {len(errors) - 20} file khác")
+                QMessageBox.warning(self, "Warning", f"{title}: {len(errors)} file lỗi\n" + "\n".join(lines))
+
+        submit(title, fn, *args, on_done=done,
+               on_error=lambda message: QMessageBox.warning(self, "Warning", f"{title}:\n{message}"))
+
+    def remove_cards(self, cards):
+        """
+        Gỡ nhiều card khỏi tab rồi relayout một lần (không relayout sau từng card).
+        """
+        gone = set(cards)
+        if not gone:
+            return
+        self.cards[:] = [c for c in self.cards if c not in gone]
+        for card in gone:
+            self.selection.discard(card)
+            card.setParent(None)
+            card.deleteLater()
+        self.on_cards_removed(gone)
+        if self.view_mode == "list":
+            self.relayout_list()
+        else:
+            self.relayout()
+        self.schedule_resident_update()
+
+    def on_cards_removed(self, cards):
+        """
+        Các tab con override để bỏ card đã gỡ khỏi bảng tra cứu riêng (path -> card).
+        """
+        pass
+
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls():
             event.acceptProposedAction()
@@ -442,8 +974,9 @@ class BaseCardTab(QWidget):
                 if not os.path.isfile(source_path):
                     continue
 
+                # Nhận mọi định dạng có decoder preview (EXR, TGA, TIFF…), cùng danh sách với LibraryTab
                 ext = os.path.splitext(source_path)[1].lower()
-                if ext not in ['.png', '.jpg', '.jpeg', '.bmp']:
+                if ext not in supported_extensions():
                     continue
 
                 base_name = os.path.basename(source_path)
@@ -452,28 +985,38 @@ class BaseCardTab(QWidget):
                 new_filename = f"{name}_{timestamp}{ext}"
                 new_path = os.path.join(self.folder_path, new_filename)
 
-                with open(source_path, 'rb') as src_file:
-                    data = src_file.read()
-                with open(new_path, 'wb') as dst_file:
-                    dst_file.write(data)
+                self._import_file(source_path, new_path)
 
-                for card in self.cards:
-                    card.set_selected(False)
-
-                title, text1, text2, text3 = self.extract_metadata(new_path)
-                new_card = CustomItemWidget(title, new_path, text1, text2, text3, parent_tab=self)
-                new_card.set_selected(True)
-                self.cards.append(new_card)
+            event.acceptProposedAction()
 
-                if self.view_mode == "list":
-                    new_card.switch_view("list")
-                    self.list_layout.insertWidget(self.list_layout.count() - 1, new_card)
-                else:
-                    new_card.switch_view("thumbnail")
-                    self.grid.addWidget(new_card)
-                    self.relayout()
+    def _import_file(self, source_path, target_path):
+        """
+        Copy file vào folder ở JobScheduler; xong thì thêm card và chọn card đó
+        (nếu tab vẫn đang xem folder đó).
+        """
+        folder = self.folder_path
+        submit(f"Import {os.path.basename(source_path)}", import_file, source_path, target_path,
+               on_done=lambda _: self._add_imported_card(target_path, folder),
+               on_error=lambda message: QMessageBox.warning(
+                   self, "Warning", f"Không thể import file:\n{source_path}\n{message}"))
+
+    def _add_imported_card(self, path, folder):
+        remote_cache().invalidate(path)
+        if folder != self.folder_path:
+            return  # User đã chuyển sang entity khác trong lúc copy
+        title, text1, text2, text3 = self.extract_metadata(path)
+        new_card = CustomItemWidget(title, path, text1, text2, text3, parent_tab=self,
+                                    thumb_size=self.thumb_level)
+        self.cards.append(new_card)
+        self.selection.select_only(new_card)
 
-            event.acceptProposedAction()
+        if self.view_mode == "list":
+            new_card.switch_view("list")
+            self.list_layout.insertWidget(self.list_layout.count() - 1, new_card)
+        else:
+            new_card.switch_view("thumbnail")
+            self.grid.addWidget(new_card)
+            self.relayout()
 
     def import_dropped_file(self, source_path):
         # Tạo thư mục nếu chưa có
@@ -490,23 +1033,6 @@ class BaseCardTab(QWidget):
             target_path = os.path.join(PRODUCTS_FOLDER, f"{base}_{count}{ext}")
             count += 1
 
-        # Copy file
-        import shutil
-        shutil.copy2(source_path, target_path)
-
-        # Tạo và hiển thị card mới
-        title, text1, text2, text3 = self.extract_metadata(target_path)
-        card = CustomItemWidget(title, target_path, text1, text2, text3, parent_tab=self)
-
-        self.cards.append(card)
-
-        if self.view_mode == "list":
-            card.switch_view("list")
-            self.list_layout.insertWidget(self.list_layout.count() - 1, card)
-        else:
-            card.switch_view("thumbnail")
-            self.grid.addWidget(card)  # ✅ CẦN CÓ để hiển thị
-            self.relayout()
-
-        card.set_selected(True)
+        # Copy file rồi tạo và hiển thị card mới
+        self._import_file(source_path, target_path)
 
@@ -1,6 +1,13 @@
 import os
 from PyQt5.QtGui import QPixmap
+from PyQt5.QtWidgets import QMessageBox
 from tab_presets import BaseCardTab, CustomItemWidget
+from texture_cache import format_file_size
+from product_meta import (
+    ProductMetaCache, ProductMetaWorker, product_pool,
+    format_product_summary, format_product_tooltip
+)
+from publish import latest_publishes, project_root_of
 
 BASE_DIR    = os.path.dirname(__file__)
 LOGO_FOLDER = os.path.join(BASE_DIR, "template", "logo")
@@ -20,6 +27,12 @@ class ProductTab(BaseCardTab):
         super().__init__([])
         self.setAcceptDrops(True)
         self.current_folder = None
+        self.meta_cache = None
+        self._workers = []
+        self._stats = {}            # path -> (tên file, mtime, size)
+        self._cards_by_path = {}    # path -> list card đã tạo (nhiều product có thể chung một object)
+        self._pending = {}          # path -> meta về trước khi card được tạo
+        self._publishes = {}        # path object -> list (product, version, record)
         # Mặc định hiển thị Thumbnail View
         self.set_view_mode("thumbnail")
 
@@ -27,29 +40,26 @@ class ProductTab(BaseCardTab):
         """
         folder_path: ví dụ "<asset_path>"
         Thực chất, nội dung lấy từ "<asset_path>/outputs"
-        Sau khi thu thập hết data, thêm vào self.cards rồi gọi self.relayout()
-        để BaseCardTab tự sắp xếp thumbnail grid.
+        Card được tạo theo lát thời gian (BaseCardTab.build_cards) và thêm
+        thẳng vào thumbnail grid, không chờ duyệt hết folder.
+        Metadata (frame range, số object, up axis...) đọc từ header file ở
+        ProductMetaWorker và cache theo mtime (ProductMetaCache).
+        Bản publish (publishes.json, xem publish.py) lấy thẳng từ index: object trong kho
+        là bất biến nên không stat, metadata cache theo hash. File để trực tiếp trong
+        outputs (chưa publish) vẫn được liệt kê như cũ.
         """
         # 1) Xác định đúng thư mục con "outputs"
         self.current_folder = folder_path
         self.folder_path = folder_path
 
-        # 2) Xoá sạch cards cũ và xóa layout thumb + list
-        self.cards.clear()
-
-        # Xóa các widget cũ trong thumb_container
-        while self.thumb_container.layout().count():
-            item = self.thumb_container.layout().takeAt(0)
-            w = item.widget()
-            if w:
-                w.setParent(None)
-
-        # Xóa các widget cũ trong list_layout (nếu có)
-        while self.list_layout.count():
-            it = self.list_layout.takeAt(0)
-            w = it.widget()
-            if w:
-                w.setParent(None)
+        # 2) Hủy build/worker cũ, xoá sạch cards cũ và xóa layout thumb + list
+        self.clear_cards()
+        self._cancel_workers()
+        self._stats = {}
+        self._cards_by_path = {}
+        self._pending = {}
+        self._publishes = {}
+        self.meta_cache = None
 
         # 3) Nếu folder không tồn tại, để tab trống (self.cards rỗng và tương ứng relayout)
         if not folder_path or not os.path.isdir(folder_path):
@@ -57,33 +67,147 @@ class ProductTab(BaseCardTab):
             self.relayout()
             return
 
-        # 4) Duyệt file trong outputs, lọc các extension có trong LOGO_MAP
-        for fname in sorted(os.listdir(folder_path)):
-            full = os.path.join(folder_path, fname)
-            if not os.path.isfile(full):
-                continue
-            ext = os.path.splitext(fname)[1].lower().lstrip('.')
-            if ext not in LOGO_MAP:
+        try:
+            entries = sorted(
+                (e for e in os.scandir(folder_path)
+                 if e.is_file() and os.path.splitext(e.name)[1].lower().lstrip('.') in LOGO_MAP),
+                key=lambda e: e.name
+            )
+        except OSError:
+            entries = []
+
+        # 4) Đối chiếu cache metadata, file mới / đã đổi được đọc header ở thread nền
+        self.meta_cache = ProductMetaCache(folder_path)
+        jobs = []
+        published = []
+        project_root = project_root_of(folder_path)
+        for product, version, record in latest_publishes(folder_path) if project_root else []:
+            path = os.path.join(project_root, *record["object"].split("/"))
+            if path in self._publishes:
+                # Nội dung trùng product khác (dedupe): cùng object, cùng metadata
+                self._publishes[path].append((product, version, record))
                 continue
+            self._publishes[path] = [(product, version, record)]
+            self._stats[path] = (record["hash"], 0, record["size"])
+            published.append(path)
+            if self.meta_cache.get(record["hash"], 0, record["size"]) is None:
+                jobs.append({"path": path, "size": record["size"]})
+        for entry in entries:
+            st = entry.stat()
+            self._stats[entry.path] = (entry.name, st.st_mtime, st.st_size)
+            if self.meta_cache.get(entry.name, st.st_mtime, st.st_size) is None:
+                jobs.append({"path": entry.path, "size": st.st_size})
+        self.meta_cache.prune([e.name for e in entries] + [self._stats[p][0] for p in published])
+
+        if jobs:
+            self._start_worker(jobs)
+        else:
+            self.meta_cache.save()
+
+        # 5) Tạo card theo lát thời gian, card trong viewport hiện trước
+        self.build_cards(self._iter_cards(published + [e.path for e in entries]))
+
+    def _iter_cards(self, files):
+        """
+        Generator: mỗi lần yield là đã thêm một card vào layout.
+        Dòng text2 là tóm tắt metadata ("…" khi worker chưa đọc xong).
+        """
+        for full, publish in self._card_entries(files):
+            fname, mtime, size = self._stats[full]
+            ext = os.path.splitext(full)[1].lower().lstrip('.')
+            meta = self.meta_cache.get(fname, mtime, size)
 
             # Thiết lập thông tin để hiển thị trên card
-            title = os.path.splitext(fname)[0]
+            title = publish[0] if publish else os.path.splitext(fname)[0]
             text1 = ext
-            text2 = ""
-            size_kb = os.path.getsize(full) / 1024
-            if size_kb < 1024:
-                text3 = f"{size_kb:.1f} KB"
-            else:
-                text3 = f"{(size_kb/1024):.1f} MB"
+            text2 = format_product_summary(meta) if meta else "…"
+            text3 = f"v{publish[1]:03d} · {format_file_size(size)}" if publish else format_file_size(size)
             thumb = LOGO_MAP.get(ext, "")
 
-            # Tạo card và thêm vào self.cards
-            card = CustomItemWidget(title, thumb, text1, text2, text3, parent_tab=self)
+            # Tạo card và thêm vào self.cards + layout
+            card = CustomItemWidget(title, thumb, text1, text2, text3, parent_tab=self,
+                                    thumb_size=self.thumb_level)
             card.file_path = full
-            self.cards.append(card)
+            card.meta = meta
+            if publish:
+                # Object trong kho dùng chung giữa các version / entity: không cho xóa từ card
+                card.delete_file = lambda: QMessageBox.information(
+                    self, "Publish", "Bản publish là bất biến, không xóa được từ Product tab.")
+            card.publish = publish
+            if meta:
+                card.setToolTip(self._tooltip(card, meta, mtime))
+            self._cards_by_path.setdefault(full, []).append(card)
+            self.append_card(card)
+
+            pending = self._pending.get(full)
+            if pending:
+                self._apply_meta(card, pending)
+            yield card
+
+    def _card_entries(self, files):
+        """
+        (path, publish hoặc None) cho từng card: object dùng chung cho nhiều product → nhiều card.
+        """
+        for full in files:
+            for publish in self._publishes.get(full, [None]):
+                yield full, publish
+
+    def _start_worker(self, jobs):
+        worker = ProductMetaWorker(self.current_folder, jobs)
+        worker.setAutoDelete(False)
+        worker.signals.result.connect(self._on_meta_result)
+        worker.signals.finished.connect(self._on_meta_finished)
+        self._workers.append(worker)
+        product_pool().start(worker)
+
+    def _cancel_workers(self):
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+
+    def _tooltip(self, card, meta, mtime):
+        if not card.publish:
+            return format_product_tooltip(meta, mtime)
+        product, version, record = card.publish
+        lines = [
+            f"{product} v{version:03d} — {record.get('stage', '')} · {record.get('user', '')}".rstrip(" ·"),
+            f"Published: {record.get('created', '')} từ {record.get('source') or record.get('file', '')}",
+            format_product_tooltip(meta),
+        ]
+        return "\n".join(line for line in lines if line)
+
+    def _apply_meta(self, card, meta):
+        card.meta = meta
+        card.set_extra_text(1, format_product_summary(meta))
+        card.setToolTip(self._tooltip(card, meta, meta.get("mtime")))
 
-        # 5) Cuối cùng gọi relayout() để BaseCardTab tự sắp các card vào thumbnail grid
-        self.relayout()
+    def can_modify(self, card):
+        # Object trong kho publish là bất biến, không move / xóa hàng loạt
+        return not card.publish
+
+    def on_cards_removed(self, cards):
+        for card in cards:
+            same = self._cards_by_path.get(card.file_path, [])
+            if card in same:
+                same.remove(card)
+
+    def _on_meta_result(self, folder, path, meta):
+        if folder != self.current_folder or path not in self._stats:
+            return
+        name, mtime, _ = self._stats[path]
+        meta = self.meta_cache.put(name, mtime, meta)
+        cards = self._cards_by_path.get(path)
+        if not cards:
+            self._pending[path] = meta
+        for card in cards or []:
+            self._apply_meta(card, meta)
+
+    def _on_meta_finished(self, folder):
+        if folder != self.current_folder or self.meta_cache is None:
+            return
+        self._workers = [w for w in self._workers if w.signals is not self.sender()]
+        if not self._workers:
+            self.meta_cache.save()
 
 
 def create_product_tab():
@@ -2,22 +2,42 @@
 
 import os
 import time
-import json
 import shutil
 
 from PyQt5.QtGui import QPixmap
-from PyQt5.QtCore import Qt, QPoint, QEvent
-from PyQt5.QtWidgets import QWidget, QMenu, QAction, QMessageBox
+from PyQt5.QtCore import Qt, QPoint, QEvent, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QWidget, QMenu, QAction, QMessageBox, QFileDialog
 from tab_presets import BaseCardTab, CustomItemWidget
+from persist import write_json_atomic
+from settings import settings
+from remote_cache import remote_cache
+from jobs import submit, remove_files
+from publish import publish_files, product_name_for, project_root_of
 
 BASE_DIR            = os.path.dirname(__file__)
 BLENDER_ICON        = os.path.join(BASE_DIR, "template", "logo", "logo_blender.jpg")
 BLENDER_TEMPLATE    = os.path.join(BASE_DIR, "template", "app", "blender_template.blend")
-LATEST_PROJECT_FILE = os.path.join(BASE_DIR, "data", "latest_project.json")
+
+
+def create_stage_file(job, dest_path, json_path, metadata):
+    """
+    Chạy ở JobScheduler: copy template .blend thành dest_path và ghi JSON metadata kèm theo.
+    Trả về cảnh báo (chuỗi rỗng nếu không có) để GUI thread hiển thị.
+    """
+    shutil.copy(BLENDER_TEMPLATE, dest_path)
+    # report (không phải điểm hủy): đã copy .blend thì phải ghi nốt JSON đi kèm
+    job.report(70)
+    try:
+        write_json_atomic(json_path, metadata, lock=True, indent=4)
+    except Exception as e:
+        return f"Không thể tạo file JSON metadata:\n{e}"
+    return ""
 
 
 class SceneTab(BaseCardTab):
     """
+    - Chuột phải card → "Publish…": chọn file output, publish vào kho theo hash (publish.py),
+      ghi version vào <entity>/outputs/publishes.json rồi emit published(outputs_folder).
     Tab Scene hiển thị tất cả file .blend trong <asset_or_shot>/scenefiles> ở chế độ List View.
     - Dùng eventFilter để bắt QEvent.ContextMenu (right-click).
     - Nếu nhấn phải lên một CustomItemWidget (card), bỏ qua (card có menu riêng).
@@ -30,7 +50,7 @@ class SceneTab(BaseCardTab):
         "name": "<tên asset/shot>",
         "type": "<chỉ Asset mới có: ví dụ \"character\">",
         "stage": "<Modeling/Texturing/... hoặc Animation/...>",
-        "user": "<username lấy từ latest_user.json>",
+        "user": "<username đăng nhập, lấy từ Settings>",
         "version": "001",
         "created": "YYYY-MM-DD HH:MM"
       }
@@ -42,20 +62,23 @@ class SceneTab(BaseCardTab):
     - Mỗi khi bấm “Delete” trên một card, ngoài việc xoá file .blend, cũng sẽ xoá luôn file .json đi kèm.
     """
 
+    published = pyqtSignal(str)
+
     def __init__(self):
         super().__init__([])
         self.setAcceptDrops(True)
         self.current_folder = None
+        self._publish_job = None
 
-        # --- Khởi tạo project_root (đường dẫn tới thư mục dự án) từ latest_project.json ---
-        self.project_root = ""
-        try:
-            with open(LATEST_PROJECT_FILE, "r", encoding="utf-8") as f:
-                proj_data = json.load(f)
-            # latest_project.json phải có trường "path": "<project_root>"
-            self.project_root = proj_data.get("path", "")
-        except Exception:
-            self.project_root = ""
+        # --- project_root (đường dẫn tới thư mục dự án) lấy từ Settings, cập nhật khi đổi project ---
+        self.project_root = settings().project_path()
+        settings().changed.connect(self._on_setting_changed)
+
+        self._reload_timer = QTimer(self)
+        self._reload_timer.setSingleShot(True)
+        self._reload_timer.setInterval(500)
+        self._reload_timer.timeout.connect(lambda: self.load_from(self.current_folder))
+        remote_cache().changed.connect(self._on_remote_changed)
         # ------------------------------------------------------------------------------
 
         # Mặc định hiển thị List View
@@ -64,6 +87,20 @@ class SceneTab(BaseCardTab):
         # Cài eventFilter để bắt QEvent.ContextMenu trên scroll_list.viewport()
         self.scroll_list.viewport().installEventFilter(self)
 
+    def _on_remote_changed(self, path):
+        # Mirror Drive phát hiện folder đang xem, JSON trong đó hoặc JSON entity đổi → nạp lại
+        if not self.current_folder:
+            return
+        folder = os.path.normcase(self.current_folder)
+        changed = os.path.normcase(path)
+        if changed == folder or (changed.endswith(".json")
+                                 and os.path.dirname(changed) in (folder, os.path.dirname(folder))):
+            self._reload_timer.start()
+
+    def _on_setting_changed(self, key, value):
+        if key == "project":
+            self.project_root = settings().project_path()
+
     def load_from(self, folder_path):
         """
         folder_path: ví dụ "<asset_or_shot>/scenefiles"
@@ -73,16 +110,11 @@ class SceneTab(BaseCardTab):
         """
         self.current_folder = folder_path
 
-        # 1) Xóa hết card cũ
-        self.cards.clear()
-        while self.list_layout.count():
-            item = self.list_layout.takeAt(0)
-            w = item.widget()
-            if w:
-                w.setParent(None)
+        # 1) Hủy build cũ (nếu đang chạy dở) và xóa hết card cũ
+        self.clear_cards()
 
         # 2) Nếu folder không tồn tại hoặc không phải thư mục → hiển thị trống
-        if not folder_path or not os.path.isdir(folder_path):
+        if not folder_path or not remote_cache().isdir(folder_path):
             self.set_view_mode("list")
             self.relayout_list()
             return
@@ -118,11 +150,9 @@ class SceneTab(BaseCardTab):
 
         # 5) Nếu JSON metadata toàn entity tồn tại, load để lấy base_version, entity_created, entity_user
         metadata_entity = {}
-        if json_entity and os.path.exists(json_entity):
-            try:
-                with open(json_entity, "r", encoding="utf-8") as jf:
-                    metadata_entity = json.load(jf)
-            except Exception:
+        if json_entity:
+            metadata_entity = remote_cache().read_json(json_entity, {})
+            if not isinstance(metadata_entity, dict):
                 metadata_entity = {}
 
         base_version   = metadata_entity.get("version", 1)
@@ -137,14 +167,26 @@ class SceneTab(BaseCardTab):
         else:
             all_stages = []
 
-        # 7) Duyệt từng file .blend trong folder, sorted để giữ thứ tự
+        # 7) Duyệt từng file .blend trong folder theo lát thời gian (card đầu hiện trước)
+        # 8) Chuyển view; relayout_list() được gọi khi build xong
+        self.set_view_mode("list")
+        self.build_cards(self._iter_cards(
+            folder_path, all_stages, base_version, entity_created, entity_user
+        ))
+
+    def _iter_cards(self, folder_path, all_stages, base_version, entity_created, entity_user):
+        """
+        Generator: duyệt file .blend (sorted để giữ thứ tự), mỗi lần yield là đã
+        tạo xong một card và thêm vào list.
+        """
         exts = {'.blend'}
-        for fname in sorted(os.listdir(folder_path)):
-            full = os.path.join(folder_path, fname)
-            if not os.path.isfile(full):
-                continue
+        cache = remote_cache()
+        for fname, is_dir in cache.listdir(folder_path):
             if os.path.splitext(fname)[1].lower() not in exts:
                 continue
+            full = os.path.join(folder_path, fname)
+            if is_dir:
+                continue
 
             # Tách stage từ filename
             name_no_ext = os.path.splitext(fname)[0]
@@ -163,13 +205,8 @@ class SceneTab(BaseCardTab):
 
             # Đọc file JSON riêng cho file .blend này (nếu có)
             json_per_file = os.path.join(folder_path, name_no_ext + ".json")
-            if os.path.exists(json_per_file):
-                try:
-                    with open(json_per_file, "r", encoding="utf-8") as jf:
-                        info = json.load(jf)
-                except Exception:
-                    info = {}
-            else:
+            info = cache.read_json(json_per_file, {})
+            if not isinstance(info, dict):
                 info = {}
 
             version = info.get("version", base_version)
@@ -200,41 +237,25 @@ class SceneTab(BaseCardTab):
             # --- GHI ĐÈ phương thức delete_file để khi xóa .blend cũng xóa luôn .json ---
             def make_delete_func(blend_path, parent_tab):
                 def delete_with_json():
-                    # 1) Xóa file .blend
-                    try:
-                        os.remove(blend_path)
-                    except Exception:
-                        pass
-
-                    # 2) Xóa thêm file JSON cùng tên (đổi .blend -> .json)
+                    # Xóa file .blend và file JSON cùng tên (đổi .blend -> .json) ở JobScheduler
                     json_path = os.path.splitext(blend_path)[0] + ".json"
-                    if os.path.exists(json_path):
-                        try:
-                            os.remove(json_path)
-                        except Exception:
-                            pass
-
-                    # 3) Reload lại list
-                    parent_tab.load_from(parent_tab.current_folder)
+
+                    def reload(_):
+                        # Reload lại list
+                        remote_cache().invalidate(blend_path)
+                        remote_cache().invalidate(json_path)
+                        parent_tab.load_from(parent_tab.current_folder)
+
+                    submit(f"Delete {os.path.basename(blend_path)}", remove_files, [blend_path, json_path],
+                           retries=1, on_done=reload, on_error=reload)
                 return delete_with_json
 
             # Gán lại delete_file cho mỗi card
             card.delete_file = make_delete_func(card.file_path, self)
             # --------------------------------------------------------------------
 
-            self.cards.append(card)
-            self.list_layout.addWidget(card)
-
-        # 8) Chuyển view và relayout
-        self.set_view_mode("list")
-        self.relayout_list()
-
-    def clear_selection(self):
-        """
-        Bỏ chọn hết tất cả các card (CustomItemWidget) hiện tại.
-        """
-        for c in self.cards:
-            c.set_selected(False)
+            self.append_card(card)
+            yield card
 
     def eventFilter(self, obj, evt):
         """
@@ -299,18 +320,11 @@ class SceneTab(BaseCardTab):
             return
 
         # 2) Lấy project_short
-        project_short = ""
-        if os.path.exists(LATEST_PROJECT_FILE):
-            try:
-                with open(LATEST_PROJECT_FILE, "r", encoding="utf-8") as f:
-                    proj_data = json.load(f)
-                project_short = proj_data.get("short", "")
-            except Exception:
-                project_short = ""
+        project_short = settings().project_short()
         if not project_short:
             QMessageBox.warning(
                 self, "Warning",
-                "Không tìm thấy project_short trong latest_project.json.\n"
+                "Không tìm thấy project_short của project đang mở.\n"
                 "Không thể tạo file .blend mới."
             )
             return
@@ -358,27 +372,12 @@ class SceneTab(BaseCardTab):
             )
             return
 
-        try:
-            shutil.copy(BLENDER_TEMPLATE, dest_path)
-        except Exception as e:
-            QMessageBox.critical(self, "Lỗi", f"Không thể tạo file .blend:\n{e}")
-            return
-
-        # 8) Tạo file JSON metadata cùng tên với .blend
+        # 8) Metadata cho file JSON cùng tên với .blend
         name_no_ext = os.path.splitext(new_filename)[0]
         json_path   = os.path.join(self.current_folder, f"{name_no_ext}.json")
 
-        # Lấy user_name từ latest_user.json (nằm trong <project_root>/00_Pipeline/data/latest_user.json)
-        user_name = ""
-        if self.project_root:
-            latest_user_file = os.path.join(BASE_DIR, "data", "latest_user.json")
-            if os.path.exists(latest_user_file):
-                try:
-                    with open(latest_user_file, "r", encoding="utf-8") as uf:
-                        udata = json.load(uf)
-                    user_name = udata.get("last_user", "")
-                except Exception:
-                    user_name = ""
+        # Lấy user_name của user đăng nhập (Settings)
+        user_name = settings().user() if self.project_root else ""
 
         # Lấy timestamp hiện tại
         timestamp   = time.strftime("%Y-%m-%d %H:%M", time.localtime())
@@ -394,21 +393,82 @@ class SceneTab(BaseCardTab):
         if mode == "asset":
             metadata["type"] = category
 
-        try:
-            with open(json_path, "w", encoding="utf-8") as jf:
-                json.dump(metadata, jf, ensure_ascii=False, indent=4)
-        except Exception as e:
-            QMessageBox.warning(self, "Warning", f"Không thể tạo file JSON metadata:\n{e}")
+        # Copy template + ghi JSON ở JobScheduler
+        submit(f"Create {new_filename}", create_stage_file, dest_path, json_path, metadata,
+               on_done=lambda warning: self._on_stage_file_created(dest_path, json_path, warning),
+               on_error=lambda message: QMessageBox.critical(
+                   self, "Lỗi", f"Không thể tạo file .blend:\n{message}"))
 
-        # 9) Reload folder để hiển thị ngay file mới
+    def _on_stage_file_created(self, dest_path, json_path, warning):
+        if warning:
+            QMessageBox.warning(self, "Warning", warning)
+
+        # 9) Reload folder để hiển thị ngay file mới (build hết để tìm được card mới)
+        remote_cache().invalidate(dest_path)
+        remote_cache().invalidate(json_path)
         self.load_from(self.current_folder)
-        
-        # 10) Bỏ chọn các card cũ, rồi chọn riêng card mới vừa tạo
-        self.clear_selection()
+        self.card_builder.finish()
+
+        # 10) Chọn riêng card mới vừa tạo
         for card in self.cards:
             if card.file_path == dest_path:
-                card.set_selected(True)
+                self.selection.select_only(card)
                 break
 
+    def card_files(self, card):
+        # Thao tác hàng loạt: file .blend kèm file JSON cùng tên (như delete_with_json)
+        return (card.file_path, os.path.splitext(card.file_path)[0] + ".json")
+
+    # ---------- Publish ----------
+
+    def extend_card_menu(self, menu, card):
+        menu.addSeparator()
+        action = menu.addAction("Publish…", lambda: self.publish_from(card))
+        action.setEnabled(bool(self.current_folder and project_root_of(self.current_folder))
+                          and self._publish_job is None)
+
+    def publish_from(self, card):
+        """
+        Publish file output của scene card: chọn file (mặc định trong <entity>/outputs),
+        mỗi file là một product (tên file bỏ hậu tố _v###), chạy publish_files ở JobScheduler
+        (tiến độ / hủy / thử lại ở dock Jobs).
+        """
+        entity_dir = os.path.dirname(self.current_folder)
+        outputs = os.path.join(entity_dir, "outputs")
+        files, _ = QFileDialog.getOpenFileNames(
+            self, "Chọn file để publish", outputs if os.path.isdir(outputs) else entity_dir,
+            "Outputs (*.abc *.fbx *.usd *.usda *.usdc *.blend);;All files (*)"
+        )
+        if not files:
+            return
+        context = {
+            "stage":  card.title,
+            "user":   settings().user(),
+            "source": os.path.basename(card.file_path or ""),
+        }
+        items = [(f, product_name_for(f)) for f in files]
+        self._publish_job = submit(
+            f"Publish {len(items)} file", publish_files, project_root_of(self.current_folder), outputs, items,
+            context, on_done=lambda result: self._on_publish_done(outputs, *result),
+            on_error=lambda message: QMessageBox.warning(self, "Publish", message),
+            on_finished=self._on_publish_finished
+        )
+
+    def _on_publish_finished(self, job):
+        if job is self._publish_job:
+            self._publish_job = None
+
+    def _on_publish_done(self, outputs, results, errors):
+        lines = []
+        for r in results:
+            state = f"v{r['version']:03d}" if r["new"] else f"v{r['version']:03d} (không đổi)"
+            lines.append(f"{r['product']}: {state}{' · đã có trong kho' if r['deduped'] else ''}")
+        lines += [f"{os.path.basename(src)}: lỗi {err}" for src, err in errors]
+        if results:
+            self.published.emit(outputs)
+        if lines:
+            (QMessageBox.warning if errors else QMessageBox.information)(self, "Publish", "\n".join(lines))
+
+
 def create_scene_tab():
     return SceneTab()
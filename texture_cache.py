@@ -0,0 +1,192 @@
+# texture_cache.py
+
+import os
+import json
+import hashlib
+from concurrent.futures import as_completed
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from persist import write_json_atomic
+from texture_decoders import (
+    color_space_hint, decode_preview, needs_process_pool, has_process_decoder, get_executor, preview_to_qimage
+)
+from thumb_cache import THUMB_LEVELS, load_level, save_pyramid
+
+BASE_DIR  = os.path.dirname(__file__)
+CACHE_DIR = os.path.join(BASE_DIR, "data", "cache", "texmeta")
+
+
+def format_file_size(size_bytes):
+    size_kb = size_bytes / 1024
+    if size_kb < 1024:
+        return f"{size_kb:.1f} KB"
+    return f"{(size_kb/1024):.1f} MB"
+
+
+def format_resolution(meta):
+    if meta and meta.get("width") and meta.get("height"):
+        return f"{meta['width']}×{meta['height']}"
+    return ""
+
+
+class TextureMetaCache:
+    """
+    Cache metadata texture cho một folder, lưu tại data/cache/texmeta/<hash folder>.json.
+    Mỗi entry được xác thực bằng (mtime, size) của file; sai lệch → coi như chưa có.
+    Lớp con đổi cache_dir để dùng cho loại file khác (ví dụ product_meta).
+    """
+    cache_dir = CACHE_DIR
+
+    def __init__(self, folder):
+        self.folder = folder
+        key = hashlib.sha1(os.path.normcase(os.path.abspath(folder)).encode("utf-8")).hexdigest()
+        self.cache_file = os.path.join(self.cache_dir, f"{key}.json")
+        self.entries = {}
+        self._dirty = False
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("folder") == folder:
+                self.entries = data.get("entries", {})
+        except Exception:
+            self.entries = {}
+
+    def get(self, name, mtime, size):
+        meta = self.entries.get(name)
+        if meta and meta.get("mtime") == mtime and meta.get("file_size") == size:
+            return meta
+        return None
+
+    def put(self, name, mtime, meta):
+        meta = dict(meta, mtime=mtime)
+        self.entries[name] = meta
+        self._dirty = True
+        return meta
+
+    def prune(self, names):
+        """
+        Bỏ entry của các file không còn trong folder.
+        """
+        for name in set(self.entries) - set(names):
+            del self.entries[name]
+            self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        try:
+            write_json_atomic(self.cache_file, {"folder": self.folder, "entries": self.entries}, indent=None)
+            self._dirty = False
+        except Exception:
+            pass
+
+
+_pool = None
+
+
+def texture_pool():
+    """
+    QThreadPool riêng cho TextureMetaWorker. Không dùng QThreadPool.globalInstance():
+    Qt dùng chính pool đó để scale ảnh lớn (SmoothTransformation) ngay trong GUI thread,
+    worker Python chiếm hết pool rồi chờ GIL sẽ làm GUI thread treo.
+    """
+    global _pool
+    if _pool is None:
+        _pool = QThreadPool()
+        _pool.setMaxThreadCount(2)
+    return _pool
+
+
+class TextureWorkerSignals(QObject):
+    # (folder, path, meta hoặc None, QImage thumbnail hoặc None, mức thumbnail)
+    result = pyqtSignal(str, str, object, object, int)
+    finished = pyqtSignal(str)
+
+
+class TextureMetaWorker(QRunnable):
+    """
+    Chạy ở QThreadPool: với mỗi file, đọc metadata (nếu cache chưa có)
+    và lấy thumbnail ở mức level (nếu QPixmapCache chưa có).
+    - Thumbnail lấy từ pyramid trên đĩa (thumb_cache) nếu đã có; chưa có thì decode
+      ảnh gốc một lần ở mức lớn nhất rồi lưu mọi mức, để zoom sau không decode lại.
+    - Định dạng Qt đọc được (PNG/JPG/TGA/TIFF 8-16 bit) decode ngay trong thread này.
+    - EXR / ảnh float được gửi sang ProcessPoolExecutor; chỉ preview RGBA nhỏ quay về.
+    Emit kết quả từng file về GUI thread.
+    jobs: list dict {path, size, mtime, meta (có thể None), need_thumb}
+    """
+
+    def __init__(self, folder, jobs, level):
+        super().__init__()
+        self.folder = folder
+        self.jobs = jobs
+        self.level = level
+        self.cancelled = False
+        self.signals = TextureWorkerSignals()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _emit(self, job, result, image=None):
+        meta = job.get("meta")
+        new_meta = None
+        if result:
+            preview = result.pop("preview", None)
+            if meta is None:
+                new_meta = dict(result, file_size=job["size"])
+                # Tên file chỉ rõ map dữ liệu (normal/rough/...) thì ưu tiên "Non-Color"
+                hint = color_space_hint(job["path"], result.get("bit_depth", 0))
+                if hint != "Non-Color" and result.get("color_space"):
+                    hint = result["color_space"]
+                new_meta["color_space"] = hint
+            if preview and image is None and job.get("need_thumb"):
+                levels = save_pyramid(job["path"], job["mtime"], job["size"], preview_to_qimage(preview))
+                image = levels.get(self.level)
+        try:
+            self.signals.result.emit(self.folder, job["path"], new_meta, image, self.level)
+        except RuntimeError:
+            # App đang thoát, signals đã bị xoá → dừng luôn phần còn lại
+            self.cancelled = True
+
+    def run(self):
+        max_side = max(THUMB_LEVELS)
+        futures = {}
+        for job in self.jobs:
+            if self.cancelled:
+                break
+            path = job["path"]
+            image = None
+            if job.get("need_thumb"):
+                image = load_level(path, job["mtime"], job["size"], self.level)
+            side = max_side if job.get("need_thumb") and image is None else 0
+            if side == 0 and job.get("meta") is not None:
+                self._emit(job, None, image)
+                continue
+
+            result = None
+            # Decoder chạy trong thread trước; chỉ header (side = 0) thì không cần process pool
+            if not (side and needs_process_pool(path)):
+                try:
+                    result = decode_preview(path, side, in_process=False)
+                except Exception:
+                    result = None
+            if result is None and has_process_decoder(path):
+                futures[get_executor().submit(decode_preview, path, side, True)] = (job, image)
+                continue
+            self._emit(job, result, image)
+
+        for fut in as_completed(futures):
+            if self.cancelled:
+                for other in futures:
+                    other.cancel()
+                break
+            try:
+                result = fut.result()
+            except Exception:
+                result = None
+            job, image = futures[fut]
+            self._emit(job, result, image)
+        try:
+            self.signals.finished.emit(self.folder)
+        except RuntimeError:
+            pass
@@ -0,0 +1,423 @@
+# texture_decoders.py
+"""
+Registry decoder cho preview texture.
+
+- Mỗi decoder đăng ký cho một nhóm extension qua @register_decoder(...).
+  Một extension có thể có nhiều decoder, thử lần lượt theo thứ tự đăng ký
+  (decoder thiếu thư viện hoặc lỗi → thử decoder tiếp theo).
+- Decoder trả về dict metadata (width, height, channels, bit_depth, format,
+  color_space) và nếu max_side > 0 thì thêm "preview": (w, h, bytes RGBA8888)
+  đã thu nhỏ, cạnh dài <= max_side. Chỉ preview nhỏ này được gửi về UI.
+- Decoder có in_process=True (EXR, TIFF/TGA float, ...) chạy trong
+  ProcessPoolExecutor để ảnh float lớn không giữ GIL và không làm phình process GUI.
+- Module này chỉ dùng QtGui (QImage / QImageReader), không import widget hay module
+  khác của app, để process con spawn nhẹ; texture_cache import từ đây (một chiều).
+"""
+
+import os
+import struct
+import atexit
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # numpy là tùy chọn, chỉ cần cho EXR / ảnh float
+    np = None
+
+try:
+    import OpenEXR
+except ImportError:
+    OpenEXR = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from PyQt5.QtCore import QSize, Qt
+from PyQt5.QtGui import QImage, QImageReader
+
+# Hậu tố tên file → gợi ý color space (quy ước đặt tên texture thông dụng)
+NON_COLOR_HINTS = (
+    "normal", "nrm", "nor", "rough", "roughness", "metal", "metallic", "metalness",
+    "ao", "occlusion", "disp", "displacement", "height", "bump", "mask", "spec", "gloss",
+)
+SRGB_HINTS = ("albedo", "diffuse", "diff", "basecolor", "base", "color", "col")
+
+# QImage.Format → (số kênh, bit / kênh)
+_FORMAT_INFO = {
+    QImage.Format_Mono:                   (1, 1),
+    QImage.Format_MonoLSB:                (1, 1),
+    QImage.Format_Indexed8:               (3, 8),
+    QImage.Format_Grayscale8:             (1, 8),
+    QImage.Format_Alpha8:                 (1, 8),
+    QImage.Format_RGB32:                  (3, 8),
+    QImage.Format_RGB888:                 (3, 8),
+    QImage.Format_RGBX8888:               (3, 8),
+    QImage.Format_ARGB32:                 (4, 8),
+    QImage.Format_ARGB32_Premultiplied:   (4, 8),
+    QImage.Format_RGBA8888:               (4, 8),
+    QImage.Format_RGBA8888_Premultiplied: (4, 8),
+    QImage.Format_RGB16:                  (3, 5),
+    QImage.Format_RGB30:                  (3, 10),
+    QImage.Format_BGR30:                  (3, 10),
+    QImage.Format_A2RGB30_Premultiplied:  (4, 10),
+    QImage.Format_A2BGR30_Premultiplied:  (4, 10),
+}
+for _name, _info in (("Format_Grayscale16", (1, 16)), ("Format_RGBX64", (3, 16)),
+                     ("Format_RGBA64", (4, 16)), ("Format_RGBA64_Premultiplied", (4, 16))):
+    if hasattr(QImage, _name):  # Qt >= 5.12/5.13
+        _FORMAT_INFO[getattr(QImage, _name)] = _info
+
+
+def color_space_hint(filename, bit_depth):
+    """
+    Đoán color space từ tên file: map dữ liệu (normal/rough/...) → "Non-Color",
+    map màu → "sRGB", ảnh 16-bit trở lên không rõ loại → "Linear".
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0].lower()
+    tokens = stem.replace("-", "_").replace(".", "_").split("_")
+    if any(t in NON_COLOR_HINTS for t in tokens):
+        return "Non-Color"
+    if any(t in SRGB_HINTS for t in tokens):
+        return "sRGB"
+    return "Linear" if bit_depth and bit_depth > 8 else "sRGB"
+
+
+_REGISTRY = {}      # ext -> [Decoder]
+_executor = None
+
+
+class Decoder:
+    def __init__(self, name, func, in_process, available):
+        self.name = name
+        self.func = func
+        self.in_process = in_process
+        self.available = available
+
+
+def register_decoder(exts, name=None, in_process=False, available=None):
+    """
+    Decorator đăng ký decoder: func(path, max_side) -> dict.
+    available: callable trả về False khi thiếu thư viện (decoder bị bỏ qua).
+    """
+    def wrap(func):
+        dec = Decoder(name or func.__name__, func, in_process, available or (lambda: True))
+        for ext in exts:
+            _REGISTRY.setdefault(ext.lower(), []).append(dec)
+        return func
+    return wrap
+
+
+def decoders_for(path):
+    ext = os.path.splitext(path)[1].lower()
+    return [d for d in _REGISTRY.get(ext, []) if d.available()]
+
+
+def supported_extensions():
+    return {ext for ext, decs in _REGISTRY.items() if any(d.available() for d in decs)}
+
+
+def needs_process_pool(path):
+    decs = decoders_for(path)
+    return bool(decs) and decs[0].in_process
+
+
+def has_process_decoder(path):
+    return any(d.in_process for d in decoders_for(path))
+
+
+def decode_preview(path, max_side, in_process=None):
+    """
+    Chạy lần lượt các decoder của extension tới khi có kết quả.
+    in_process: None = mọi decoder, True/False = chỉ decoder chạy trong / ngoài process pool.
+    Hàm top-level để ProcessPoolExecutor pickle được.
+    """
+    last_error = None
+    for dec in decoders_for(path):
+        if in_process is not None and dec.in_process != in_process:
+            continue
+        try:
+            result = dec.func(path, max_side)
+        except Exception as e:
+            last_error = e
+            continue
+        if result:
+            result.setdefault("decoder", dec.name)
+            return result
+    if last_error:
+        raise last_error
+    raise ValueError(f"Không có decoder cho {path}")
+
+
+def get_executor():
+    """
+    ProcessPoolExecutor dùng chung, tạo khi cần lần đầu.
+    Luôn dùng "spawn" (như Windows) để không fork một process GUI đang có nhiều thread.
+    """
+    global _executor
+    if _executor is None:
+        workers = max(1, min(4, (os.cpu_count() or 2) - 1))
+        _executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+@atexit.register
+def _shutdown_executor():
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+
+
+# ---------- Tiện ích chuyển đổi ----------
+
+def _tonemap_to_rgba8(arr):
+    """
+    arr: numpy float (h, w, c). Reinhard x/(1+x) rồi gamma 2.2 → uint8 RGBA.
+    """
+    arr = np.nan_to_num(arr.astype(np.float32, copy=False), nan=0.0, posinf=65504.0, neginf=0.0)
+    h, w = arr.shape[:2]
+    c = arr.shape[2] if arr.ndim == 3 else 1
+    if c == 1:
+        rgb = np.repeat(arr.reshape(h, w, 1), 3, axis=2)
+    else:
+        rgb = arr[..., :3] if c >= 3 else np.repeat(arr[..., :1], 3, axis=2)
+    rgb = np.clip(rgb, 0.0, None)
+    rgb = rgb / (1.0 + rgb)
+    rgb = np.power(rgb, 1.0 / 2.2)
+    out = np.empty((h, w, 4), dtype=np.uint8)
+    out[..., :3] = np.clip(rgb * 255.0 + 0.5, 0, 255).astype(np.uint8)
+    out[..., 3] = np.clip(arr[..., 3] * 255.0 + 0.5, 0, 255).astype(np.uint8) if c >= 4 else 255
+    return out
+
+
+def _int_to_rgba8(arr, bit_depth):
+    """
+    arr: numpy uint8/uint16 (h, w[, c]) → uint8 RGBA (không tone-map).
+    """
+    if bit_depth > 8:
+        arr = (arr.astype(np.uint32) >> (bit_depth - 8)).astype(np.uint8)
+    else:
+        arr = arr.astype(np.uint8, copy=False)
+    h, w = arr.shape[:2]
+    c = arr.shape[2] if arr.ndim == 3 else 1
+    out = np.empty((h, w, 4), dtype=np.uint8)
+    if c == 1:
+        out[..., :3] = arr.reshape(h, w, 1)
+    else:
+        out[..., :3] = arr[..., :3] if c >= 3 else arr[..., :1]
+    out[..., 3] = arr[..., 3] if c >= 4 else 255
+    return out
+
+
+def _stride_for(width, height, max_side):
+    # Lấy mẫu cách quãng xuống ~2× kích thước preview, UI sẽ scale mượt phần còn lại
+    if max_side <= 0:
+        return 1
+    return max(1, max(width, height) // (max_side * 2))
+
+
+def _preview_tuple(rgba):
+    rgba = np.ascontiguousarray(rgba)
+    h, w = rgba.shape[:2]
+    return (w, h, rgba.tobytes())
+
+
+# ---------- EXR ----------
+
+_EXR_MAGIC = 20000630
+_EXR_PIXEL_BITS = {0: 32, 1: 16, 2: 32}  # UINT, HALF, FLOAT
+
+
+def read_exr_header(path):
+    """
+    Đọc header EXR thuần Python (không cần OpenEXR): dataWindow và danh sách channel.
+    """
+    with open(path, "rb") as f:
+        magic, _version = struct.unpack("<ii", f.read(8))
+        if magic != _EXR_MAGIC:
+            raise ValueError("Không phải file OpenEXR")
+
+        def read_cstr():
+            buf = bytearray()
+            while True:
+                ch = f.read(1)
+                if not ch or ch == b"\0":
+                    return buf.decode("latin-1")
+                buf += ch
+
+        attrs = {}
+        while True:
+            name = read_cstr()
+            if not name:
+                break
+            attr_type = read_cstr()
+            size = struct.unpack("<i", f.read(4))[0]
+            data = f.read(size)
+            if name in ("dataWindow", "displayWindow") and attr_type == "box2i":
+                attrs[name] = struct.unpack("<iiii", data)
+            elif name == "channels" and attr_type == "chlist":
+                channels = []
+                pos = 0
+                while pos < len(data) and data[pos] != 0:
+                    end = data.index(b"\0", pos)
+                    ch_name = data[pos:end].decode("latin-1")
+                    pixel_type = struct.unpack("<i", data[end + 1:end + 5])[0]
+                    channels.append((ch_name, pixel_type))
+                    pos = end + 1 + 16
+                attrs["channels"] = channels
+            elif name == "compression" and attr_type == "compression":
+                attrs["compression"] = data[0]
+
+    xmin, ymin, xmax, ymax = attrs.get("dataWindow", (0, 0, -1, -1))
+    channels = attrs.get("channels", [])
+    bits = max((_EXR_PIXEL_BITS.get(t, 16) for _, t in channels), default=16)
+    return {
+        "width":       xmax - xmin + 1,
+        "height":      ymax - ymin + 1,
+        "channels":    len(channels),
+        "bit_depth":   bits,
+        "color_space": "Linear",
+        "format":      "exr",
+        "hdr":         True,
+    }
+
+
+def _exr_pixels(path):
+    """
+    Đọc pixel EXR thành numpy float (h, w, c), hỗ trợ API OpenEXR 3.x và API cũ (InputFile).
+    """
+    if hasattr(OpenEXR, "File"):
+        with OpenEXR.File(path, separate_channels=True) as exr:
+            chans = exr.channels()
+            names = [n for n in ("R", "G", "B", "A") if n in chans] or sorted(chans)[:4]
+            planes = [np.asarray(chans[n].pixels, dtype=np.float32) for n in names]
+        return np.stack(planes, axis=-1)
+
+    import Imath
+    exr = OpenEXR.InputFile(path)
+    header = exr.header()
+    dw = header["dataWindow"]
+    w, h = dw.max.x - dw.min.x + 1, dw.max.y - dw.min.y + 1
+    names = [n for n in ("R", "G", "B", "A") if n in header["channels"]] or sorted(header["channels"])[:4]
+    pt = Imath.PixelType(Imath.PixelType.FLOAT)
+    planes = [np.frombuffer(exr.channel(n, pt), dtype=np.float32).reshape(h, w) for n in names]
+    return np.stack(planes, axis=-1)
+
+
+@register_decoder([".exr"], name="openexr", in_process=True,
+                  available=lambda: OpenEXR is not None and np is not None)
+def decode_exr(path, max_side):
+    meta = read_exr_header(path)
+    if max_side > 0:
+        arr = _exr_pixels(path)
+        step = _stride_for(arr.shape[1], arr.shape[0], max_side)
+        meta["preview"] = _preview_tuple(_tonemap_to_rgba8(arr[::step, ::step]))
+    return meta
+
+
+@register_decoder([".exr"], name="exr-header")
+def decode_exr_header_only(path, max_side):
+    # Không có OpenEXR/numpy: vẫn hiển thị được kích thước + channel, không có preview
+    return read_exr_header(path)
+
+
+# ---------- Qt (PNG/JPG/BMP/TGA/TIFF 8-16 bit) ----------
+
+def read_texture_meta(path, file_size):
+    """
+    Đọc metadata từ header ảnh (không decode pixel).
+    Trả về dict: width, height, channels, bit_depth, color_space, format, file_size.
+    """
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    size = reader.size()
+    channels, bit_depth = _FORMAT_INFO.get(reader.imageFormat(), (0, 0))
+    return {
+        "width":       size.width() if size.isValid() else 0,
+        "height":      size.height() if size.isValid() else 0,
+        "channels":    channels,
+        "bit_depth":   bit_depth,
+        "color_space": color_space_hint(path, bit_depth),
+        "format":      bytes(reader.format()).decode("ascii", "ignore"),
+        "file_size":   file_size,
+    }
+
+
+def _qt_can_read(path):
+    reader = QImageReader(path)
+    return reader.canRead()
+
+
+@register_decoder([".png", ".jpg", ".jpeg", ".bmp", ".tga", ".tif", ".tiff"], name="qt")
+def decode_qt(path, max_side):
+    """
+    Decoder mặc định: QImageReader (đọc được PNG 16-bit, TGA, TIFF 8/16-bit nguyên).
+    Chạy ngay trong thread của worker vì Qt nhả GIL khi decode.
+    """
+    if not _qt_can_read(path):
+        return None
+    meta = read_texture_meta(path, os.path.getsize(path))
+    if not meta.get("width"):
+        return None
+    if max_side > 0:
+        reader = QImageReader(path)
+        reader.setAutoTransform(True)
+        w, h = meta["width"], meta["height"]
+        scale = min(1.0, max_side / max(w, h))
+        reader.setScaledSize(QSize(max(1, int(w * scale)), max(1, int(h * scale))))
+        image = reader.read()
+        if image.isNull():
+            return None
+        image = image.convertToFormat(QImage.Format_RGBA8888)
+        ptr = image.constBits()
+        ptr.setsize(image.sizeInBytes() if hasattr(image, "sizeInBytes") else image.byteCount())
+        data = bytes(ptr)
+        if image.bytesPerLine() != image.width() * 4:
+            bpl = image.bytesPerLine()
+            data = b"".join(data[y * bpl:y * bpl + image.width() * 4] for y in range(image.height()))
+        meta["preview"] = (image.width(), image.height(), data)
+    return meta
+
+
+# ---------- Pillow (TIFF/TGA float hoặc biến thể Qt không đọc được) ----------
+
+_PIL_MODE_BITS = {"1": 1, "L": 8, "P": 8, "RGB": 8, "RGBA": 8, "I;16": 16, "I;16B": 16, "I": 32, "F": 32}
+
+
+@register_decoder([".tif", ".tiff", ".tga", ".png"], name="pillow", in_process=True,
+                  available=lambda: Image is not None and np is not None)
+def decode_pillow(path, max_side):
+    with Image.open(path) as im:
+        w, h = im.size
+        bands = len(im.getbands())
+        bits = _PIL_MODE_BITS.get(im.mode, 8)
+        meta = {
+            "width": w, "height": h, "channels": bands, "bit_depth": bits,
+            "format": (im.format or "").lower(),
+            "color_space": "Linear" if im.mode in ("F", "I") else "sRGB",
+        }
+        if max_side > 0:
+            im.draft(im.mode, (max_side * 2, max_side * 2))
+            arr = np.asarray(im)
+            step = _stride_for(arr.shape[1], arr.shape[0], max_side)
+            arr = arr[::step, ::step]
+            if im.mode in ("F", "I"):
+                rgba = _tonemap_to_rgba8(arr.astype(np.float32) / (1.0 if im.mode == "F" else 65535.0))
+            else:
+                rgba = _int_to_rgba8(arr, 16 if bits == 16 else 8)
+            meta["preview"] = _preview_tuple(rgba)
+    return meta
+
+
+def preview_to_qimage(preview, thumb_size=None):
+    """
+    (w, h, bytes RGBA8888) → QImage (bản sao sở hữu dữ liệu), scale vừa thumb_size nếu có.
+    """
+    w, h, data = preview
+    image = QImage(data, w, h, w * 4, QImage.Format_RGBA8888).copy()
+    if thumb_size is not None and (w > thumb_size.width() or h > thumb_size.height()):
+        image = image.scaled(thumb_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return image
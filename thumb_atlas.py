@@ -0,0 +1,209 @@
+# thumb_atlas.py
+
+import os
+import json
+import time
+
+from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QImage, QPainter, QPixmap, QPixmapCache
+
+from persist import file_lock, write_json_atomic, replace_file
+from thumb_cache import entity_thumbnails, pick_variant, _entity_thumb_format
+from remote_cache import remote_cache
+from jobs import submit, BACKGROUND, DONE
+
+# Atlas icon List View cho mỗi section (một loại asset / cả sequencer), dùng chung trên Drive:
+# <project>/00_Pipeline/data/atlas/<key>_<gen>.<ext> (ảnh ghép) + <key>.json (vị trí từng icon)
+ATLAS_PARTS = ("00_Pipeline", "data", "atlas")
+ATLAS_VERSION = 1
+# Ô của mỗi icon = khung icon List View của AssetItemWidget / ShotItemWidget (70×48)
+ATLAS_CELL = (70, 48)
+ATLAS_COLUMNS = 16
+# Quét lại toàn bộ section (stat thumbnail từng entity) ở nền, tối đa một lần mỗi RESCAN_AFTER giây
+RESCAN_AFTER = 300
+
+_last_refresh = {}
+_running = set()
+
+
+def atlas_dir(project_root):
+    return os.path.join(project_root, *ATLAS_PARTS)
+
+
+def atlas_key(project_root, section_folder):
+    """
+    "03_Production/assets/character" → "03_Production_assets_character".
+    """
+    rel = os.path.relpath(section_folder, project_root).replace("\\", "/")
+    return rel.replace("/", "_")
+
+
+def index_path(project_root, key):
+    return os.path.join(atlas_dir(project_root), f"{key}.json")
+
+
+def _read_index(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == ATLAS_VERSION and isinstance(data.get("entries"), dict):
+            return data
+    except Exception:
+        pass
+    return None
+
+
+def _fit(image):
+    if image.width() > ATLAS_CELL[0] or image.height() > ATLAS_CELL[1]:
+        image = image.scaled(ATLAS_CELL[0], ATLAS_CELL[1], Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return image
+
+
+def refresh_atlas(project_root, section_folder, only=None):
+    """
+    Chạy ở thread nền. Cập nhật atlas của section:
+    - only=None: list mọi entity trong section, stat thumbnail nhỏ nhất vừa ô của từng entity;
+    - only=[tên]: chỉ kiểm tra các entity đó (vừa Create Thumbnail), entity khác giữ nguyên.
+    Icon không đổi (cùng file, cùng mtime/size) được cắt lại từ ảnh atlas cũ, chỉ icon mới / đổi
+    mới đọc file thumbnail. Ảnh mới ghi thành <key>_<gen+1> rồi mới ghi index trỏ sang nó
+    (người đang đọc index cũ vẫn mở được ảnh cũ cho tới khi bị xoá).
+    Trả về True nếu atlas có thay đổi.
+    """
+    key = atlas_key(project_root, section_folder)
+    path = index_path(project_root, key)
+    os.makedirs(atlas_dir(project_root), exist_ok=True)
+    with file_lock(path + ".lock"):
+        old = _read_index(path) or {"version": ATLAS_VERSION, "gen": 0, "image": "", "entries": {}}
+        old_entries = old["entries"]
+        old_image = None
+        if old["image"]:
+            old_image = QImage(os.path.join(atlas_dir(project_root), old["image"]))
+            if old_image.isNull():
+                old_image, old_entries = None, {}
+
+        if only is None:
+            names = sorted(n for n in os.listdir(section_folder)
+                           if os.path.isdir(os.path.join(section_folder, n)))
+        else:
+            names = sorted(set(old_entries) | set(only))
+
+        icons = {}
+        # Chưa có index → ghi cả atlas rỗng: section không có thumbnail nào cũng khỏi list từng entity
+        changed = not old["gen"]
+        for name in names:
+            entry = old_entries.get(name)
+            if only is not None and name not in only:
+                if entry and old_image is not None:
+                    icons[name] = (entry, old_image.copy(QRect(*entry["rect"])))
+                continue
+            folder = os.path.join(section_folder, name)
+            try:
+                variants, legacy = entity_thumbnails(folder, os.listdir(folder))
+            except OSError:
+                continue
+            src = pick_variant(variants, ATLAS_CELL) or legacy
+            if not src:
+                continue
+            st = os.stat(src)
+            stamp = [st.st_mtime, st.st_size]
+            if entry and old_image is not None and entry["src"] == os.path.basename(src) \
+                    and entry["stamp"] == stamp:
+                icons[name] = (entry, old_image.copy(QRect(*entry["rect"])))
+                continue
+            image = QImage(src)
+            if image.isNull():
+                continue
+            icons[name] = ({"src": os.path.basename(src), "stamp": stamp}, _fit(image))
+            changed = True
+
+        if not changed and set(icons) == set(old_entries):
+            return False
+
+        # Xếp lại mọi icon vào lưới ATLAS_COLUMNS cột, mỗi icon căn giữa trong ô
+        cw, ch = ATLAS_CELL
+        rows = max(1, (len(icons) + ATLAS_COLUMNS - 1) // ATLAS_COLUMNS)
+        atlas = QImage(cw * ATLAS_COLUMNS, ch * rows, QImage.Format_ARGB32_Premultiplied)
+        atlas.fill(Qt.transparent)
+        painter = QPainter(atlas)
+        entries = {}
+        for i, name in enumerate(sorted(icons)):
+            entry, icon = icons[name]
+            x = (i % ATLAS_COLUMNS) * cw + (cw - icon.width()) // 2
+            y = (i // ATLAS_COLUMNS) * ch + (ch - icon.height()) // 2
+            painter.drawImage(x, y, icon)
+            entries[name] = {"src": entry["src"], "stamp": entry["stamp"],
+                             "rect": [x, y, icon.width(), icon.height()]}
+        painter.end()
+
+        fmt = _entity_thumb_format(atlas)
+        gen = old["gen"] + 1
+        image_name = f"{key}_{gen}.{fmt}"
+        target = os.path.join(atlas_dir(project_root), image_name)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        # Lossless: icon nhỏ, nén mất dữ liệu thêm lần nữa sẽ nhoè
+        if not atlas.save(tmp, fmt.upper(), 100):
+            raise OSError(f"Không thể ghi atlas: {target}")
+        replace_file(tmp, target)
+        write_json_atomic(path, {"version": ATLAS_VERSION, "gen": gen, "image": image_name,
+                                 "cell": list(ATLAS_CELL), "entries": entries}, indent=None)
+        if old["image"] and old["image"] != image_name:
+            try:
+                os.remove(os.path.join(atlas_dir(project_root), old["image"]))
+            except OSError:
+                pass
+    return True
+
+
+def load_atlas(project_root, section_folder):
+    """
+    Icon của section từ atlas (GUI thread): dict tên entity -> (QPixmap atlas, QRect),
+    hoặc None nếu section chưa có atlas. Index + ảnh đọc qua mirror Drive, ảnh giữ trong
+    QPixmapCache nên mỗi section chỉ đọc một file.
+    """
+    key = atlas_key(project_root, section_folder)
+    cache = remote_cache()
+    path = index_path(project_root, key)
+    index = cache.read_json(path)
+    if not isinstance(index, dict) or index.get("version") != ATLAS_VERSION or not index.get("image"):
+        return None
+    image_path = cache.local_file(os.path.join(atlas_dir(project_root), index["image"]))
+    pix = QPixmapCache.find(f"atlas::{image_path}")
+    if pix is None:
+        pix = QPixmap(image_path)
+        if pix.isNull():
+            return None
+        QPixmapCache.insert(f"atlas::{image_path}", pix)
+    return {name: (pix, QRect(*entry["rect"])) for name, entry in index.get("entries", {}).items()}
+
+
+def schedule_refresh(project_root, section_folder, on_changed, only=None, force=False):
+    """
+    Đưa refresh_atlas vào JobScheduler (BACKGROUND). Quét toàn bộ section chỉ khi quá RESCAN_AFTER
+    kể từ lần trước trong phiên (hoặc force); only=[tên] luôn chạy. on_changed() ở GUI thread
+    khi atlas đổi (mirror Drive của index đã được bỏ để lần đọc sau lấy bản mới).
+    """
+    key = atlas_key(project_root, section_folder)
+    if only is None:
+        if key in _running or (not force and time.time() - _last_refresh.get(key, 0) < RESCAN_AFTER):
+            return None
+        _running.add(key)
+        _last_refresh[key] = time.time()
+
+    def on_done(changed):
+        if changed:
+            remote_cache().invalidate(index_path(project_root, key))
+            on_changed()
+
+    def on_finished(job):
+        # Chạy cả khi job bị hủy (on_done / on_error thì không), không thì section bị khoá tới hết phiên
+        if only is None:
+            _running.discard(key)
+            if job.state != DONE:
+                _last_refresh.pop(key, None)
+
+    return submit(f"Atlas {os.path.basename(section_folder)}", _refresh_job, project_root, section_folder, only,
+                  priority=BACKGROUND, retries=1, on_done=on_done, on_finished=on_finished)
+
+
+def _refresh_job(job, project_root, section_folder, only):
+    return refresh_atlas(project_root, section_folder, only)
@@ -0,0 +1,156 @@
+# thumb_cache.py
+
+import os
+import re
+import hashlib
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QImageWriter
+
+from persist import replace_file
+
+BASE_DIR  = os.path.dirname(__file__)
+CACHE_DIR = os.path.join(BASE_DIR, "data", "cache", "thumbs")
+
+# Các mức thumbnail (cạnh dài, px) được tạo sẵn từ một lần decode ảnh gốc
+THUMB_LEVELS = (64, 128, 256, 512)
+DEFAULT_LEVEL = 128
+
+# Thumbnail của asset / shot (Create Thumbnail): các cỡ dựng sẵn, ghi ngay trong folder entity
+# dạng thumbnail_<cỡ>.<định dạng> — icon List View, card Thumbnail View, preview lớn
+ENTITY_THUMB_SIZES = (96, 256, 1024)
+ENTITY_THUMB_QUALITY = 85
+# File cũ (ảnh clipboard full-size), chỉ còn dùng khi entity chưa có biến thể nào
+LEGACY_THUMB = "thumbnail.png"
+_VARIANT_NAME = re.compile(r"^thumbnail_(\d+)\.(webp|jpg|png)$", re.IGNORECASE)
+
+
+def nearest_level(size):
+    """
+    Mức gần nhất với kích thước hiển thị (so theo tỉ lệ, vì các mức cách nhau ×2).
+    """
+    return min(THUMB_LEVELS, key=lambda lv: max(lv, size) / min(lv, size))
+
+
+def _key(path, mtime, size):
+    raw = f"{os.path.normcase(os.path.abspath(path))}|{mtime}|{size}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def level_path(path, mtime, size, level):
+    key = _key(path, mtime, size)
+    return os.path.join(CACHE_DIR, key[:2], f"{key}_{level}.png")
+
+
+def load_level(path, mtime, size, level):
+    """
+    Đọc một mức thumbnail đã cache trên đĩa local. Trả về QImage hoặc None.
+    """
+    cached = level_path(path, mtime, size, level)
+    if not os.path.exists(cached):
+        return None
+    image = QImage(cached)
+    return None if image.isNull() else image
+
+
+def save_pyramid(path, mtime, size, image):
+    """
+    Từ một ảnh đã decode (cạnh dài >= mức lớn nhất nếu ảnh gốc đủ lớn), tạo và lưu
+    mọi mức trong THUMB_LEVELS. Mức nhỏ được scale từ mức lớn kế tiếp (rẻ hơn scale từ ảnh gốc).
+    Trả về dict level -> QImage. Chạy được ở thread nền (chỉ dùng QImage).
+    """
+    levels = {}
+    current = image
+    for level in sorted(THUMB_LEVELS, reverse=True):
+        if current.width() > level or current.height() > level:
+            current = current.scaled(level, level, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        levels[level] = current
+
+        target = level_path(path, mtime, size, level)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = target + ".tmp"
+        if current.save(tmp, "PNG"):
+            try:
+                os.replace(tmp, target)
+            except OSError:
+                pass
+    return levels
+
+
+def _entity_thumb_format(image):
+    """
+    WebP nếu Qt có plugin (nhỏ, giữ alpha); không thì JPG, hoặc PNG khi ảnh có alpha.
+    """
+    if b"webp" in [bytes(f) for f in QImageWriter.supportedImageFormats()]:
+        return "webp"
+    return "png" if image.hasAlphaChannel() else "jpg"
+
+
+def write_entity_thumbnails(folder, image):
+    """
+    Từ ảnh gốc (ví dụ clipboard) tạo mọi cỡ trong ENTITY_THUMB_SIZES, mỗi cỡ scale từ cỡ lớn kế tiếp.
+    Ghi hết ra file tạm trước rồi mới os.replace từng file: người khác đang list folder không
+    bao giờ đọc phải file ghi dở. Xoá biến thể cũ khác định dạng và LEGACY_THUMB.
+    Chạy được ở thread nền (chỉ dùng QImage). Trả về dict cỡ -> path.
+    """
+    fmt = _entity_thumb_format(image)
+    current = image
+    if fmt == "jpg":
+        current = current.convertToFormat(QImage.Format_RGB32)
+    staged = []
+    try:
+        for size in sorted(ENTITY_THUMB_SIZES, reverse=True):
+            if current.width() > size or current.height() > size:
+                current = current.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            target = os.path.join(folder, f"thumbnail_{size}.{fmt}")
+            tmp = f"{target}.{os.getpid()}.tmp"
+            if not current.save(tmp, fmt.upper(), ENTITY_THUMB_QUALITY):
+                raise OSError(f"Không thể ghi thumbnail: {target}")
+            staged.append((tmp, target))
+    except BaseException:
+        for tmp, _ in staged:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        raise
+    for tmp, target in staged:
+        replace_file(tmp, target)
+
+    variants = {size: target for size, (_, target) in zip(sorted(ENTITY_THUMB_SIZES, reverse=True), staged)}
+    written = set(variants.values())
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        if name == LEGACY_THUMB or (_VARIANT_NAME.match(name) and path not in written):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return variants
+
+
+def entity_thumbnails(folder, names):
+    """
+    Từ danh sách tên file của folder entity (listing có sẵn, không stat thêm):
+    (dict cỡ -> path của các biến thể, path LEGACY_THUMB hoặc "").
+    """
+    variants = {}
+    legacy = ""
+    for name in names:
+        m = _VARIANT_NAME.match(name)
+        if m:
+            variants[int(m.group(1))] = os.path.join(folder, name)
+        elif name == LEGACY_THUMB:
+            legacy = os.path.join(folder, name)
+    return variants, legacy
+
+
+def pick_variant(variants, box):
+    """
+    Biến thể nhỏ nhất vẫn phủ được khung box=(w, h); không có cỡ nào đủ lớn → cỡ lớn nhất.
+    """
+    if not variants:
+        return ""
+    need = max(box) if box else 0
+    fitting = [size for size in variants if size >= need]
+    return variants[min(fitting) if fitting else max(variants)]
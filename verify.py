@@ -0,0 +1,380 @@
+# verify.py
+"""
+So khớp bản Local của project với bản trên Drive (sau Download / copy tay):
+
+    python verify.py <drive_project> <local_project> [--repair]
+
+Trong app: chuột phải project trong ProjectSelectionDialog → "Verify Local Copy".
+"""
+
+import os
+import sys
+import time
+import shutil
+import fnmatch
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QProgressBar, QPlainTextEdit, QPushButton
+)
+from jobs import job_scheduler, submit, JobCancelled, DONE, CANCELLED
+from texture_cache import TextureMetaCache
+from persist import replace_file
+
+try:
+    import xxhash  # nhanh hơn blake2b nhiều lần nếu có cài
+except ImportError:
+    xxhash = None
+
+BASE_DIR  = os.path.dirname(__file__)
+CACHE_DIR = os.path.join(BASE_DIR, "data", "cache", "verify")
+
+HASH_ALGO = "xxh3_128" if xxhash else "blake2b-128"
+# Đọc file theo khối lớn: ít round trip hơn trên ổ mạng
+HASH_BUFFER = 4 * 1024 * 1024
+# Số file hash song song (hashlib nhả GIL khi hash khối lớn, thời gian chủ yếu là chờ I/O)
+VERIFY_WORKERS = 8
+# File tạm / lock / file hệ thống không so
+IGNORE_NAMES = ("*.lock", "*.tmp", "Thumbs.db", "desktop.ini", ".DS_Store")
+
+
+def _new_hasher():
+    return xxhash.xxh3_128() if xxhash else hashlib.blake2b(digest_size=16)
+
+
+def hash_file(path):
+    h = _new_hasher()
+    buf = bytearray(HASH_BUFFER)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+class HashCache(TextureMetaCache):
+    """
+    Hash đã tính của một cây thư mục, theo đường dẫn tương đối; khớp (mtime, size) → dùng lại.
+    """
+    cache_dir = CACHE_DIR
+
+    def get_hash(self, rel, mtime, size):
+        entry = self.get(rel, mtime, size)
+        return entry["hash"] if entry and entry.get("algo") == HASH_ALGO else None
+
+    def put_hash(self, rel, mtime, size, digest):
+        self.put(rel, mtime, {"file_size": size, "hash": digest, "algo": HASH_ALGO})
+
+
+def list_tree(root):
+    """
+    dict đường dẫn tương đối ("/") -> (size, mtime) của mọi file trong root.
+    """
+    files = {}
+    stack = [("", root)]
+    while stack:
+        rel_dir, folder = stack.pop()
+        try:
+            entries = list(os.scandir(folder))
+        except OSError:
+            continue
+        for entry in entries:
+            rel = f"{rel_dir}{entry.name}"
+            if entry.is_dir(follow_symlinks=False):
+                stack.append((rel + "/", entry.path))
+            elif entry.is_file() and not any(fnmatch.fnmatch(entry.name, p) for p in IGNORE_NAMES):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue  # File vừa bị xoá / đổi tên (Drive đang sync)
+                files[rel] = (st.st_size, st.st_mtime)
+    return files
+
+
+def verify_trees(drive_root, local_root, progress=None, cancelled=None):
+    """
+    So hai cây: thiếu ở Local, thừa ở Local, khác size, khác hash (chỉ hash file cùng size).
+    progress(done, total) theo số file cần hash. Bị hủy → None.
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        drive_files, local_files = executor.map(list_tree, (drive_root, local_root))
+
+    missing = sorted(set(drive_files) - set(local_files))
+    extra = sorted(set(local_files) - set(drive_files))
+    mismatched = []
+    same_size = []
+    for rel in sorted(set(drive_files) & set(local_files)):
+        if drive_files[rel][0] != local_files[rel][0]:
+            mismatched.append((rel, "size"))
+        else:
+            same_size.append(rel)
+
+    caches = {drive_root: HashCache(drive_root), local_root: HashCache(local_root)}
+    stats = {drive_root: drive_files, local_root: local_files}
+    jobs = []
+    digests = {}
+    for rel in same_size:
+        for root in (drive_root, local_root):
+            size, mtime = stats[root][rel]
+            cached = caches[root].get_hash(rel, mtime, size)
+            if cached:
+                digests[(root, rel)] = cached
+            else:
+                jobs.append((root, rel))
+
+    hashed_bytes = 0
+    if jobs:
+        with ThreadPoolExecutor(max_workers=VERIFY_WORKERS) as executor:
+            futures = {executor.submit(hash_file, os.path.join(root, *rel.split("/"))): (root, rel)
+                       for root, rel in jobs}
+            for done, (fut, (root, rel)) in enumerate(futures.items(), 1):
+                if cancelled and cancelled():
+                    for other in futures:
+                        other.cancel()
+                    return None
+                try:
+                    digest = fut.result()
+                except OSError:
+                    digest = None
+                size, mtime = stats[root][rel]
+                if digest:
+                    caches[root].put_hash(rel, mtime, size, digest)
+                    hashed_bytes += size
+                digests[(root, rel)] = digest
+                if progress and (done % 20 == 0 or done == len(futures)):
+                    progress(done, len(futures))
+
+    for rel in same_size:
+        a, b = digests.get((drive_root, rel)), digests.get((local_root, rel))
+        if a is None or b is None:
+            mismatched.append((rel, "unreadable"))
+        elif a != b:
+            mismatched.append((rel, "hash"))
+    mismatched.sort()
+    for root, cache in caches.items():
+        cache.prune(stats[root])
+        cache.save()
+
+    return {
+        "drive":        drive_root,
+        "local":        local_root,
+        "files":        len(drive_files),
+        "missing":      missing,
+        "extra":        extra,
+        "mismatched":   mismatched,
+        "hashed":       len(jobs),
+        "cached":       len(same_size) * 2 - len(jobs),
+        "hashed_bytes": hashed_bytes,
+        "elapsed":      time.perf_counter() - start,
+    }
+
+
+def _copy_file(src, dst):
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp = f"{dst}.{os.getpid()}.tmp"
+    try:
+        shutil.copyfile(src, tmp)
+        shutil.copystat(src, tmp)
+        replace_file(tmp, dst)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def repair(report, progress=None, cancelled=None):
+    """
+    Copy lại từ Drive đúng các file thiếu / sai ở Local (file tạm → os.replace), rồi hash lại
+    hai bên để xác nhận. Trả về (list đã sửa, list (file, lỗi)).
+    """
+    drive_root, local_root = report["drive"], report["local"]
+    targets = report["missing"] + [rel for rel, _ in report["mismatched"]]
+    caches = [HashCache(drive_root), HashCache(local_root)]
+    fixed, errors = [], []
+    for done, rel in enumerate(targets, 1):
+        if cancelled and cancelled():
+            break
+        paths = [os.path.join(root, *rel.split("/")) for root in (drive_root, local_root)]
+        try:
+            _copy_file(*paths)
+            digests = [hash_file(p) for p in paths]
+            # copystat giữ nguyên mtime → phải ghi đè hash cũ (của bản hỏng) trong cache
+            for cache, path, digest in zip(caches, paths, digests):
+                st = os.stat(path)
+                cache.put_hash(rel, st.st_mtime, st.st_size, digest)
+            if digests[0] != digests[1]:
+                raise OSError("hash vẫn khác sau khi copy")
+            fixed.append(rel)
+        except OSError as e:
+            errors.append((rel, str(e)))
+        if progress:
+            progress(done, len(targets))
+    for cache in caches:
+        cache.save()
+    return fixed, errors
+
+
+def format_report(report):
+    lines = [
+        f"{report['files']} file trên Drive · hash {report['hashed']} file "
+        f"({report['hashed_bytes'] / 1048576:.0f} MB), dùng cache {report['cached']} · {report['elapsed']:.1f} s",
+    ]
+    if not (report["missing"] or report["mismatched"]):
+        lines.append("Local khớp với Drive.")
+    for rel in report["missing"]:
+        lines.append(f"THIẾU    {rel}")
+    for rel, reason in report["mismatched"]:
+        lines.append(f"SAI ({reason})  {rel}")
+    for rel in report["extra"]:
+        lines.append(f"THỪA    {rel}")
+    return "\n".join(lines)
+
+
+# ---------- Job ----------
+
+def verify_job(job, drive_root, local_root):
+    """
+    Job (jobs.submit): verify_trees; trả về report.
+    """
+    def progress(done, total):
+        job.report(100 * done / total, f"hash {done}/{total}")
+
+    report = verify_trees(drive_root, local_root, progress, lambda: job.cancelled)
+    if report is None:
+        raise JobCancelled()
+    return report
+
+
+def repair_job(job, report):
+    """
+    Job (jobs.submit): repair; bị hủy giữa chừng vẫn trả về phần đã sửa (fixed, errors).
+    """
+    return repair(report, lambda done, total: job.report(100 * done / total, f"{done}/{total}"),
+                  lambda: job.cancelled)
+
+
+class VerifyDialog(QDialog):
+    """
+    Chạy verify ngay khi mở; có file thiếu / sai thì bật nút Repair.
+    """
+
+    def __init__(self, drive_root, local_root, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Verify — {os.path.basename(local_root)}")
+        self.resize(720, 420)
+        self.drive_root = drive_root
+        self.local_root = local_root
+        self.report = None
+        self._job = None
+        job_scheduler().job_changed.connect(self._on_job_changed)
+
+        layout = QVBoxLayout(self)
+        self.status_label = QLabel(f"Drive: {drive_root}\nLocal: {local_root}")
+        layout.addWidget(self.status_label)
+        self.progress = QProgressBar()
+        layout.addWidget(self.progress)
+        self.output = QPlainTextEdit()
+        self.output.setReadOnly(True)
+        layout.addWidget(self.output)
+
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        self.verify_btn = QPushButton("Verify lại")
+        self.verify_btn.clicked.connect(self.start_verify)
+        self.repair_btn = QPushButton("Repair")
+        self.repair_btn.setEnabled(False)
+        self.repair_btn.clicked.connect(self.start_repair)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        buttons.addWidget(self.verify_btn)
+        buttons.addWidget(self.repair_btn)
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+
+        self.start_verify()
+
+    def _start(self, title, fn, *args, on_done, text):
+        """
+        Chạy fn ở JobScheduler (hiện cả ở dock Jobs: hủy / thử lại được từ đó).
+        """
+        self.verify_btn.setEnabled(False)
+        self.repair_btn.setEnabled(False)
+        self.progress.setRange(0, 0)
+        self.output.setPlainText(text)
+        self._job = submit(title, fn, *args, on_done=on_done, on_finished=self._on_finished)
+
+    def start_verify(self):
+        self._start(f"Verify {os.path.basename(self.local_root)}", verify_job, self.drive_root, self.local_root,
+                    on_done=self._on_verified, text="Đang so khớp…")
+
+    def start_repair(self):
+        if self.report:
+            self._start(f"Repair {os.path.basename(self.local_root)}", repair_job, self.report,
+                        on_done=self._on_repaired, text="Đang copy lại file thiếu / sai…")
+
+    def _on_job_changed(self, job):
+        if job is self._job and job.value:
+            self.progress.setRange(0, 100)
+            self.progress.setValue(job.value)
+
+    def _on_verified(self, report):
+        self.report = report
+        self.output.setPlainText(format_report(report))
+        self.repair_btn.setEnabled(bool(report["missing"] or report["mismatched"]))
+
+    def _on_repaired(self, result):
+        fixed, errors = result
+        lines = [f"Đã sửa {len(fixed)} file."] + [f"LỖI  {rel}: {err}" for rel, err in errors]
+        self.output.setPlainText("\n".join(lines))
+        self.report = None
+
+    def _on_finished(self, job):
+        if job is not self._job:
+            return
+        self._job = None
+        self.progress.setRange(0, 1)
+        self.progress.setValue(1)
+        self.verify_btn.setEnabled(True)
+        if job.state == CANCELLED:
+            self.output.setPlainText("Đã hủy.")
+        elif job.state != DONE:
+            self.output.setPlainText(f"Lỗi: {job.error}")
+
+    def closeEvent(self, event):
+        if self._job is not None:
+            job_scheduler().cancel(self._job)
+        super().closeEvent(event)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="So khớp bản Local của project với bản trên Drive.")
+    parser.add_argument("drive_root")
+    parser.add_argument("local_root")
+    parser.add_argument("--repair", action="store_true", help="copy lại file thiếu / sai từ Drive")
+    args = parser.parse_args(argv)
+
+    def show(done, total):
+        print(f"\r  hash {done}/{total}", end="", flush=True)
+
+    report = verify_trees(args.drive_root, args.local_root, show)
+    print("\r" + format_report(report))
+    bad = report["missing"] or report["mismatched"]
+    if bad and args.repair:
+        fixed, errors = repair(report, show)
+        print(f"\rĐã sửa {len(fixed)} file, lỗi {len(errors)}.")
+        for rel, err in errors:
+            print(f"LỖI  {rel}: {err}")
+        return 1 if errors else 0
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())